@@ -0,0 +1,115 @@
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+# Lower numbers are admitted first
+PRIORITY_REMINDER = 0   # setting reminders and multi-turn completions
+PRIORITY_COMMAND = 1    # other command classification (chit-chat, lookups)
+PRIORITY_REPHRASE = 2   # generate_natural_response rephrasing
+
+PRIORITY_NAMES = {PRIORITY_REMINDER: "reminder", PRIORITY_COMMAND: "command", PRIORITY_REPHRASE: "rephrase"}
+
+
+class AdmissionRejected(Exception):
+    """Raised when a call is shed instead of waiting for capacity"""
+
+
+class AdmissionController:
+    """Concurrency limit plus token-bucket rate limit with a priority queue.
+
+    A call is admitted when fewer than `max_concurrent` calls are running, a
+    token is available (tokens refill at `rate` per second up to `burst`)
+    and no higher priority call is waiting. Calls that cannot be admitted
+    within `max_wait` seconds, or whose estimated wait is already longer
+    than that when they arrive, raise AdmissionRejected so the caller can
+    fall back to a local path instead of queueing.
+    """
+
+    def __init__(self, max_concurrent: int, rate: float, burst: int, max_wait: float):
+        self.max_concurrent = max_concurrent
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._running = 0
+        # Waiting calls as (priority, arrival order); the smallest goes next
+        self._waiting = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _estimated_wait(self, priority: int) -> float:
+        """Rough time until a new call of this priority would get a token"""
+        if self.rate <= 0:
+            return 0.0
+        ahead = sum(1 for waiting_priority, _ in self._waiting if waiting_priority <= priority)
+        missing = ahead + 1 - self._tokens
+        return max(missing, 0) / self.rate
+
+    def _can_run(self, entry) -> bool:
+        return (self._waiting[0] == entry and self._running < self.max_concurrent
+                and (self.rate <= 0 or self._tokens >= 1))
+
+    def acquire(self, priority: int = PRIORITY_COMMAND):
+        """Wait for admission; raises AdmissionRejected if it would take longer than max_wait"""
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            if self._estimated_wait(priority) > self.max_wait:
+                raise AdmissionRejected(f"Estimated wait over {self.max_wait}s")
+
+            entry = (priority, next(self._order))
+            heapq.heappush(self._waiting, entry)
+            deadline = now + self.max_wait
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._can_run(entry):
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise AdmissionRejected(f"Not admitted within {self.max_wait}s")
+                    # Without a token nobody is woken by release(), so poll
+                    # for the next refill instead
+                    if self.rate > 0 and self._tokens < 1:
+                        remaining = min(remaining, (1 - self._tokens) / self.rate)
+                    self._condition.wait(remaining)
+                heapq.heappop(self._waiting)
+                self._running += 1
+                if self.rate > 0:
+                    self._tokens -= 1
+            except AdmissionRejected:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                raise
+            finally:
+                # The next waiter may be able to run now
+                self._condition.notify_all()
+
+    def release(self):
+        with self._condition:
+            self._running -= 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, priority: int = PRIORITY_COMMAND):
+        """Hold an admission slot for the duration of the block"""
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def queue_length(self) -> int:
+        return len(self._waiting)
+
+    def running(self) -> int:
+        return self._running
@@ -1,26 +1,235 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-from datetime import datetime
+from datetime import datetime, timedelta
+import json
+import os
 import threading
 import time
 
-from services import WeatherService, NewsService, ReminderManager
+from services import WeatherService, NewsService, parse_reminder_record
 from command_parser import CommandParser
 from gemini_processor import GeminiCommandProcessor
+from process_lock import FileLock
+from recurrence import RecurrenceRule
+from reminder_index import encode_cursor, decode_cursor
+from reminder_record import format_micros, from_micros
+from reminder_partitions import ReminderPartitions, partition_name
+from json_responses import install_json_provider, ResponseCache
+from weather_cache import WeatherPrefetcher
+from speculation import Speculator
+from event_log import EventLog
+from reminder_delivery import ConsoleNotifier, DeliveryPool, WebhookNotifier
+from ws_channel import ChannelHub, PushNotifier, install_command_channel
 import config
+import metrics
+import tracing
+import profiling
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React frontend
+install_json_provider(app, config.JSON_PROVIDER)
+# Serialized bodies for endpoints whose payload rarely changes
+response_cache = ResponseCache(app)
 
 # Initialize services
 weather_service = WeatherService()
 news_service = NewsService()
-reminder_manager = ReminderManager()
+# Looks weather_service up on every call, so it can be swapped at runtime
+weather_prefetcher = WeatherPrefetcher(lambda city: weather_service.get_weather(city), config.DEFAULT_CITY,
+                                       ttl=config.WEATHER_CACHE_TTL, interval=config.WEATHER_PREFETCH_INTERVAL,
+                                       top_k=config.WEATHER_PREFETCH_TOP_K,
+                                       budget_per_hour=config.WEATHER_CALL_BUDGET_PER_HOUR)
+# One reminder store per user (X-User-Id header); requests without the
+# header share the original reminders.json
+reminder_partitions = ReminderPartitions(config.REMINDER_DATA_DIR,
+                                         max_loaded=config.REMINDER_MAX_LOADED_USERS,
+                                         idle_seconds=config.REMINDER_USER_IDLE_SECONDS)
 command_parser = CommandParser()
 gemini_processor = GeminiCommandProcessor()
+# Starts the weather or news fetch the local parser expects while Gemini is
+# still classifying the command; both look the services up on every call, and
+# nothing is guessed while the caller's reminder is waiting for its text
+speculator = None
+if config.SPECULATIVE_PREFETCH_WORKERS > 0:
+    speculative_fetchers = {
+        "weather": ("city", lambda city: weather_prefetcher.lookup(city)),
+        "news": ("category", lambda category: news_service.get_news(category=category)),
+    }
+    speculator = Speculator(lambda command: gemini_processor.guess(command, request.headers.get('X-User-Id')),
+                            {action: speculative_fetchers[action] for action in config.SPECULATIVE_PREFETCH_INTENTS
+                             if action in speculative_fetchers},
+                            workers=config.SPECULATIVE_PREFETCH_WORKERS)
+
+metrics.REGISTRY.gauge("voice_assistant_reminders_stored", "Reminders held in the store",
+                        lambda: sum(len(manager.reminders) for _, manager in reminder_partitions.loaded()))
+metrics.REGISTRY.gauge("voice_assistant_reminders_pending", "Reminders that have not fired yet",
+                        lambda: sum(manager.count_pending() for _, manager in reminder_partitions.loaded()))
+metrics.REGISTRY.gauge("voice_assistant_weather_cached_cities", "Cities with cached weather",
+                        lambda: len(weather_prefetcher))
+metrics.REGISTRY.gauge("voice_assistant_reminder_partitions_loaded", "Per-user reminder stores held in memory",
+                        lambda: len(reminder_partitions.loaded()))
+metrics.REGISTRY.gauge("voice_assistant_intent_cache_entries", "Commands held in the intent similarity cache",
+                        lambda: len(gemini_processor.intent_cache or ()))
+metrics.REGISTRY.gauge("voice_assistant_intent_cache_hit_ratio", "Share of intent cache lookups that were hits",
+                        lambda: metrics.INTENT_CACHE.value(result="hit") / max(
+                            metrics.INTENT_CACHE.value(result="hit") + metrics.INTENT_CACHE.value(result="miss"), 1))
+metrics.REGISTRY.gauge("voice_assistant_speculation_hit_ratio",
+                        "Share of speculative fetches whose guess the classification agreed with",
+                        lambda: sum(metrics.SPECULATIONS.value(action=action, outcome="hit")
+                                    for action in config.SPECULATIVE_PREFETCH_INTENTS) / max(
+                            sum(metrics.SPECULATIONS.value(action=action, outcome=outcome)
+                                for action in config.SPECULATIVE_PREFETCH_INTENTS
+                                for outcome in ("hit", "miss")), 1))
+
+trace_sampler = tracing.TraceSampler(config.TRACE_LOG_FILE, config.TRACE_SAMPLE_RATE)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.get('request_start')
+    if start is not None:
+        total = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.HTTP_LATENCY.observe(total, route=route, method=request.method)
+        metrics.HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        
+        spans = tracing.current_spans()
+        response.headers['Server-Timing'] = tracing.server_timing_header(spans, total)
+        # Lets the cross-origin frontend read Server-Timing in devtools/PerformanceResourceTiming
+        response.headers['Timing-Allow-Origin'] = '*'
+        if trace_sampler.should_sample():
+            trace_sampler.write(route, request.method, response.status_code, total, spans)
+    return response
+
+def command_event_record(event):
+    """Finish a command event on the log writer thread, reading the outcome from the response body"""
+    body = event.pop('response_body', None)
+    try:
+        payload = json.loads(body) if body else {}
+    except ValueError:
+        payload = {}
+    event['success'] = payload.get('success')
+    event['response'] = payload.get('response')
+    if payload.get('error'):
+        event['error'] = payload['error']
+    return event
+
+# Structured log of every /api/command: input, classification, outcome and timings
+event_log = None
+if config.EVENT_LOG_DIR:
+    event_log = EventLog(config.EVENT_LOG_DIR, max_queue=config.EVENT_LOG_QUEUE_SIZE,
+                         batch_size=config.EVENT_LOG_BATCH_SIZE, flush_interval=config.EVENT_LOG_FLUSH_INTERVAL,
+                         max_bytes=config.EVENT_LOG_MAX_BYTES, backups=config.EVENT_LOG_BACKUPS,
+                         prepare=command_event_record)
+    metrics.REGISTRY.gauge("voice_assistant_event_log_queue_length", "Command events waiting to be written",
+                           lambda: event_log.queue_length())
+
+@app.after_request
+def log_command_event(response):
+    """Queue the command event; serialization and the response body parse happen on the writer thread"""
+    if event_log is not None and 'command' in g:
+        start = g.get('request_start', time.perf_counter())
+        event_log.emit({
+            'timestamp': time.time(),
+            'pid': os.getpid(),
+            'user': partition_name(request.headers.get('X-User-Id')) or None,
+            'command': g.command,
+            'intent': g.get('intent'),
+            'result': g.get('command_result'),
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 3),
+            'spans': [{'name': name, 'start_ms': round(offset * 1000, 3), 'duration_ms': round(duration * 1000, 3)}
+                      for name, offset, duration in tracing.current_spans()],
+            'response_body': None if response.is_streamed else response.get_data(),
+        })
+    return response
+
+# On-demand profiling. These hooks are registered after the metrics hooks so
+# the profiler starts last and (after_request running in reverse) stops first.
+profile_trigger = profiling.ProfileTrigger(config.PROFILE_SECRET, config.PROFILE_SAMPLE_EVERY)
+
+@app.before_request
+def start_profiler():
+    if profile_trigger.should_profile(request):
+        g.profiler = profiling.RequestProfiler()
+        g.profiler.start()
+
+@app.after_request
+def stop_profiler(response):
+    if 'profiler' in g:
+        g.profiler.stop()
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        g.profile_name = profiling.profile_name(route, g.get('intent', 'none'))
+        response.headers['X-Profile-Id'] = g.profile_name
+    return response
+
+@app.teardown_request
+def write_profile(exc):
+    """Write the profile once the request is done (also when the view raised)"""
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return
+    profiler.stop()
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    name = g.get('profile_name') or profiling.profile_name(route, g.get('intent', 'none'))
+    try:
+        profiling.write_profile(config.PROFILE_DIR, name, profiler)
+    except OSError as e:
+        print(f"Failed to write profile {name}: {e}")
+
+# Persistent WebSocket channels (/api/ws) carrying commands and pushes
+channel_hub = ChannelHub()
+install_command_channel(app, channel_hub, max_in_flight=config.WS_MAX_IN_FLIGHT,
+                        ping_interval=config.WS_PING_INTERVAL, max_message_size=config.WS_MAX_MESSAGE_SIZE)
+metrics.REGISTRY.gauge("voice_assistant_ws_connections", "Open command channel WebSockets",
+                       lambda: len(channel_hub))
+
+# Due reminders are handed to a worker pool so slow deliveries never hold
+# up the scheduler. Users with an open channel get them pushed there.
+if config.REMINDER_WEBHOOK_URL:
+    reminder_notifiers = {'webhook': WebhookNotifier(config.REMINDER_WEBHOOK_URL, config.REMINDER_WEBHOOK_TIMEOUT)}
+else:
+    reminder_notifiers = {'console': ConsoleNotifier()}
+reminder_notifiers = {target: PushNotifier(channel_hub, notifier) for target, notifier in reminder_notifiers.items()}
+reminder_delivery = DeliveryPool(reminder_notifiers, workers=config.REMINDER_DELIVERY_WORKERS,
+                                 batch_size=config.REMINDER_DELIVERY_BATCH_SIZE,
+                                 max_attempts=config.REMINDER_DELIVERY_MAX_ATTEMPTS,
+                                 backoff=config.REMINDER_DELIVERY_BACKOFF,
+                                 backoff_max=config.REMINDER_DELIVERY_BACKOFF_MAX)
+metrics.REGISTRY.gauge("voice_assistant_reminder_deliveries_pending", "Reminder deliveries queued or in flight",
+                       lambda: reminder_delivery.pending())
+
+def delivery_payload(partition, reminder, fired):
+    """What a notifier receives for one firing of a reminder"""
+    payload = {'user': partition or None, 'id': reminder.id, 'text': reminder.text, 'time': fired}
+    if reminder.recurrence is not None:
+        payload['recurrence_description'] = RecurrenceRule.from_dict(reminder.recurrence).describe()
+    return payload
+
+def deliver_reminders():
+    """Acknowledge finished deliveries, then queue every unacknowledged firing.
+    
+    Keys already queued or in flight are skipped by the pool, so firings
+    left over from a crashed or former leader are picked up here too.
+    """
+    outcomes = {}
+    for (partition, reminder_id, fired), delivered in reminder_delivery.results():
+        outcomes.setdefault(partition, []).append((reminder_id, fired, delivered))
+    for partition, partition_outcomes in outcomes.items():
+        reminder_partitions.get_partition(partition).mark_delivered(partition_outcomes)
+    
+    for partition, reminder, fired in reminder_partitions.undelivered():
+        reminder_delivery.submit((partition, reminder.id, fired), delivery_payload(partition, reminder, fired))
 
 # Global state for reminders checking
 reminder_checker_running = False
+# Every worker process runs a checker thread, but only the one holding this
+# lock fires reminders. If the leader dies the OS drops the lock and another
+# worker takes over on its next tick.
+reminder_leader_lock = FileLock(config.REMINDER_LEADER_LOCK)
 
 def start_reminder_checker():
     """Start background reminder checker"""
@@ -29,15 +238,35 @@ def start_reminder_checker():
         reminder_checker_running = True
         threading.Thread(target=reminder_checker_thread, daemon=True).start()
 
+def start_background_tasks():
+    """Start the per-process background threads (reminders, weather prefetch)"""
+    start_reminder_checker()
+    weather_prefetcher.start()
+
 def reminder_checker_thread():
     """Background thread to check reminders"""
     global reminder_checker_running
+    last_compaction = 0.0
     while reminder_checker_running:
         try:
-            due_reminders = reminder_manager.get_due_reminders()
-            # In a real app, you'd send these via WebSocket or similar
-            for reminder in due_reminders:
-                print(f"Reminder due: {reminder['text']}")
+            if not reminder_leader_lock.acquire(blocking=False):
+                time.sleep(config.REMINDER_CHECK_INTERVAL)
+                continue
+            
+            # Firing records each due reminder as undelivered in its store
+            reminder_partitions.get_due_reminders()
+            deliver_reminders()
+            
+            # Only the leader archives, so workers never compact concurrently.
+            # The manifest records each partition's oldest completion, so
+            # partitions evicted since their reminders fired are loaded too.
+            if time.time() - last_compaction >= config.REMINDER_COMPACT_INTERVAL:
+                last_compaction = time.time()
+                retention = timedelta(hours=config.REMINDER_ARCHIVE_AFTER_HOURS)
+                archived = reminder_partitions.compact(retention)
+                if archived:
+                    print(f"Archived {archived} completed reminders")
+            reminder_partitions.evict_idle()
         except Exception as e:
             print(f"Reminder checker error: {e}")
         time.sleep(config.REMINDER_CHECK_INTERVAL)
@@ -45,11 +274,14 @@ def reminder_checker_thread():
 @app.route('/api/status', methods=['GET'])
 def get_status():
     """Get system status"""
-    return jsonify({
+    # The payload only changes with the timestamp, so serialize it at most
+    # once per second
+    now = datetime.now().replace(microsecond=0)
+    return response_cache.get('status', lambda: {
         'status': 'online',
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': now.isoformat(),
         'location': f"{config.DEFAULT_CITY}, {config.DEFAULT_COUNTRY.upper()}"
-    })
+    }, key=now)
 
 @app.route('/api/time', methods=['GET'])
 def get_time():
@@ -63,10 +295,21 @@ def get_time():
         'response': f"The current time is {current_time}"
     })
 
-def get_weather_for_city(city):
-    """Get weather information for a specific city"""
+def speculative_result(prefetched):
+    """Wait for a speculative fetch that the classification agreed with"""
+    with tracing.span("speculation_wait"):
+        return prefetched.result()
+
+def get_weather_for_city(city, prefetched=None):
+    """Get weather information for a specific city, or from a speculative fetch of it"""
     try:
-        weather_data = weather_service.get_weather(city)
+        if prefetched is not None:
+            weather_data, fetched = speculative_result(prefetched)
+            # Only counted for the hot-city ranking and call budget now that
+            # the classification agreed on the city
+            weather_prefetcher.record_request(city, fetched)
+        else:
+            weather_data = weather_prefetcher.get_weather(city)
         
         if "error" in weather_data:
             if "mock_data" in weather_data:
@@ -142,39 +385,105 @@ def get_news():
             'response': f"Error getting news: {str(e)}"
         }), 500
 
+def user_reminders():
+    """Reminder store of the user making the current request"""
+    return reminder_partitions.get(request.headers.get('X-User-Id'))
+
+def format_reminder(reminder):
+    """Shape a stored reminder record for API responses"""
+    reminder_time = from_micros(reminder.time)
+    formatted = {
+        'id': reminder.id,
+        'text': reminder.text,
+        'time': reminder_time.isoformat(),
+        'formatted_time': reminder_time.strftime("%I:%M %p on %B %d")
+    }
+    if reminder.recurrence is not None:
+        formatted['recurrence'] = reminder.recurrence
+        formatted['recurrence_description'] = RecurrenceRule.from_dict(reminder.recurrence).describe()
+    return formatted
+
+def reminder_result_data(result):
+    """Response data for a reminder_set command result"""
+    data = {
+        'text': result.get("text", ""),
+        'time': result.get("time"),
+        'formatted_time': result.get("formatted_time")
+    }
+    if result.get("recurrence"):
+        data['recurrence'] = result["recurrence"]
+        data['recurrence_description'] = result.get("recurrence_description")
+    return data
+
+def summarize_reminders(reminders, total):
+    """Spoken summary of a reminder page, listing at most REMINDER_SUMMARY_LIMIT items"""
+    if total == 0:
+        return "You have no upcoming reminders"
+    if total == 1 and reminders:
+        reminder = reminders[0]
+        return f"You have 1 upcoming reminder: '{reminder['text']}' at {reminder['formatted_time']}"
+    
+    listed = reminders[:config.REMINDER_SUMMARY_LIMIT]
+    response = f"You have {total} upcoming reminders:\n"
+    for i, reminder in enumerate(listed, 1):
+        repeats = f" (repeats {reminder['recurrence_description']})" if 'recurrence' in reminder else ""
+        response += f"{i}. '{reminder['text']}' at {reminder['formatted_time']}{repeats}\n"
+    if total > len(listed):
+        response += f"...and {total - len(listed)} more"
+    return response.strip()  # Remove trailing newline
+
+def parse_time_arg(name):
+    """Parse an optional ISO time query parameter"""
+    value = request.args.get(name)
+    return datetime.fromisoformat(value) if value else None
+
 @app.route('/api/reminders', methods=['GET'])
 def get_reminders():
-    """Get upcoming reminders"""
+    """Get a page of upcoming reminders, or only the changes since a version
+    
+    Query parameters: since (version for delta sync), from/to (ISO time
+    window), limit (page size) and cursor (next_cursor of the previous page).
+    """
     try:
-        upcoming = reminder_manager.get_upcoming_reminders()
+        since = request.args.get('since', type=int)
+        if since is not None:
+            changes = user_reminders().get_changes(since)
+            if not changes['reset']:
+                upserted = [format_reminder(reminder) for reminder in changes['upserted']]
+                return jsonify({
+                    'success': True,
+                    'version': changes['version'],
+                    'reset': False,
+                    'upserted': upserted,
+                    'removed': changes['removed'],
+                    'response': f"{len(upserted)} reminders changed, {len(changes['removed'])} removed"
+                })
         
-        response_data = []
-        for reminder in upcoming:
-            reminder_time = datetime.fromisoformat(reminder['time'])
-            formatted_time = reminder_time.strftime("%I:%M %p on %B %d")
-            response_data.append({
-                'id': reminder['id'],
-                'text': reminder['text'],
-                'time': reminder['time'],
-                'formatted_time': formatted_time
-            })
+        try:
+            start = parse_time_arg('from')
+            end = parse_time_arg('to')
+            cursor = request.args.get('cursor')
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e),
+                'response': "Invalid reminder query. Use ISO times for 'from' and 'to'."
+            }), 400
+        limit = request.args.get('limit', config.REMINDER_PAGE_SIZE, type=int)
+        limit = max(1, min(limit, config.REMINDER_MAX_PAGE_SIZE))
         
-        if response_data:
-            if len(response_data) == 1:
-                reminder = response_data[0]
-                response = f"You have 1 upcoming reminder: '{reminder['text']}' at {reminder['formatted_time']}"
-            else:
-                response = f"You have {len(response_data)} upcoming reminders:\n"
-                for i, reminder in enumerate(response_data, 1):
-                    response += f"{i}. '{reminder['text']}' at {reminder['formatted_time']}\n"
-                response = response.strip()  # Remove trailing newline
-        else:
-            response = "You have no upcoming reminders"
+        page = user_reminders().query_reminders(start, end, after=after, limit=limit)
+        response_data = [format_reminder(reminder) for reminder in page['reminders']]
         
         return jsonify({
             'success': True,
+            'version': page['version'],
+            'reset': since is not None,
             'data': response_data,
-            'response': response
+            'total': page['total'],
+            'next_cursor': encode_cursor(page['next_after']) if page['next_after'] else None,
+            'response': summarize_reminders(response_data, page['total'])
         })
     except Exception as e:
         return jsonify({
@@ -183,6 +492,95 @@ def get_reminders():
             'response': f"Error getting reminders: {str(e)}"
         }), 500
 
+def summarize_search(query, reminders, total):
+    """Spoken summary of reminder search results"""
+    if total == 0:
+        return f"I couldn't find any reminders about '{query}'"
+    listed = reminders[:config.REMINDER_SUMMARY_LIMIT]
+    noun = "reminder" if total == 1 else "reminders"
+    response = f"I found {total} {noun} about '{query}':\n"
+    for i, reminder in enumerate(listed, 1):
+        response += f"{i}. '{reminder['text']}' at {reminder['formatted_time']}\n"
+    if total > len(listed):
+        response += f"...and {total - len(listed)} more"
+    return response.strip()
+
+def search_response(query, limit):
+    """JSON response for a reminder search"""
+    results = user_reminders().search_reminders(query, limit)
+    response_data = [format_reminder(reminder) for reminder in results['reminders']]
+    return jsonify({
+        'success': True,
+        'query': query,
+        'version': results['version'],
+        'data': response_data,
+        'total': results['total'],
+        'response': summarize_search(query, response_data, results['total'])
+    })
+
+@app.route('/api/reminders/search', methods=['GET'])
+def search_reminders():
+    """Full-text search over reminder texts, matching each query word as a prefix"""
+    query = request.args.get('q', '').strip()
+    try:
+        limit = min(int(request.args.get('limit', config.REMINDER_PAGE_SIZE)), config.REMINDER_MAX_PAGE_SIZE)
+    except ValueError:
+        limit = 0
+    if not query or limit < 1:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid search',
+            'response': "Please provide a search query in 'q' and a positive 'limit'."
+        }), 400
+    
+    try:
+        return search_response(query, limit)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'response': f"Error searching reminders: {str(e)}"
+        }), 500
+
+@app.route('/api/reminders/history', methods=['GET'])
+def get_reminder_history():
+    """Get completed reminders, including archived ones, newest first
+    
+    Optional filters: from/to (ISO times) and q (words to search for).
+    """
+    try:
+        start = parse_time_arg('from')
+        end = parse_time_arg('to')
+        limit = min(int(request.args.get('limit', config.REMINDER_PAGE_SIZE)), config.REMINDER_MAX_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError("limit must be positive")
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'response': "Invalid history query. Use ISO times for 'from' and 'to'."
+        }), 400
+    
+    try:
+        history = user_reminders().query_history(start, end, request.args.get('q', ''), limit)
+        response_data = [format_reminder(reminder) for reminder in history['reminders']]
+        for reminder, formatted in zip(history['reminders'], response_data):
+            completed_at = reminder.completed_at if reminder.completed_at is not None else reminder.time
+            formatted['completed_at'] = format_micros(completed_at)
+        return jsonify({
+            'success': True,
+            'data': response_data,
+            'total': history['total'],
+            'response': f"You have {history['total']} completed reminders" if history['total'] != 1
+                        else "You have 1 completed reminder"
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'response': f"Error getting reminder history: {str(e)}"
+        }), 500
+
 @app.route('/api/reminders', methods=['POST'])
 def add_reminder():
     """Add a new reminder"""
@@ -191,21 +589,17 @@ def add_reminder():
         command = data.get('command', '')
         
         # Use Gemini processor for better understanding
-        result = gemini_processor.process_command(command)
+        result = gemini_processor.process_command(command, request.headers.get('X-User-Id'))
         
         if result["action"] == "reminder_set" and "error" not in result:
             text = result.get("text", "")
             reminder_time = datetime.fromisoformat(result.get("time", ""))
             
-            if reminder_manager.add_reminder(text, reminder_time):
+            if user_reminders().add_reminder(text, reminder_time, result.get("recurrence")):
                 return jsonify({
                     'success': True,
                     'response': result.get("response"),
-                    'data': {
-                        'text': text,
-                        'time': result.get("time"),
-                        'formatted_time': result.get("formatted_time")
-                    }
+                    'data': reminder_result_data(result)
                 })
             else:
                 return jsonify({
@@ -230,7 +624,7 @@ def add_reminder():
 def delete_reminder(reminder_id):
     """Delete a specific reminder"""
     try:
-        if reminder_manager.delete_reminder(reminder_id):
+        if user_reminders().delete_reminder(reminder_id):
             return jsonify({
                 'success': True,
                 'response': 'Reminder deleted successfully'
@@ -265,7 +659,7 @@ def update_reminder(reminder_id):
         
         reminder_time = datetime.fromisoformat(time_str)
         
-        if reminder_manager.update_reminder(reminder_id, text, reminder_time):
+        if user_reminders().update_reminder(reminder_id, text, reminder_time):
             return jsonify({
                 'success': True,
                 'response': 'Reminder updated successfully',
@@ -293,7 +687,7 @@ def update_reminder(reminder_id):
 def clear_all_reminders():
     """Clear all reminders"""
     try:
-        if reminder_manager.clear_all_reminders():
+        if user_reminders().clear_all_reminders():
             return jsonify({
                 'success': True,
                 'response': 'All reminders cleared successfully',
@@ -315,6 +709,101 @@ def clear_all_reminders():
             'response': f"Error clearing reminders: {str(e)}"
         }), 500
 
+@app.route('/api/reminders/import', methods=['POST'])
+def import_reminders():
+    """Bulk import reminders from an NDJSON body, one reminder per line
+    
+    Records already hold structured text and time, so they skip command
+    parsing. Each line is validated on its own; invalid lines are reported
+    and skipped. Valid reminders are saved in batches of
+    REMINDER_IMPORT_BATCH_SIZE with one write each, so memory is bounded by
+    the batch rather than the body. If the import fails, the batches
+    already saved are kept and counted in the error response.
+    """
+    start = time.perf_counter()
+    batch_size = max(1, config.REMINDER_IMPORT_BATCH_SIZE)
+    batch = []
+    errors = []
+    imported = 0
+    rejected = 0
+    try:
+        reminders = user_reminders()
+        for line_number, line in enumerate(request.stream, 1):
+            if not line.strip():
+                continue
+            try:
+                batch.append(parse_reminder_record(app.json.loads(line)))
+            except (ValueError, TypeError) as e:
+                rejected += 1
+                if len(errors) < config.REMINDER_IMPORT_MAX_ERRORS:
+                    errors.append({'line': line_number, 'error': str(e)})
+            if len(batch) >= batch_size:
+                imported += reminders.import_reminders(batch)
+                batch = []
+        
+        imported += reminders.import_reminders(batch)
+        elapsed = time.perf_counter() - start
+        records_per_second = round((imported + rejected) / elapsed, 1) if elapsed > 0 else 0.0
+        print(f"Imported {imported} reminders, rejected {rejected}, {records_per_second} records/s")
+        return jsonify({
+            'success': True,
+            'response': f"Imported {imported} reminders" + (f", skipped {rejected} invalid" if rejected else ""),
+            'data': {
+                'imported': imported,
+                'rejected': rejected,
+                'errors': errors,
+                'seconds': round(elapsed, 3),
+                'records_per_second': records_per_second
+            }
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'response': f"Error importing reminders after {imported} were imported: {str(e)}",
+            'data': {
+                'imported': imported,
+                'rejected': rejected,
+                'errors': errors
+            }
+        }), 500
+
+@app.route('/api/reminders/export', methods=['GET'])
+def export_reminders():
+    """Stream all reminders as NDJSON, one reminder per line
+    
+    Pass completed=0 to leave out reminders that have already fired. The
+    store is read a chunk at a time in id order while the body is sent, so
+    neither the reminder list nor the body is ever copied whole. Reminders
+    changed during the export are exported as they are when their chunk is
+    read; X-Record-Count is the count when the export started.
+    """
+    include_completed = request.args.get('completed', '1') != '0'
+    reminders = user_reminders()
+    count = reminders.count_reminders(include_completed)
+    dumps = app.json.dumps
+    chunk_size = max(1, config.REMINDER_EXPORT_CHUNK_SIZE)
+    
+    def generate():
+        start = time.perf_counter()
+        exported = 0
+        after_id = 0
+        while True:
+            chunk = reminders.export_reminders(after_id, chunk_size, include_completed)
+            if not chunk:
+                break
+            exported += len(chunk)
+            after_id = chunk[-1].id
+            yield "".join(dumps(reminder.to_dict()) + "\n" for reminder in chunk)
+        elapsed = time.perf_counter() - start
+        if elapsed > 0:
+            print(f"Exported {exported} reminders, {exported / elapsed:.1f} records/s")
+    
+    return Response(generate(), mimetype='application/x-ndjson', headers={
+        'Content-Disposition': 'attachment; filename=reminders.ndjson',
+        'X-Record-Count': str(count)
+    })
+
 @app.route('/api/command', methods=['POST'])
 def process_command():
     """Process a general command using Gemini AI"""
@@ -326,8 +815,16 @@ def process_command():
         if config.WAKE_WORD in command.lower():
             command = command.replace(config.WAKE_WORD, "").strip()
         
-        # Process command with Gemini
-        result = gemini_processor.process_command(command)
+        g.command = command
+        
+        # Start the fetch the local parser expects, then process command with Gemini
+        speculation = speculator.start(command) if speculator else None
+        result = gemini_processor.process_command(command, request.headers.get('X-User-Id'))
+        prefetched = speculation.resolve(result) if speculation else None
+        g.command_result = result
+        metrics.COMMAND_INTENTS.inc(intent=result["action"])
+        g.intent = result["action"]
+        tracing.emit('intent', intent=result["action"])
         
         # Execute the action based on Gemini's understanding
         if result["action"] == "time":
@@ -342,7 +839,7 @@ def process_command():
         
         elif result["action"] == "weather":
             city = result.get("city", config.DEFAULT_CITY)
-            weather_response = get_weather_for_city(city)
+            weather_response = get_weather_for_city(city, prefetched)
             
             # Handle the case where get_weather_for_city returns a tuple
             if isinstance(weather_response, tuple):
@@ -357,7 +854,8 @@ def process_command():
                 natural_response = gemini_processor.generate_natural_response({
                     "action": "weather",
                     "success": True,
-                    "data": weather_data.get("data", {})
+                    "data": weather_data.get("data", {}),
+                    "response": weather_data.get("response")
                 })
                 weather_data["response"] = natural_response
                 return jsonify(weather_data)
@@ -368,7 +866,10 @@ def process_command():
             category = result.get("category", "general")
             
             try:
-                news_data = news_service.get_news(category=category)
+                if prefetched is not None:
+                    news_data = speculative_result(prefetched)
+                else:
+                    news_data = news_service.get_news(category=category)
                 
                 if "error" in news_data:
                     if "mock_data" in news_data:
@@ -377,7 +878,8 @@ def process_command():
                             "action": "news",
                             "success": True,
                             "data": headlines,
-                            "category": category
+                            "category": category,
+                            "response": f"Here are the latest {category} headlines"
                         })
                         return jsonify({
                             'success': True,
@@ -397,7 +899,8 @@ def process_command():
                         "action": "news",
                         "success": True,
                         "data": headlines,
-                        "category": category
+                        "category": category,
+                        "response": f"Here are the latest {category} headlines"
                     })
                     return jsonify({
                         'success': True,
@@ -424,15 +927,11 @@ def process_command():
                 text = result.get("text", "")
                 reminder_time = datetime.fromisoformat(result.get("time", ""))
                 
-                if reminder_manager.add_reminder(text, reminder_time):
+                if user_reminders().add_reminder(text, reminder_time, result.get("recurrence")):
                     return jsonify({
                         'success': True,
                         'response': result["response"],
-                        'data': {
-                            'text': text,
-                            'time': result.get("time"),
-                            'formatted_time': result.get("formatted_time")
-                        }
+                        'data': reminder_result_data(result)
                     })
                 else:
                     return jsonify({
@@ -450,6 +949,9 @@ def process_command():
         elif result["action"] == "reminder_list":
             return get_reminders()
         
+        elif result["action"] == "reminder_search":
+            return search_response(result.get("query", ""), config.REMINDER_PAGE_SIZE)
+        
         elif result["action"] == "reminder_incomplete":
             # Handle incomplete reminder (just time provided, waiting for task)
             if "error" in result:
@@ -497,10 +999,15 @@ def process_command():
             'response': f"Error processing command: {str(e)}"
         }), 500
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Expose metrics in the Prometheus text format"""
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/config', methods=['GET'])
 def get_config():
     """Get configuration information"""
-    return jsonify({
+    return response_cache.get('config', lambda: {
         'wake_word': config.WAKE_WORD,
         'default_city': config.DEFAULT_CITY,
         'default_country': config.DEFAULT_COUNTRY,
@@ -509,8 +1016,8 @@ def get_config():
     })
 
 if __name__ == '__main__':
-    # Start reminder checker
-    start_reminder_checker()
+    # Start reminder checker and weather prefetch
+    start_background_tasks()
     
     print("🚀 Starting Voice Assistant Backend API...")
     print(f"📍 Configured for {config.DEFAULT_CITY}, {config.DEFAULT_COUNTRY.upper()}")
@@ -0,0 +1,113 @@
+# Gemini classification micro-batching benchmark.
+#
+# Drives GeminiCommandProcessor.process_command from concurrent callers
+# with Gemini replaced by the fake model and admission control at the
+# given limits, once per batch size (1 means no batching). Reports
+# commands per second (all, and classified by Gemini rather than shed to
+# the local parser), caller latency and upstream Gemini calls. The fake model charges a fixed
+# latency per call plus a small latency per batched command.
+#
+#     python -m benchmarks.batching --sizes 1,4,8,16,32 --concurrency 64
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+
+
+def load_commands(path: str):
+    with open(path) as f:
+        return [line.rstrip("\n").split("\t", 1)[1] for line in f if line.strip() and not line.startswith("#")]
+
+
+def drive(processor, commands, concurrency: int, duration: float) -> dict:
+    """Classify commands from `concurrency` caller threads for `duration` seconds"""
+    latencies = []
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def caller(offset: int):
+        i = offset
+        while time.time() < stop_at:
+            command = commands[i % len(commands)]
+            i += concurrency
+            start = time.perf_counter()
+            processor.process_command(command)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "commands": len(latencies),
+        "seconds": wall,
+        "throughput_cps": round(len(latencies) / wall, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Gemini classification throughput by batch size")
+    parser.add_argument('--sizes', default="1,4,8,16,32", help="Comma-separated max batch sizes")
+    parser.add_argument('--concurrency', type=int, default=64, help="Concurrent callers")
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds per batch size")
+    parser.add_argument('--max-wait-ms', type=int, default=20, help="Batch collection window")
+    parser.add_argument('--latency-ms', type=int, default=300, help="Fake Gemini latency per call")
+    parser.add_argument('--per-item-ms', type=float, default=5, help="Extra fake latency per batched command")
+    parser.add_argument('--max-concurrent', type=int, default=8, help="Admission concurrency limit")
+    parser.add_argument('--rate', type=float, default=10, help="Admission calls per second")
+    parser.add_argument('--max-wait', type=float, default=5.0, help="Admission max wait in seconds")
+    parser.add_argument('--commands', default="benchmarks/commands.tsv")
+    args = parser.parse_args()
+
+    import metrics
+    from admission import AdmissionController
+    from gemini_processor import GeminiCommandProcessor
+    from micro_batch import MicroBatcher
+    from benchmarks.fakes import FakeGeminiModel
+
+    commands = load_commands(args.commands)
+    results = {}
+    for size in [int(size) for size in args.sizes.split(",")]:
+        processor = GeminiCommandProcessor()
+        processor.model = FakeGeminiModel(latency=args.latency_ms / 1000, per_item_latency=args.per_item_ms / 1000)
+        processor.admission = AdmissionController(args.max_concurrent, args.rate, args.max_concurrent, args.max_wait)
+        processor.label_log = None
+        processor.batcher = None
+        if size > 1:
+            processor.batcher = MicroBatcher(processor._classify_batch, size, args.max_wait_ms / 1000)
+
+        shed_before = metrics.FALLBACKS.value(reason="shed")
+        result = drive(processor, commands, args.concurrency, args.duration)
+        shed = int(metrics.FALLBACKS.value(reason="shed") - shed_before)
+        # Shed commands return at once from the local parser, so report the
+        # rate of commands Gemini actually classified separately
+        result["shed"] = shed
+        result["classified_cps"] = round((result["commands"] - shed) / result.pop("seconds"), 1)
+        result["upstream_calls"] = processor.model.calls
+        result["commands_per_call"] = round(result["commands"] / max(processor.model.calls, 1), 2)
+        results[size] = result
+        print(f"batch size {size:3d} {result}", file=sys.stderr)
+
+    print(json.dumps({
+        "concurrency": args.concurrency,
+        "latency_ms": args.latency_ms,
+        "max_wait_ms": args.max_wait_ms,
+        "admission": {"max_concurrent": args.max_concurrent, "rate": args.rate},
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# Bulk reminder import/export benchmark.
+#
+# Compares adding reminders one POST /api/reminders at a time (command
+# parsing plus a full store rewrite per reminder, Gemini replaced by the
+# zero-latency fake) against one NDJSON POST /api/reminders/import, and
+# times the streamed NDJSON export. Results are in records per second.
+#
+#     python -m benchmarks.bulk --records 10000 --single 200
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def make_ndjson(count: int) -> bytes:
+    start = datetime.now() + timedelta(days=1)
+    return "".join(
+        json.dumps({"text": f"imported reminder {i}", "time": (start + timedelta(minutes=i)).isoformat()}) + "\n"
+        for i in range(count)
+    ).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bulk reminder import/export throughput")
+    parser.add_argument('--records', type=int, default=10000, help="Records per bulk import")
+    parser.add_argument('--single', type=int, default=200, help="Reminders added one request at a time")
+    args = parser.parse_args()
+
+    import backend_api
+    from reminder_partitions import ReminderPartitions
+    from benchmarks.fakes import FakeGeminiModel
+
+    directory = tempfile.mkdtemp(prefix="bulk_bench_")
+    backend_api.gemini_processor.model = FakeGeminiModel(latency=0)
+    backend_api.gemini_processor.label_log = None
+    client = backend_api.app.test_client()
+    results = {}
+    try:
+        backend_api.reminder_partitions = ReminderPartitions(
+            os.path.join(directory, "single"), default_filename=os.path.join(directory, "single.json"))
+        start = time.perf_counter()
+        for i in range(args.single):
+            client.post('/api/reminders', json={'command': f"remind me to stretch number {i} in 2 hours"})
+        elapsed = time.perf_counter() - start
+        results['single_post'] = {'records': args.single, 'records_per_second': round(args.single / elapsed, 1)}
+
+        backend_api.reminder_partitions = ReminderPartitions(
+            os.path.join(directory, "bulk"), default_filename=os.path.join(directory, "bulk.json"))
+        body = make_ndjson(args.records)
+        start = time.perf_counter()
+        response = client.post('/api/reminders/import', data=body, content_type='application/x-ndjson')
+        elapsed = time.perf_counter() - start
+        data = response.get_json()['data']
+        results['bulk_import'] = {'records': data['imported'], 'records_per_second': round(args.records / elapsed, 1),
+                                  'server_records_per_second': data['records_per_second']}
+
+        start = time.perf_counter()
+        response = client.get('/api/reminders/export')
+        exported = response.get_data().count(b"\n")
+        elapsed = time.perf_counter() - start
+        results['export'] = {'records': exported, 'records_per_second': round(exported / elapsed, 1)}
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(json.dumps({'unit': 'records per second', 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
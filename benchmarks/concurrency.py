@@ -0,0 +1,125 @@
+# Concurrency benchmark: threaded vs gevent workers on /api/command.
+#
+# Starts serve.py against fake upstreams (see benchmarks/fake_app.py) once
+# per worker class and worker count, drives it with a fixed number of
+# concurrent clients and reports sustained throughput and latency. A
+# weather command costs three upstream round trips (classify, fetch,
+# rephrase), so a threaded worker is capped at about
+# threads / (3 * latency) requests per second; more workers raise the cap
+# until the CPUs are saturated.
+#
+#     python -m benchmarks.concurrency --concurrency 100 --latency-ms 100
+#     python -m benchmarks.concurrency --worker-classes gthread --workers 1,2,4
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_until_ready(url: str, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(f"{url}/api/status", timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+def drive(url: str, concurrency: int, duration: float, command: str) -> dict:
+    """Send commands from `concurrency` client threads for `duration` seconds"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def client():
+        session = requests.Session()
+        while time.time() < stop_at:
+            start = time.perf_counter()
+            try:
+                response = session.post(f"{url}/api/command", json={"command": command}, timeout=60)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "throughput_rps": round(len(latencies) / wall, 2),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1) if latencies else None,
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 1) if latencies else None,
+    }
+
+
+def run_server(worker_class: str, workers: int, port: int, threads: int, latency_ms: int) -> subprocess.Popen:
+    env = dict(os.environ, FAKE_UPSTREAM_LATENCY_MS=str(latency_ms))
+    return subprocess.Popen(
+        [sys.executable, "serve.py", "--app", "benchmarks.fake_app:app", "--workers", str(workers),
+         "--threads", str(threads), "--worker-class", worker_class, "--port", str(port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare threaded and gevent workers on /api/command")
+    parser.add_argument('--concurrency', type=int, default=100, help="Concurrent clients")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per run")
+    parser.add_argument('--latency-ms', type=int, default=100, help="Fake upstream latency")
+    parser.add_argument('--threads', type=int, default=8, help="Threads for the gthread baseline")
+    parser.add_argument('--worker-classes', default="gthread,gevent", help="Comma-separated worker classes")
+    parser.add_argument('--workers', default="1", help="Comma-separated worker process counts")
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--command', default="what's the weather in London")
+    args = parser.parse_args()
+
+    results = {}
+    for worker_class in args.worker_classes.split(","):
+        for workers in (int(count) for count in args.workers.split(",")):
+            name = f"{worker_class}x{workers}"
+            process = run_server(worker_class, workers, args.port, args.threads, args.latency_ms)
+            url = f"http://127.0.0.1:{args.port}"
+            try:
+                wait_until_ready(url)
+                results[name] = drive(url, args.concurrency, args.duration, args.command)
+            finally:
+                process.terminate()
+                process.wait()
+            print(f"{name:12s} {results[name]}", file=sys.stderr)
+
+    print(json.dumps({
+        "concurrency": args.concurrency,
+        "latency_ms": args.latency_ms,
+        "threads": args.threads,
+        "cpus": os.cpu_count(),
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# Reminder delivery benchmark.
+#
+# Spreads --reminders reminders over --users per-user stores, all due at
+# once, fires them and delivers every firing to the webhook endpoint of a
+# local FakeUpstreamServer, once per pool configuration (workers x batch
+# size; 1x1 is the old one-at-a-time behaviour). Reports the time until
+# every firing is delivered and acknowledged in its store, deliveries per
+# second, webhook requests, and duplicate or missing deliveries.
+#
+#     python -m benchmarks.delivery --reminders 5000 --latency-ms 10 --error-rate 0.05
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def run(args, workers: int, batch_size: int, directory: str) -> dict:
+    import metrics
+    from reminder_delivery import DeliveryPool, WebhookNotifier
+    from reminder_partitions import ReminderPartitions
+    from benchmarks.fakes import FakeUpstreamServer
+
+    partitions = ReminderPartitions(directory, default_filename=os.path.join(directory, "default.json"))
+    due_at = (datetime.now() - timedelta(minutes=1)).isoformat()
+    per_user = args.reminders // args.users
+    for user in range(args.users):
+        partitions.get(f"user-{user}").import_reminders(
+            [{"text": f"reminder {i} for user {user}", "time": due_at, "completed": False} for i in range(per_user)])
+
+    server = FakeUpstreamServer(latency=args.latency_ms / 1000, error_rate=args.error_rate).start()
+    pool = DeliveryPool({"webhook": WebhookNotifier(server.webhook_url)}, workers=workers, batch_size=batch_size,
+                        max_attempts=args.max_attempts, backoff=args.backoff_ms / 1000, backoff_max=1.0)
+    retried_before = metrics.REMINDER_DELIVERIES.value(target="webhook", outcome="retried")
+    try:
+        start = time.perf_counter()
+        fired = len(partitions.get_due_reminders())
+        for name, reminder, fired_at in partitions.undelivered():
+            pool.submit((name, reminder.id, fired_at), {"user": name, "id": reminder.id,
+                                                        "text": reminder.text, "time": fired_at})
+        pool.wait_idle()
+        delivered_seconds = time.perf_counter() - start
+
+        # What the scheduler does on its next tick
+        outcomes = {}
+        for (name, reminder_id, fired_at), delivered in pool.results():
+            outcomes.setdefault(name, []).append((reminder_id, fired_at, delivered))
+        for name, partition_outcomes in outcomes.items():
+            partitions.get_partition(name).mark_delivered(partition_outcomes)
+        acknowledged_seconds = time.perf_counter() - start
+    finally:
+        server.stop()
+
+    received = server.delivered
+    failed = sum(1 for outcome in outcomes.values() for _, _, delivered in outcome if not delivered)
+    return {
+        "fired": fired,
+        "delivered": fired - failed,
+        "failed": failed,
+        "seconds_to_deliver": round(delivered_seconds, 3),
+        "seconds_to_acknowledge": round(acknowledged_seconds, 3),
+        "deliveries_per_second": round(fired / delivered_seconds, 1),
+        "webhook_requests": server.calls["webhook"],
+        "retried_deliveries": int(metrics.REMINDER_DELIVERIES.value(target="webhook", outcome="retried")
+                                  - retried_before),
+        "duplicates": len(received) - len(set(received)),
+        "still_undelivered": len(partitions.undelivered()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure reminder delivery throughput through the worker pool")
+    parser.add_argument('--reminders', type=int, default=5000, help="Reminders falling due at once")
+    parser.add_argument('--users', type=int, default=50, help="Per-user stores the reminders are spread over")
+    parser.add_argument('--configs', default="1x1,4x1,4x50,16x50", help="Comma-separated WORKERSxBATCH pools")
+    parser.add_argument('--latency-ms', type=int, default=10, help="Webhook latency per request")
+    parser.add_argument('--error-rate', type=float, default=0.05, help="Fraction of webhook requests failing")
+    parser.add_argument('--max-attempts', type=int, default=8)
+    parser.add_argument('--backoff-ms', type=int, default=20, help="First retry delay")
+    args = parser.parse_args()
+
+    results = {}
+    for config in args.configs.split(","):
+        workers, batch_size = (int(value) for value in config.split("x"))
+        directory = tempfile.mkdtemp(prefix="delivery_bench_")
+        try:
+            results[config] = run(args, workers, batch_size, directory)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        print(f"{config:8s} {results[config]}", file=sys.stderr)
+
+    print(json.dumps({
+        "reminders": args.reminders,
+        "users": args.users,
+        "latency_ms": args.latency_ms,
+        "error_rate": args.error_rate,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
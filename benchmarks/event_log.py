@@ -0,0 +1,91 @@
+# Command event log benchmark.
+#
+# Measures what logging costs the request thread: a synchronous JSON
+# append per event (what logging inside the handler would do) against
+# EventLog.emit(), which only queues the event. Also reports how many
+# events the background writer kept up with at the given queue size, how
+# many were dropped, and the compressed size per event.
+#
+#     python -m benchmarks.event_log --events 100000 --queue 10000
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+
+def make_event(i: int) -> dict:
+    return {
+        "timestamp": time.time(),
+        "pid": os.getpid(),
+        "user": None,
+        "command": f"what's the weather in city number {i % 50}",
+        "intent": "weather",
+        "result": {"action": "weather", "city": f"City {i % 50}", "response": None, "confidence": 0.9},
+        "status": 200,
+        "duration_ms": 312.5,
+        "spans": [{"name": "classify", "start_ms": 0.1, "duration_ms": 301.2},
+                  {"name": "weather", "start_ms": 301.4, "duration_ms": 10.9}],
+        "success": True,
+        "response": "It's 72°F and clear in the city.",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure request-thread cost of command event logging")
+    parser.add_argument('--events', type=int, default=100000, help="Events emitted as fast as possible")
+    parser.add_argument('--sync-events', type=int, default=10000, help="Events for the synchronous baseline")
+    parser.add_argument('--queue', type=int, default=10000, help="Event queue size")
+    parser.add_argument('--batch', type=int, default=500, help="Events per writer batch")
+    parser.add_argument('--max-bytes', type=int, default=1024 * 1024, help="Rotate files at this size")
+    args = parser.parse_args()
+
+    import metrics
+    from event_log import EventLog
+
+    directory = tempfile.mkdtemp(prefix="event_log_bench_")
+    try:
+        filename = os.path.join(directory, "sync.ndjson")
+        start = time.perf_counter()
+        for i in range(args.sync_events):
+            with open(filename, 'a') as f:
+                f.write(json.dumps(make_event(i)) + "\n")
+        sync_us = (time.perf_counter() - start) / args.sync_events * 1e6
+
+        events = [make_event(i) for i in range(args.events)]
+        log = EventLog(os.path.join(directory, "events"), max_queue=args.queue, batch_size=args.batch,
+                       flush_interval=0.1, max_bytes=args.max_bytes, backups=1000)
+        dropped_before = metrics.EVENTS.value(outcome="dropped")
+        start = time.perf_counter()
+        for event in events:
+            log.emit(event)
+        emit_us = (time.perf_counter() - start) / args.events * 1e6
+        log.flush(timeout=120)
+        drain_seconds = time.perf_counter() - start
+        dropped = int(metrics.EVENTS.value(outcome="dropped") - dropped_before)
+
+        files = glob.glob(os.path.join(directory, "events", "*.ndjson.gz"))
+        compressed = sum(os.path.getsize(name) for name in files)
+        written = args.events - dropped
+        results = {
+            "sync_append_us_per_event": round(sync_us, 2),
+            "emit_us_per_event": round(emit_us, 2),
+            "emitted": args.events,
+            "written": written,
+            "dropped": dropped,
+            "writer_events_per_second": round(written / drain_seconds, 1),
+            "files": len(files),
+            "compressed_bytes_per_event": round(compressed / max(written, 1), 1),
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(json.dumps({"queue": args.queue, "batch": args.batch, "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
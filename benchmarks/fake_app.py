@@ -0,0 +1,28 @@
+# WSGI entry point that serves backend_api.app with local fake upstreams.
+#
+#     FAKE_UPSTREAM_LATENCY_MS=100 python serve.py --app benchmarks.fake_app:app
+#
+# Reminders and pending reminder contexts are stored in a temporary
+# directory so benchmark runs never touch reminders.json or reminder_data.
+
+import os
+import tempfile
+
+import backend_api
+from conversation import ConversationContexts
+from reminder_partitions import ReminderPartitions
+from benchmarks.fakes import FakeGeminiModel, FakeWeatherService, FakeNewsService
+
+latency = float(os.getenv('FAKE_UPSTREAM_LATENCY_MS', '100')) / 1000.0
+
+backend_api.gemini_processor.model = FakeGeminiModel(latency)
+# Fake classifications must not end up in the intent model's training data
+backend_api.gemini_processor.label_log = None
+backend_api.weather_service = FakeWeatherService(latency)
+backend_api.news_service = FakeNewsService(latency)
+reminder_directory = os.path.join(tempfile.gettempdir(), f"bench_reminders_{os.getpid()}")
+backend_api.reminder_partitions = ReminderPartitions(
+    reminder_directory, default_filename=os.path.join(reminder_directory, "reminders.json"))
+backend_api.gemini_processor.contexts = ConversationContexts(reminder_directory)
+
+app = backend_api.app
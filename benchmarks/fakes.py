@@ -0,0 +1,230 @@
+# Local stand-ins for the upstream services (Gemini, OpenWeatherMap, NewsAPI)
+# so benchmarks can exercise the full request path without network access
+# or API keys. Each fake sleeps for a configurable latency to model the
+# upstream round trip and can fail a configurable fraction of calls.
+#
+# FakeUpstreamServer serves the OpenWeatherMap and NewsAPI endpoints over
+# local HTTP, so the real WeatherService and NewsService clients can be
+# pointed at it, plus a webhook endpoint that records reminder deliveries.
+# Gemini is faked in process by FakeGeminiModel.
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any
+from urllib.parse import urlparse, parse_qs
+
+
+# Words that can follow the city in a weather command
+CITY_SUFFIX = r"(?:\s+(?:weather|temperature|today|tomorrow|right now|now|currently|please))*$"
+
+
+class FakeGeminiResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """Stand-in for genai.GenerativeModel with keyword-based intent classification"""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, per_item_latency: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        # Extra latency per command in a batched prompt, for the longer output
+        self.per_item_latency = per_item_latency
+        self.calls = 0
+
+    def classify(self, command: str) -> Dict[str, Any]:
+        lowered = command.lower()
+        if 'weather' in lowered or 'temperature' in lowered:
+            # The city is the last words after a preposition ("weather in
+            # new york today") or before "weather" ("paris weather"), the way
+            # Gemini reads them
+            text = lowered.rstrip(" ?.!")
+            match = (re.search(r"\b(?:in|for|at|of)\s+([a-z][a-z\s]*?)" + CITY_SUFFIX, text)
+                     or re.search(r"^([a-z][a-z\s]*?)\s+(?:weather|temperature)\b", text))
+            city = match.group(1).title() if match else ""
+            return {"intent": "weather", "entities": {"city": city}}
+        if 'news' in lowered or 'headlines' in lowered:
+            category = 'general'
+            for name in ['technology', 'sports', 'business', 'health', 'science', 'entertainment']:
+                if name in lowered:
+                    category = name
+            return {"intent": "news", "entities": {"category": category}}
+        if re.search(r'\b(search|find|what did i set)\b', lowered):
+            return {"intent": "reminder_search", "entities": {"query": ""}}
+        if 'remind' in lowered:
+            if 'show' in lowered or 'list' in lowered:
+                return {"intent": "reminder_list", "entities": {}}
+            return {"intent": "reminder_set", "entities": {"text": command, "time_expression": ""}}
+        if 'time' in lowered:
+            return {"intent": "time", "entities": {}}
+        if 'help' in lowered:
+            return {"intent": "help", "entities": {}}
+        return {"intent": "unknown", "entities": {}}
+
+    def classify_prompt(self, command: str) -> Dict[str, Any]:
+        result = self.classify(command)
+        result["natural_response"] = None
+        result["confidence"] = 0.9
+        return result
+
+    def generate_content(self, prompt: str) -> FakeGeminiResponse:
+        self.calls += 1
+        # Batched prompts list one JSON-quoted command per numbered line
+        batch = [json.loads(command) for command in re.findall(r'^\d+\. (".*")$', prompt, re.M)]
+        if self.latency or self.per_item_latency:
+            time.sleep(self.latency + self.per_item_latency * len(batch))
+        if self.error_rate and random.random() < self.error_rate:
+            raise RuntimeError("Injected Gemini error")
+
+        if batch:
+            return FakeGeminiResponse(json.dumps([self.classify_prompt(command) for command in batch]))
+        match = re.search(r'User command: "(.*)"', prompt)
+        if match:
+            return FakeGeminiResponse(json.dumps(self.classify_prompt(match.group(1))))
+        return FakeGeminiResponse("Here is what I found for you.")
+
+
+class FakeWeatherService:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def get_weather(self, city: str) -> Dict[str, Any]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return {
+            "city": city,
+            "temperature": "72°F",
+            "description": "clear sky",
+            "humidity": "40%",
+            "pressure": "1012 hPa",
+            "wind_speed": "5 mph"
+        }
+
+
+class FakeNewsService:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def get_news(self, country: str = None, category: str = "general") -> Dict[str, Any]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return {"headlines": [
+            {"title": f"{category.title()} headline {i}", "description": "", "source": "Fake", "url": ""}
+            for i in range(5)
+        ]}
+
+
+class FakeUpstreamServer:
+    """Local HTTP server mimicking the OpenWeatherMap and NewsAPI endpoints.
+
+    Point WeatherService.base_url at weather_url and NewsService.base_url
+    at news_url. POSTs to webhook_url are recorded in `delivered` as
+    (user, id, time) per reminder. Injected errors are returned as HTTP 503.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = {"weather": 0, "news": 0, "webhook": 0}
+        self.delivered = []
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def weather_url(self) -> str:
+        return f"{self.base_url}/data/2.5/weather"
+
+    @property
+    def news_url(self) -> str:
+        return f"{self.base_url}/v2/top-headlines"
+
+    @property
+    def webhook_url(self) -> str:
+        return f"{self.base_url}/webhook"
+
+    def start(self) -> "FakeUpstreamServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                if url.path.endswith("/weather"):
+                    kind = "weather"
+                    body = {
+                        "name": params.get("q", "Unknown").title(),
+                        "main": {"temp": 68.4, "humidity": 52, "pressure": 1014},
+                        "weather": [{"description": "scattered clouds"}],
+                        "wind": {"speed": 6.9}
+                    }
+                elif url.path.endswith("/top-headlines"):
+                    kind = "news"
+                    category = params.get("category", "general")
+                    body = {"status": "ok", "articles": [{
+                        "title": f"{category.title()} headline {i}",
+                        "description": "Local stand-in article",
+                        "source": {"name": "Fake News"},
+                        "url": f"http://localhost/articles/{i}"
+                    } for i in range(5)]}
+                else:
+                    self.send_error(404)
+                    return
+
+                fake.calls[kind] += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if fake.error_rate and random.random() < fake.error_rate:
+                    self.send_error(503, "Injected upstream error")
+                    return
+
+                payload = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                if urlparse(self.path).path != "/webhook":
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                fake.calls["webhook"] += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if fake.error_rate and random.random() < fake.error_rate:
+                    self.send_error(503, "Injected upstream error")
+                    return
+                fake.delivered.extend((item.get("user"), item.get("id"), item.get("time"))
+                                      for item in body.get("reminders", []))
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,185 @@
+# End-to-end load test for the Flask API.
+#
+# Replays a corpus of voice commands (benchmarks/commands.tsv, one
+# "intent<TAB>command" per line) against /api/command from concurrent
+# clients and reports throughput and p50/p95/p99 latency per intent.
+#
+# By default the app runs in process on a local threaded server with
+# Gemini replaced by FakeGeminiModel and the real weather and news clients
+# pointed at a local FakeUpstreamServer, so no network access or API keys
+# are needed. Latency and error rates of the fakes are configurable. Use
+# --url to load an already running server instead.
+#
+#     python -m benchmarks.load_test --concurrency 32 --duration 20 \
+#         --gemini-latency-ms 300 --upstream-latency-ms 150 --error-rate 0.02
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import List, Tuple
+
+import requests
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "commands.tsv")
+
+
+def load_corpus(path: str) -> List[Tuple[str, str]]:
+    corpus = []
+    with open(path) as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line or line.startswith("#"):
+                continue
+            intent, command = line.split("\t", 1)
+            corpus.append((intent, command))
+    return corpus
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def start_local_app(args):
+    """Serve backend_api.app in process against local fakes; return (url, server, upstream)"""
+    from werkzeug.serving import make_server, WSGIRequestHandler
+
+    import backend_api
+    from services import WeatherService, NewsService
+    from reminder_partitions import ReminderPartitions
+    from benchmarks.fakes import FakeGeminiModel, FakeUpstreamServer
+
+    upstream = FakeUpstreamServer(args.upstream_latency_ms / 1000.0, args.error_rate).start()
+    weather_service = WeatherService(api_key="load-test")
+    weather_service.base_url = upstream.weather_url
+    news_service = NewsService(api_key="load-test")
+    news_service.base_url = upstream.news_url
+
+    backend_api.gemini_processor.model = FakeGeminiModel(args.gemini_latency_ms / 1000.0, args.error_rate)
+    # Fake classifications must not end up in the intent model's training data
+    backend_api.gemini_processor.label_log = None
+    backend_api.weather_service = weather_service
+    backend_api.news_service = news_service
+    reminder_directory = tempfile.mkdtemp(prefix="load_test_")
+    backend_api.reminder_partitions = ReminderPartitions(
+        reminder_directory, default_filename=os.path.join(reminder_directory, "reminders.json"))
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, backend_api.app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server, upstream
+
+
+def run_load(url: str, corpus, concurrency: int, duration: float, max_requests: int, seed: int) -> dict:
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    sent = [0]
+    stop_at = time.time() + duration
+
+    def next_slot() -> bool:
+        with lock:
+            if (max_requests and sent[0] >= max_requests) or time.time() >= stop_at:
+                return False
+            sent[0] += 1
+            return True
+
+    def client(client_id: int):
+        rng = random.Random(seed + client_id)
+        session = requests.Session()
+        while next_slot():
+            intent, command = rng.choice(corpus)
+            start = time.perf_counter()
+            try:
+                response = session.post(f"{url}/api/command", json={"command": command}, timeout=60)
+                ok = response.status_code < 500 and response.json().get("success", False)
+            except (requests.RequestException, ValueError):
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                samples[intent].append(elapsed)
+                if not ok:
+                    errors[intent] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    def summarize(values, error_count):
+        values = sorted(values)
+        return {
+            "requests": len(values),
+            "errors": error_count,
+            "throughput_rps": round(len(values) / wall, 2),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 1),
+        }
+
+    all_values = [value for values in samples.values() for value in values]
+    return {
+        "wall_seconds": round(wall, 2),
+        "overall": summarize(all_values, sum(errors.values())),
+        "intents": {intent: summarize(values, errors[intent]) for intent, values in sorted(samples.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay voice commands against the API and report latency per intent")
+    parser.add_argument('--url', help="Base URL of a running server (default: run in process with fakes)")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help="TSV file of intent<TAB>command lines")
+    parser.add_argument('--concurrency', type=int, default=16, help="Concurrent clients")
+    parser.add_argument('--duration', type=float, default=15.0, help="Seconds to run")
+    parser.add_argument('--requests', type=int, default=0, help="Stop after this many requests (0: no limit)")
+    parser.add_argument('--gemini-latency-ms', type=float, default=300.0, help="Fake Gemini latency")
+    parser.add_argument('--upstream-latency-ms', type=float, default=150.0, help="Fake weather/news latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of fake upstream calls that fail")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    server = upstream = None
+    url = args.url
+    if url is None:
+        url, server, upstream = start_local_app(args)
+
+    try:
+        results = run_load(url.rstrip("/"), corpus, args.concurrency, args.duration, args.requests, args.seed)
+    finally:
+        if server is not None:
+            server.shutdown()
+            upstream.stop()
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+    for intent, summary in results["intents"].items():
+        print(f"{intent:15s} {summary}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
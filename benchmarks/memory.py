@@ -0,0 +1,115 @@
+# Reminder store memory benchmark.
+#
+# Writes a store file of --reminders reminders (a quarter completed, texts
+# drawn from --distinct-texts phrases, as real users repeat themselves,
+# times in random order as reminders are set for arbitrary dates)
+# and reports the traced memory per reminder of:
+#
+#   dict_records     the reminders as dicts of ISO strings, the way the
+#                    store used to hold them
+#   slotted_records  the same reminders as reminder_record.Reminder
+#   store_unfrozen   a loaded ReminderManager: records plus time and text
+#                    indexes, left to the cyclic collector
+#   store            the same frozen after loading
+#                    (serve.freeze_loaded_app), as the server does at startup
+#
+# together with the time of a full gc.collect() while each is alive, and
+# the store's load time.
+#
+#     python -m benchmarks.memory --reminders 1000000
+
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+
+def write_store(filename: str, count: int, distinct_texts: int, seed: int):
+    rng = random.Random(seed)
+    texts = [f"{rng.choice(['call', 'email', 'visit', 'pay', 'buy', 'book'])} reminder subject {i}"
+             for i in range(distinct_texts)]
+    now = datetime.now()
+    created = now.isoformat()
+    reminders = []
+    for i in range(1, count + 1):
+        reminder_time = now + timedelta(seconds=rng.randrange(count * 7))
+        reminder = {"id": i, "text": rng.choice(texts), "time": reminder_time.isoformat(),
+                    "completed": i % 4 == 0, "created": created}
+        if reminder["completed"]:
+            reminder["completed_at"] = created
+        reminders.append(reminder)
+    with open(filename, 'w') as f:
+        json.dump({"version": 0, "next_id": count + 1, "changes": [], "reminders": reminders}, f)
+
+
+def measure(build, count: int) -> dict:
+    """Memory held by what build() returns, and a full collection's cost while it is alive"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    held = build()
+    seconds = time.perf_counter() - start
+    traced = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The first collection untracks dicts and tuples holding only atomic
+    # values; time the next one, as later full collections will cost
+    gc.collect()
+    start = time.perf_counter()
+    gc.collect()
+    gc_ms = (time.perf_counter() - start) * 1000
+    del held
+    gc.unfreeze()
+    return {"bytes_per_reminder": round(traced / count, 1), "gc_collect_ms": round(gc_ms, 1),
+            "build_seconds": round(seconds, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure reminder store memory per reminder")
+    parser.add_argument('--reminders', type=int, default=1000000)
+    parser.add_argument('--distinct-texts', type=int, default=10000, help="Distinct reminder texts")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    from reminder_record import Reminder
+    from serve import freeze_loaded_app
+    from services import ReminderManager
+
+    directory = tempfile.mkdtemp(prefix="memory_bench_")
+    try:
+        filename = os.path.join(directory, "reminders.json")
+        write_store(filename, args.reminders, args.distinct_texts, args.seed)
+
+        def load_records():
+            with open(filename) as f:
+                return json.load(f)["reminders"]
+
+        def load_frozen_store():
+            manager = ReminderManager(filename)
+            freeze_loaded_app()
+            return manager
+
+        results = {}
+        for name, build in [
+            ("dict_records", load_records),
+            ("slotted_records", lambda: [Reminder.from_dict(record) for record in load_records()]),
+            ("store_unfrozen", lambda: ReminderManager(filename)),
+            ("store", load_frozen_store),
+        ]:
+            results[name] = measure(build, args.reminders)
+            print(f"{name:16s} {results[name]}", file=sys.stderr)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print(json.dumps({"reminders": args.reminders, "distinct_texts": args.distinct_texts,
+                      "python": sys.version.split()[0], "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+# Microbenchmarks for the command parser, intent cache, local intent model
+# and reminder store hot paths.
+#
+# Results are written as JSON so runs from different commits can be
+# compared; --compare exits non-zero when any case got slower than the
+# baseline by more than --threshold.
+#
+#     python -m benchmarks.microbench --output bench.json
+#     python -m benchmarks.microbench --compare bench.json
+#     python -m benchmarks.microbench --sizes 10,1000 --only reminders
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from command_parser import CommandParser
+from intent_cache import IntentCache
+from intent_model import IntentModel
+from services import ReminderManager
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+
+REMINDER_COMMANDS = [
+    "remind me to call mom in 10 minutes",
+    "remind me to submit the report at 3:30 pm",
+    "set a reminder to water the plants tomorrow",
+    "remind me to stretch in 2 hours",
+]
+# Adjectives like "weekly" must not turn one-off reminders into repeating ones
+RECURRENCE_COMMANDS = [
+    "remind me to take vitamins every day at 8am",
+    "remind me to call dad every evening at 7",
+    "remind me to review the weekly report in 10 minutes",
+    "remind me to gym on mondays and thursdays at 6pm",
+]
+TIME_EXPRESSIONS = ["at 12:43", "in 10 minutes", "2 hours", "at 9:05 am", "15"]
+WEATHER_COMMANDS = [
+    "what's the weather in new york",
+    "how is the weather in san francisco today",
+    "mumbai weather",
+    "temperature in london",
+]
+INTENT_CACHE_SIZES = [100, 1000, 10000]
+NEWS_COMMANDS = ["latest tech news", "what's happening in sports", "business headlines", "give me the news"]
+
+
+def time_calls(func, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return time.perf_counter() - start
+
+
+def measure(func, min_time: float, repeats: int, max_calls: int = 1_000_000) -> dict:
+    """Time func(i) calls, sizing each repeat to take about min_time seconds"""
+    single = max(time_calls(func, 1), 1e-7)
+    calls = int(min(max(min_time / single, 1), max_calls))
+    best = min(time_calls(func, calls) / calls for _ in range(repeats))
+    return {"ns_per_op": round(best * 1e9, 1), "calls": calls, "repeats": repeats}
+
+
+def bench_parser(args) -> dict:
+    parser = CommandParser()
+    cases = {
+        "parse_reminder_command": lambda i: parser.parse_reminder_command(REMINDER_COMMANDS[i % len(REMINDER_COMMANDS)]),
+        "parse_recurrence": lambda i: parser.parse_recurrence(RECURRENCE_COMMANDS[i % len(RECURRENCE_COMMANDS)]),
+        "parse_time_expression": lambda i: parser.parse_time_expression(TIME_EXPRESSIONS[i % len(TIME_EXPRESSIONS)]),
+        "extract_city_from_weather": lambda i: parser.extract_city_from_weather(WEATHER_COMMANDS[i % len(WEATHER_COMMANDS)]),
+        "extract_news_category": lambda i: parser.extract_news_category(NEWS_COMMANDS[i % len(NEWS_COMMANDS)]),
+    }
+    return {f"parser.{name}": measure(func, args.min_time, args.repeats) for name, func in cases.items()}
+
+
+def build_store(directory: str, size: int) -> ReminderManager:
+    """Create a store file holding `size` future reminders and load it"""
+    filename = os.path.join(directory, f"reminders_{size}.json")
+    now = datetime.now()
+    reminders = [{
+        "id": i,
+        "text": f"benchmark reminder {i}",
+        "time": (now + timedelta(days=1, seconds=i)).isoformat(),
+        "completed": False,
+        "created": now.isoformat()
+    } for i in range(1, size + 1)]
+    with open(filename, 'w') as f:
+        json.dump(reminders, f)
+    return ReminderManager(filename)
+
+
+def bench_reminders(args, directory: str) -> dict:
+    results = {}
+    for size in args.sizes:
+        manager = build_store(directory, size)
+        later = datetime.now() + timedelta(days=2)
+        # Mutations rewrite the store file, so cap their call counts on big stores
+        mutation_calls = max(1, min(size // 2, 200))
+        delete_ids = iter(range(1, size + 1))
+
+        cases = [
+            ("get_upcoming_reminders", lambda i: manager.get_upcoming_reminders(), None),
+            ("get_due_reminders", lambda i: manager.get_due_reminders(), None),
+            ("search_reminders", lambda i: manager.search_reminders(f"benchmark {size - i % size}"), None),
+            ("update_reminder", lambda i: manager.update_reminder(1 + i % size, "updated", later), mutation_calls),
+            ("add_reminder", lambda i: manager.add_reminder("added", later), mutation_calls),
+            ("delete_reminder", lambda i: manager.delete_reminder(next(delete_ids)), mutation_calls),
+        ]
+        for name, func, max_calls in cases:
+            # Each delete consumes an id, so deletes are never repeated
+            repeats = 1 if name == "delete_reminder" else args.repeats
+            key = f"reminders.{name}[n={size}]"
+            results[key] = measure(func, args.min_time, repeats, max_calls or 1_000_000)
+            print(f"{key:50s} {results[key]['ns_per_op'] / 1000:12.1f} us/op", file=sys.stderr)
+    return results
+
+
+def letters(i: int) -> str:
+    """Distinct word per number; the intent cache masks digits, so numbered commands would collide"""
+    word = ""
+    while True:
+        i, rest = divmod(i, 26)
+        word += chr(ord('a') + rest)
+        if not i:
+            return word
+
+
+def bench_intents(args) -> dict:
+    # The model is trained on the load test corpus; only prediction cost matters here
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "commands.tsv")) as f:
+        labeled = [line.rstrip("\n").split("\t", 1) for line in f if line.strip() and not line.startswith("#")]
+    model = IntentModel.train([command for _, command in labeled], [intent for intent, _ in labeled])
+    commands = [command for _, command in labeled]
+    results = {"intent_model.predict": measure(lambda i: model.predict(commands[i % len(commands)]),
+                                               args.min_time, args.repeats)}
+    print(f"{'intent_model.predict':50s} {results['intent_model.predict']['ns_per_op'] / 1000:12.1f} us/op",
+          file=sys.stderr)
+    for size in INTENT_CACHE_SIZES:
+        cache = IntentCache(capacity=size)
+        for i in range(size):
+            cache.add(f"{WEATHER_COMMANDS[i % len(WEATHER_COMMANDS)]} {letters(i)}", "weather")
+        # Adds to a full cache evict the least recently used row
+        cases = {
+            "lookup_hit": lambda i: cache.lookup(f"{WEATHER_COMMANDS[i % len(WEATHER_COMMANDS)]} {letters(i % size)}"),
+            "lookup_miss": lambda i: cache.lookup(NEWS_COMMANDS[i % len(NEWS_COMMANDS)]),
+            "add_evict": lambda i: cache.add(f"{NEWS_COMMANDS[i % len(NEWS_COMMANDS)]} {letters(size + i)}", "news"),
+        }
+        for name, func in cases.items():
+            key = f"intent_cache.{name}[n={size}]"
+            results[key] = measure(func, args.min_time, args.repeats)
+            print(f"{key:50s} {results[key]['ns_per_op'] / 1000:12.1f} us/op", file=sys.stderr)
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> bool:
+    """Print per-case ratios against a baseline; return True if nothing regressed"""
+    ok = True
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        ratio = result["ns_per_op"] / base["ns_per_op"] if base["ns_per_op"] else float('inf')
+        flag = "REGRESSION" if ratio > threshold else ""
+        ok = ok and not flag
+        print(f"{key:50s} {base['ns_per_op'] / 1000:12.1f} -> {result['ns_per_op'] / 1000:12.1f} us  x{ratio:5.2f} {flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parser and reminder store hot paths")
+    parser.add_argument('--sizes', type=lambda s: [int(x) for x in s.split(',')], default=DEFAULT_SIZES,
+                        help="Comma-separated reminder store sizes")
+    parser.add_argument('--only', choices=['parser', 'reminders', 'intents'], help="Run one group of cases")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Target seconds per repeat")
+    parser.add_argument('--repeats', type=int, default=3, help="Repeats per case (best is kept)")
+    parser.add_argument('--output', help="Write JSON results to this file")
+    parser.add_argument('--compare', help="Baseline JSON results to compare against")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    results = {}
+    if args.only in (None, 'parser'):
+        results.update(bench_parser(args))
+    if args.only in (None, 'intents'):
+        results.update(bench_intents(args))
+    if args.only in (None, 'reminders'):
+        directory = tempfile.mkdtemp(prefix="reminder_bench_")
+        try:
+            results.update(bench_reminders(args, directory))
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(baseline, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
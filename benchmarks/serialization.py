@@ -0,0 +1,78 @@
+# Serialization benchmark for API responses.
+#
+# Measures the per-request cost of turning typical payloads into Flask
+# responses with each JSON provider, and of serving /api/config from the
+# pre-serialized cache (including the 304 path) against building and
+# serializing it on every call.
+#
+#     python -m benchmarks.serialization --iterations 20000
+
+import argparse
+import json
+import timeit
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from json_responses import JSON_PROVIDERS, ResponseCache, install_json_provider
+
+
+def sample_payloads() -> dict:
+    now = datetime.now()
+    reminders = [{
+        'id': i,
+        'text': f"Reminder number {i} about something important",
+        'time': (now + timedelta(minutes=i)).isoformat(),
+        'formatted_time': (now + timedelta(minutes=i)).strftime("%I:%M %p on %B %d")
+    } for i in range(100)]
+    headlines = [{
+        'title': f"Headline {i}: markets, weather and technology",
+        'description': "A short description of the article " * 3,
+        'source': "Example News",
+        'url': f"https://example.com/articles/{i}"
+    } for i in range(5)]
+    return {
+        'config': {'wake_word': 'assistant', 'default_city': 'New York', 'default_country': 'us',
+                   'speech_rate': 180, 'speech_volume': 0.9},
+        'news': {'success': True, 'data': headlines, 'response': "Here are the top headlines", 'is_mock': False},
+        'reminders': {'success': True, 'data': reminders, 'response': "You have 100 upcoming reminders"},
+    }
+
+
+def per_call_us(func, iterations: int) -> float:
+    return round(min(timeit.repeat(func, number=iterations, repeat=3)) / iterations * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure JSON response serialization cost")
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    payloads = sample_payloads()
+    results = {}
+
+    for name in JSON_PROVIDERS:
+        app = Flask(__name__)
+        if install_json_provider(app, name) != name:
+            continue
+        with app.test_request_context('/'):
+            results[name] = {
+                payload_name: per_call_us(lambda p=payload: app.json.response(p), args.iterations)
+                for payload_name, payload in payloads.items()
+            }
+
+    app = Flask(__name__)
+    install_json_provider(app, 'orjson')
+    cache = ResponseCache(app)
+    builder = lambda: dict(payloads['config'])
+    with app.test_request_context('/'):
+        etag = cache.get('config', builder).get_etag()[0]
+        results['cached_config'] = per_call_us(lambda: cache.get('config', builder), args.iterations)
+    with app.test_request_context('/', headers={'If-None-Match': f'"{etag}"'}):
+        results['cached_config_304'] = per_call_us(lambda: cache.get('config', builder), args.iterations)
+
+    print(json.dumps({'unit': 'microseconds per response', 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
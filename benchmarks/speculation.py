@@ -0,0 +1,119 @@
+# Speculative prefetch benchmark.
+#
+# Replays the command corpus in benchmarks/commands.tsv through
+# /api/command in process (Flask test client), once with speculation off
+# and once on, against FakeGeminiModel, FakeWeatherService and
+# FakeNewsService with the given latencies. The weather cache, intent cache
+# and local intent model are disabled so every command is classified by
+# the (fake) Gemini and every weather command reaches the upstream.
+# Reports per-intent mean and p95 latency for each mode, the hit rate of
+# the local guesses, the upstream calls wasted on wrong guesses, and which
+# corpus commands the local guess reads differently from the fake Gemini.
+#
+#     python -m benchmarks.speculation --rounds 5 --gemini-latency-ms 400 --weather-latency-ms 150
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from benchmarks.load_test import load_corpus, percentile
+
+
+def run(client, corpus, rounds: int) -> dict:
+    latencies = {}
+    for _ in range(rounds):
+        for intent, command in corpus:
+            start = time.perf_counter()
+            client.post('/api/command', json={'command': command})
+            latencies.setdefault(intent, []).append(time.perf_counter() - start)
+    summary = {}
+    for intent, values in sorted(latencies.items()):
+        values.sort()
+        summary[intent] = {"mean_ms": round(sum(values) / len(values) * 1000, 1),
+                           "p95_ms": round(percentile(values, 0.95) * 1000, 1)}
+    return summary
+
+
+def missed_guesses(processor, model, corpus, fields) -> list:
+    """Corpus commands whose local guess disagrees with the fake Gemini on action or entity"""
+    from speculation import _same
+
+    missed = []
+    for _, command in dict.fromkeys(corpus):
+        guess = processor.guess(command) or {}
+        if guess.get("action") not in fields:
+            continue
+        field = fields[guess["action"]]
+        classified = model.classify(command)
+        entity = classified["entities"].get(field)
+        if classified["intent"] != guess["action"] or not _same(entity, guess.get(field)):
+            missed.append({"command": command, "guessed": [guess["action"], guess.get(field)],
+                           "classified": [classified["intent"], entity]})
+    return missed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure latency saved by speculative weather/news prefetch")
+    parser.add_argument('--corpus', default=os.path.join(os.path.dirname(__file__), 'commands.tsv'))
+    parser.add_argument('--rounds', type=int, default=5, help="Passes over the corpus per mode")
+    parser.add_argument('--gemini-latency-ms', type=int, default=400)
+    parser.add_argument('--weather-latency-ms', type=int, default=150)
+    parser.add_argument('--news-latency-ms', type=int, default=250)
+    args = parser.parse_args()
+
+    import backend_api
+    import metrics
+    from benchmarks.fakes import FakeGeminiModel, FakeNewsService, FakeWeatherService
+
+    corpus = load_corpus(args.corpus)
+    model = backend_api.gemini_processor.model = FakeGeminiModel(args.gemini_latency_ms / 1000)
+    backend_api.gemini_processor.intent_cache = None
+    backend_api.gemini_processor.intent_model = None
+    backend_api.gemini_processor.label_log = None
+    backend_api.weather_prefetcher.ttl = 0
+    speculator = backend_api.speculator
+    client = backend_api.app.test_client()
+
+    results = {}
+    upstream_calls = {}
+    outcomes = {}
+    for mode in ("off", "on"):
+        backend_api.speculator = speculator if mode == "on" else None
+        backend_api.weather_service = FakeWeatherService(args.weather_latency_ms / 1000)
+        backend_api.news_service = FakeNewsService(args.news_latency_ms / 1000)
+        before = {(action, outcome): metrics.SPECULATIONS.value(action=action, outcome=outcome)
+                  for action in ("weather", "news") for outcome in ("hit", "miss")}
+        results[mode] = run(client, corpus, args.rounds)
+        # Wasted fetches may still be running; let them finish before counting
+        time.sleep(max(args.weather_latency_ms, args.news_latency_ms) / 1000 + 0.1)
+        upstream_calls[mode] = {"weather": backend_api.weather_service.calls, "news": backend_api.news_service.calls}
+        outcomes[mode] = {f"{action}_{outcome}": int(metrics.SPECULATIONS.value(action=action, outcome=outcome) - count)
+                          for (action, outcome), count in before.items()}
+        print(f"{mode:4s} {results[mode]}", file=sys.stderr)
+
+    hits = sum(count for key, count in outcomes["on"].items() if key.endswith("_hit"))
+    guesses = sum(outcomes["on"].values())
+    saved = {intent: round(results["off"][intent]["mean_ms"] - results["on"][intent]["mean_ms"], 1)
+             for intent in ("weather", "news") if intent in results["off"]}
+    print(json.dumps({
+        "commands": len(corpus) * args.rounds,
+        "gemini_latency_ms": args.gemini_latency_ms,
+        "weather_latency_ms": args.weather_latency_ms,
+        "news_latency_ms": args.news_latency_ms,
+        "results": results,
+        "speculation": {
+            **outcomes["on"],
+            "hit_rate": round(hits / max(guesses, 1), 3),
+            "mean_ms_saved": saved,
+            "wasted_upstream_calls": {upstream: upstream_calls["on"][upstream] - upstream_calls["off"][upstream]
+                                      for upstream in ("weather", "news")},
+            "missed_guesses": missed_guesses(backend_api.gemini_processor, model, corpus,
+                                             {action: field for action, (field, _) in speculator.fetchers.items()}),
+        },
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
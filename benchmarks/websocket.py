@@ -0,0 +1,135 @@
+# Command round-trip benchmark: HTTP against the WebSocket channel.
+#
+# Sends the same command --commands times per transport and reports the
+# round-trip latency per command (p50/p95) and commands per second:
+#
+#   http_new_connection  POST /api/command on a fresh connection each time
+#   http_preflight       OPTIONS + POST on one keep-alive connection, what a
+#                        browser does for a cross-origin JSON POST once its
+#                        cached preflight expires
+#   http_keepalive       POST only, on one keep-alive connection
+#   ws_sequential        one command at a time over /api/ws
+#   ws_pipelined         --depth commands in flight at once over /api/ws
+#
+# By default the app is served in process with Gemini replaced by
+# FakeGeminiModel (--gemini-latency-ms, 0 to measure transport overhead
+# only); use --url to measure a running server instead.
+#
+#     python -m benchmarks.websocket --commands 500 --depth 8
+
+import argparse
+import json
+import socket
+import sys
+import threading
+import time
+
+import requests
+
+from benchmarks.load_test import percentile
+
+
+def start_local_app(gemini_latency: float) -> str:
+    from werkzeug.serving import make_server, WSGIRequestHandler
+
+    import backend_api
+    from benchmarks.fakes import FakeGeminiModel
+
+    backend_api.gemini_processor.model = FakeGeminiModel(gemini_latency)
+    # Fake classifications must not end up in the intent model's training data
+    backend_api.gemini_processor.label_log = None
+
+    class QuietHandler(WSGIRequestHandler):
+        # HTTP/1.1 so the keep-alive cases really reuse their connection
+        protocol_version = "HTTP/1.1"
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, backend_api.app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def summarize(latencies, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "commands": len(latencies),
+        "commands_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+    }
+
+
+def run_http(url: str, command: str, count: int, keep_alive: bool, preflight: bool) -> dict:
+    session = requests.Session() if keep_alive else None
+    post = session.post if session else requests.post
+    options = session.options if session else requests.options
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(count):
+        sent = time.perf_counter()
+        if preflight:
+            options(f"{url}/api/command", headers={
+                "Origin": "http://localhost:5173",
+                "Access-Control-Request-Method": "POST",
+                "Access-Control-Request-Headers": "content-type",
+            }).raise_for_status()
+        response = post(f"{url}/api/command", json={"command": command}, headers={"Origin": "http://localhost:5173"})
+        response.json()
+        latencies.append(time.perf_counter() - sent)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def run_ws(url: str, command: str, count: int, depth: int) -> dict:
+    import simple_websocket
+
+    ws = simple_websocket.Client.connect(url.replace("http", "ws", 1) + "/api/ws")
+    # Browsers disable Nagle on their sockets too
+    ws.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sent_at = {}
+    latencies = []
+    next_id = 0
+    start = time.perf_counter()
+    try:
+        while len(latencies) < count:
+            while next_id < count and len(sent_at) < depth:
+                sent_at[next_id] = time.perf_counter()
+                ws.send(json.dumps({"id": next_id, "command": command}))
+                next_id += 1
+            message = json.loads(ws.receive(timeout=30))
+            if message.get("type") == "result":
+                latencies.append(time.perf_counter() - sent_at.pop(message["id"]))
+    finally:
+        ws.close()
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare command round trips over HTTP and the WebSocket channel")
+    parser.add_argument('--url', help="Base URL of a running server (default: run in process with a fake Gemini)")
+    parser.add_argument('--commands', type=int, default=500, help="Commands per transport")
+    parser.add_argument('--depth', type=int, default=8, help="Commands in flight for ws_pipelined")
+    parser.add_argument('--command', default="what time is it")
+    parser.add_argument('--gemini-latency-ms', type=int, default=0)
+    args = parser.parse_args()
+
+    url = args.url or start_local_app(args.gemini_latency_ms / 1000)
+    cases = [
+        ("http_new_connection", lambda: run_http(url, args.command, args.commands, False, False)),
+        ("http_preflight", lambda: run_http(url, args.command, args.commands, True, True)),
+        ("http_keepalive", lambda: run_http(url, args.command, args.commands, True, False)),
+        ("ws_sequential", lambda: run_ws(url, args.command, args.commands, 1)),
+        ("ws_pipelined", lambda: run_ws(url, args.command, args.commands, args.depth)),
+    ]
+    results = {}
+    for name, run in cases:
+        results[name] = run()
+        print(f"{name:20s} {results[name]}", file=sys.stderr)
+
+    print(json.dumps({"url": args.url or "in-process", "command": args.command, "depth": args.depth,
+                      "gemini_latency_ms": args.gemini_latency_ms, "results": results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
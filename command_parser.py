@@ -1,6 +1,6 @@
 import re
 from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 import config
 
 class CommandParser:
@@ -12,6 +12,24 @@ class CommandParser:
             'weeks': r'(\d+)\s*week[s]?',
             'specific_time': r'(\d{1,2}):(\d{2})\s*(am|pm)?'
         }
+        
+        day_names = r'(?:mon|tues|wednes|thurs|fri|satur|sun)day'
+        # "hourly", "daily", "weekly" and "weekdays" are also adjectives ("the
+        # weekly report"), so they only count at the end of the command,
+        # optionally followed by a clock time
+        trailing = r'(?=(?:\s+at\s+\d{1,2}(?::\d{2})?(?:\s*[ap]m)?)?\s*$)'
+        self.recurrence_patterns = {
+            'hourly': rf'\b(?:every|each)\s+(?:(\d+)\s+)?hours?\b|\bhourly\b{trailing}',
+            'weekdays': rf'\b(?:every|each)\s+week\s*days?\b|\bon\s+weekdays\b|\bweekdays\b{trailing}',
+            'weekly': (rf'\b(?:every|each)\s+({day_names}s?(?:\s*(?:,|and|&)\s*{day_names}s?)*)\b'
+                       rf'|\bon\s+({day_names}s(?:\s*(?:,|and|&)\s*{day_names}s)*)\b'
+                       rf'|\b(?:every|each)\s+week\b|\bweekly\b{trailing}'),
+            'daily': rf'\b(?:every|each)\s+(day|morning|afternoon|evening|night)\b|\bdaily\b{trailing}'
+        }
+        # A relative time ("in 10 minutes") makes the reminder a one-off
+        self.relative_time_pattern = r'\bin\s+\d+\s*(?:minute|hour|day|week)s?\b'
+        # Clock time used when a daily phrase names a part of the day
+        self.day_part_times = {'morning': '08:00', 'afternoon': '13:00', 'evening': '18:00', 'night': '21:00'}
     
     def parse_reminder_command(self, command: str) -> Optional[Tuple[str, datetime]]:
         """Parse reminder command and extract text and time"""
@@ -37,6 +55,78 @@ class CommandParser:
             target_time = datetime.now() + timedelta(minutes=5)
             return text, target_time
     
+    def parse_recurrence(self, command: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Parse a recurring reminder like 'every day at 8am' into text and a rule dict.
+        
+        Returns None when the command has no recurrence phrase. The rule is
+        the dict stored on the reminder (see recurrence.RecurrenceRule).
+        """
+        command = command.lower().strip()
+        for trigger in ['remind me to', 'remind me', 'set a reminder to', 'set reminder']:
+            if command.startswith(trigger):
+                command = command[len(trigger):].strip()
+                break
+        
+        if re.search(self.relative_time_pattern, command):
+            return None
+        
+        for freq, pattern in self.recurrence_patterns.items():
+            match = re.search(pattern, command)
+            if match:
+                break
+        else:
+            return None
+        
+        rule = {"freq": freq}
+        if freq == 'hourly':
+            rule["interval"] = int(match.group(1) or 1)
+        elif freq == 'weekly':
+            days_text = match.group(1) or match.group(2)
+            if days_text:
+                rule["days"] = re.findall(r'(mon|tue|wed|thu|fri|sat|sun)', days_text)
+            else:
+                rule["days"] = [datetime.now().strftime('%a').lower()]
+        elif freq == 'daily' and match.lastindex and match.group(1) in self.day_part_times:
+            rule["time"] = self.day_part_times[match.group(1)]
+        
+        text = command[:match.start()] + ' ' + command[match.end():]
+        day_part = re.search(r'\b(morning|afternoon|evening|night)\b', command)
+        clock = self._parse_clock_time(text, day_part.group(1) if day_part else None)
+        if clock:
+            rule["time"], (start, end) = clock
+            text = text[:start] + ' ' + text[end:]
+        
+        text = re.sub(r'\s+', ' ', text).strip()
+        text = re.sub(r'^(?:at|on|to)\s+|\s+(?:at|on|and)$', '', text).strip()
+        return text, rule
+    
+    def _parse_clock_time(self, text: str, day_part: Optional[str] = None) -> Optional[Tuple[str, Tuple[int, int]]]:
+        """Find a clock time ('at 8am', '7:30 pm', 'at 20:00'); returns 'HH:MM' and its span.
+        
+        A bare hour ('at 7') is read as pm when the command names a later
+        part of the day ('every evening at 7').
+        """
+        match = (re.search(r'\b(?:at\s+)?(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b', text)
+                 or re.search(r'\b(?:at\s+)?(\d{1,2}):(\d{2})()', text)
+                 or re.search(r'\bat\s+(\d{1,2})()()\b', text))
+        if not match:
+            return None
+        
+        hour = int(match.group(1))
+        minute = int(match.group(2) or 0)
+        period = match.group(3)
+        if period == 'pm' and hour != 12:
+            hour += 12
+        elif period == 'am' and hour == 12:
+            hour = 0
+        elif not period and day_part in ('afternoon', 'evening', 'night') and 1 <= hour < 12:
+            hour += 12
+        elif not period and day_part == 'night' and hour == 12:
+            hour = 0
+        if hour > 23 or minute > 59:
+            return None
+        return f"{hour:02d}:{minute:02d}", match.span()
+    
     def _parse_relative_time(self, command: str) -> Optional[Tuple[str, datetime]]:
         """Parse relative time (e.g., 'in 5 minutes')"""
         parts = command.split('in', 1)
@@ -133,7 +223,8 @@ class CommandParser:
         for pattern in patterns:
             match = re.search(pattern, command)
             if match:
-                city = match.group(1).strip().title()
+                # Drop trailing filler ("weather in mumbai please")
+                city = re.sub(r'(\s+(please|now|today|right|currently))+$', '', match.group(1).strip()).title()
                 # Filter out common words that might be mistaken for cities
                 if city.lower() not in ['the', 'is', 'what', 'how', 'current', 'today', 'now']:
                     return city
@@ -160,6 +251,25 @@ class CommandParser:
         
         return 'general'  # Default category
 
+    def extract_search_query(self, command: str) -> str:
+        """Extract what to look for from a reminder search command"""
+        command = command.lower().strip().rstrip('?.!')
+        
+        patterns = [
+            r'(?:what|which) (?:did|have) i (?:set|add|create)\w* (?:a )?(?:reminders? )?(?:about|for|on|regarding) (.+)',
+            r'(?:search|find|look up|look for)(?: for)? (?:my )?reminders? (?:about|for|with|on|regarding|mentioning) (.+)',
+            r'(?:search|find|look up|look for)(?: for)? (.+?) (?:in|among) (?:my )?reminders?',
+            r'(?:any|do i have) (?:a )?reminders? (?:about|for|with|mentioning) (.+)',
+            r'reminders? (?:about|for|mentioning) (.+)'
+        ]
+        
+        for pattern in patterns:
+            match = re.search(pattern, command)
+            if match:
+                return match.group(1).strip()
+        
+        return command
+    
     def parse_time_expression(self, time_str: str) -> Optional[datetime]:
         """Parse time expression like 'at 12:43', 'in 10 minutes', etc."""
         time_str = time_str.lower().strip()
@@ -19,13 +19,136 @@ NEWS_API_KEY = os.getenv('NEWS_API_KEY', 'your_news_api_key_here')
 # Gemini API Key
 # Get yours at: https://ai.google.dev/
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', 'your_gemini_api_key_here')
+# Gemini client transport ('grpc' or 'rest'); empty uses the library default
+GEMINI_TRANSPORT = os.getenv('GEMINI_TRANSPORT') or None
+# Admission control for Gemini calls (per worker process): concurrent calls,
+# sustained calls per second and burst size (rate 0 disables the rate
+# limit), and the longest a call may wait before it is shed to the local parser
+GEMINI_MAX_CONCURRENT = int(os.getenv('GEMINI_MAX_CONCURRENT', '8'))
+GEMINI_RATE_PER_SECOND = float(os.getenv('GEMINI_RATE_PER_SECOND', '10'))
+GEMINI_BURST = int(os.getenv('GEMINI_BURST', '20'))
+GEMINI_MAX_WAIT = float(os.getenv('GEMINI_MAX_WAIT', '1.0'))  # seconds
+# Micro-batching of intent classification: commands arriving within the
+# wait window are classified by one Gemini call of up to this many
+# commands. A batch size of 1 disables batching.
+GEMINI_BATCH_SIZE = int(os.getenv('GEMINI_BATCH_SIZE', '1'))
+GEMINI_BATCH_MAX_WAIT_MS = int(os.getenv('GEMINI_BATCH_MAX_WAIT_MS', '20'))
+# Similarity cache of Gemini intents: commands whose n-gram cosine
+# similarity to a cached command reaches the threshold reuse its intent
+# without a Gemini call. A size of 0 disables the cache.
+INTENT_CACHE_SIZE = int(os.getenv('INTENT_CACHE_SIZE', '1000'))
+INTENT_CACHE_THRESHOLD = float(os.getenv('INTENT_CACHE_THRESHOLD', '0.85'))
+# Gemini classifications are appended here as training data for the local
+# intent model. Off by default since it stores raw user commands; set e.g.
+# intent_labels.ndjson to collect them. Train with `python intent_model.py`;
+# the model is loaded at startup if its held-out accuracy reaches the minimum.
+INTENT_LABEL_LOG = os.getenv('INTENT_LABEL_LOG', '')
+INTENT_MODEL_FILE = os.getenv('INTENT_MODEL_FILE', 'intent_model.npz')
+INTENT_MODEL_MIN_ACCURACY = float(os.getenv('INTENT_MODEL_MIN_ACCURACY', '0.95'))
+
+# Weather cache and background prefetch of the most requested cities.
+# The call budget is per worker process and covers cache misses too.
+WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL', '600'))  # seconds
+WEATHER_PREFETCH_INTERVAL = int(os.getenv('WEATHER_PREFETCH_INTERVAL', '300'))  # seconds
+WEATHER_PREFETCH_TOP_K = int(os.getenv('WEATHER_PREFETCH_TOP_K', '5'))
+WEATHER_CALL_BUDGET_PER_HOUR = int(os.getenv('WEATHER_CALL_BUDGET_PER_HOUR', '120'))
+# Speculative prefetch: when the local parser guesses one of these intents,
+# its weather or news fetch starts while Gemini classifies the command and
+# is used if Gemini agrees. Wrong guesses cost an upstream call (mind the
+# NewsAPI quota). 0 workers disables speculation.
+SPECULATIVE_PREFETCH_INTENTS = [intent.strip() for intent in
+                                os.getenv('SPECULATIVE_PREFETCH_INTENTS', 'weather,news').split(',') if intent.strip()]
+SPECULATIVE_PREFETCH_WORKERS = int(os.getenv('SPECULATIVE_PREFETCH_WORKERS', '8'))
 
 # Default settings
 DEFAULT_CITY = os.getenv('DEFAULT_CITY', 'New York')
 DEFAULT_COUNTRY = os.getenv('DEFAULT_COUNTRY', 'us')
 REMINDER_CHECK_INTERVAL = int(os.getenv('REMINDER_CHECK_INTERVAL', '30'))  # seconds
+# Due reminders are delivered by a worker pool: POSTed in batches to the
+# webhook if one is set, printed otherwise. Failed batches are retried with
+# exponential backoff (seconds) up to the attempt limit.
+REMINDER_WEBHOOK_URL = os.getenv('REMINDER_WEBHOOK_URL', '')
+REMINDER_WEBHOOK_TIMEOUT = float(os.getenv('REMINDER_WEBHOOK_TIMEOUT', '5'))  # seconds
+REMINDER_DELIVERY_WORKERS = int(os.getenv('REMINDER_DELIVERY_WORKERS', '4'))
+REMINDER_DELIVERY_BATCH_SIZE = int(os.getenv('REMINDER_DELIVERY_BATCH_SIZE', '50'))
+REMINDER_DELIVERY_MAX_ATTEMPTS = int(os.getenv('REMINDER_DELIVERY_MAX_ATTEMPTS', '5'))
+REMINDER_DELIVERY_BACKOFF = float(os.getenv('REMINDER_DELIVERY_BACKOFF', '1.0'))
+REMINDER_DELIVERY_BACKOFF_MAX = float(os.getenv('REMINDER_DELIVERY_BACKOFF_MAX', '60'))
+# Per-user reminder stores (selected by the X-User-Id header): where their
+# files live, how many stay loaded, and how long an unused one stays in memory
+REMINDER_DATA_DIR = os.getenv('REMINDER_DATA_DIR', 'reminder_data')
+REMINDER_MAX_LOADED_USERS = int(os.getenv('REMINDER_MAX_LOADED_USERS', '1000'))
+REMINDER_USER_IDLE_SECONDS = int(os.getenv('REMINDER_USER_IDLE_SECONDS', '900'))
+# A reminder waiting for its text ("set reminder at 12:43" -> "call mom") is
+# stored per user in REMINDER_DATA_DIR, so the follow-up may reach any
+# worker process; it is dropped after this many seconds
+CONVERSATION_CONTEXT_TTL = int(os.getenv('CONVERSATION_CONTEXT_TTL', '300'))
+# Every save of a reminder store also appends the reminders it changed to a
+# journal next to the file, which other worker processes replay instead of
+# reloading the whole store; the journal starts over past this size, and a
+# worker that fell behind it reloads in full
+REMINDER_JOURNAL_MAX_BYTES = int(os.getenv('REMINDER_JOURNAL_MAX_BYTES', str(16 * 1024 * 1024)))
+# Number of reminder changes kept for delta sync (GET /api/reminders?since=)
+REMINDER_CHANGE_LOG_SIZE = int(os.getenv('REMINDER_CHANGE_LOG_SIZE', '1000'))
+# Reminder list pagination and the number of reminders read out in summaries
+REMINDER_PAGE_SIZE = int(os.getenv('REMINDER_PAGE_SIZE', '50'))
+REMINDER_MAX_PAGE_SIZE = int(os.getenv('REMINDER_MAX_PAGE_SIZE', '500'))
+REMINDER_SUMMARY_LIMIT = int(os.getenv('REMINDER_SUMMARY_LIMIT', '5'))
+# Completed reminders are moved to the archive file this long after they
+# fire; the scheduler leader compacts the live store every interval (seconds)
+REMINDER_ARCHIVE_AFTER_HOURS = float(os.getenv('REMINDER_ARCHIVE_AFTER_HOURS', '24'))
+REMINDER_COMPACT_INTERVAL = int(os.getenv('REMINDER_COMPACT_INTERVAL', '600'))
+# Bulk NDJSON import/export: rejected lines listed in the import response,
+# reminders saved per import batch (each batch rewrites the store once, so
+# larger batches write less but hold more records in memory), and
+# reminders serialized per streamed export chunk
+REMINDER_IMPORT_MAX_ERRORS = int(os.getenv('REMINDER_IMPORT_MAX_ERRORS', '100'))
+REMINDER_IMPORT_BATCH_SIZE = int(os.getenv('REMINDER_IMPORT_BATCH_SIZE', '10000'))
+REMINDER_EXPORT_CHUNK_SIZE = int(os.getenv('REMINDER_EXPORT_CHUNK_SIZE', '1000'))
 WAKE_WORD = os.getenv('WAKE_WORD', 'assistant')
 
+# JSON encoder for API responses ('orjson' or 'default')
+JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'orjson')
+
+# WebSocket command channel (/api/ws): commands one connection may have
+# running at once (later ones queue), keepalive ping interval in seconds
+# and the largest accepted message in bytes
+WS_MAX_IN_FLIGHT = int(os.getenv('WS_MAX_IN_FLIGHT', '8'))
+WS_PING_INTERVAL = float(os.getenv('WS_PING_INTERVAL', '25'))
+WS_MAX_MESSAGE_SIZE = int(os.getenv('WS_MAX_MESSAGE_SIZE', '65536'))
+
+# Fraction of requests whose per-stage timings are appended to TRACE_LOG_FILE
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0.01'))
+TRACE_LOG_FILE = os.getenv('TRACE_LOG_FILE', 'traces.ndjson')
+# Structured /api/command event log, written by a background thread to
+# rotating gzip NDJSON files (empty directory disables). Events are dropped
+# rather than blocking requests once the queue is full.
+EVENT_LOG_DIR = os.getenv('EVENT_LOG_DIR', 'events')
+EVENT_LOG_QUEUE_SIZE = int(os.getenv('EVENT_LOG_QUEUE_SIZE', '10000'))
+EVENT_LOG_BATCH_SIZE = int(os.getenv('EVENT_LOG_BATCH_SIZE', '500'))
+EVENT_LOG_FLUSH_INTERVAL = float(os.getenv('EVENT_LOG_FLUSH_INTERVAL', '1.0'))  # seconds
+EVENT_LOG_MAX_BYTES = int(os.getenv('EVENT_LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+EVENT_LOG_BACKUPS = int(os.getenv('EVENT_LOG_BACKUPS', '20'))
+
+# On-demand profiling: requests sending PROFILE_SECRET in the X-Profile header
+# or ?profile= are profiled (disabled while empty), as is every Nth request
+# when PROFILE_SAMPLE_EVERY > 0. Output goes to PROFILE_DIR.
+PROFILE_SECRET = os.getenv('PROFILE_SECRET', '')
+PROFILE_SAMPLE_EVERY = int(os.getenv('PROFILE_SAMPLE_EVERY', '0'))
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+
+# Production server settings (used by serve.py)
+SERVER_HOST = os.getenv('SERVER_HOST', '0.0.0.0')
+SERVER_PORT = int(os.getenv('SERVER_PORT', '5000'))
+SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', str((os.cpu_count() or 1) * 2 + 1)))
+SERVER_THREADS = int(os.getenv('SERVER_THREADS', '4'))
+# 'gthread' runs one request per thread; 'gevent' runs requests as greenlets
+# so a single worker can keep many slow upstream calls in flight
+SERVER_WORKER_CLASS = os.getenv('SERVER_WORKER_CLASS', 'gthread')
+SERVER_WORKER_CONNECTIONS = int(os.getenv('SERVER_WORKER_CONNECTIONS', '1000'))
+# Only the process holding this lock runs the reminder scheduler
+REMINDER_LEADER_LOCK = os.getenv('REMINDER_LEADER_LOCK', 'reminder_scheduler.lock')
+
 # Speech settings
 SPEECH_RATE = int(os.getenv('SPEECH_RATE', '180'))
 SPEECH_VOLUME = float(os.getenv('SPEECH_VOLUME', '0.9'))
@@ -0,0 +1,59 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from reminder_partitions import partition_name
+
+
+class ConversationContexts:
+    """Pending multi-turn state per user, in small files shared by all worker processes.
+
+    A follow-up command can land on any worker, so the context left by
+    "set reminder at 12:43" is written next to the user's reminder
+    partition rather than kept in memory. pop() claims the file with an
+    atomic rename, so exactly one request consumes it. Contexts older than
+    `ttl` seconds are ignored.
+    """
+
+    def __init__(self, directory: str, ttl: float = 300):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def filename_for(self, user_key: Optional[str]) -> str:
+        return os.path.join(self.directory, f"context-{partition_name(user_key) or 'default'}.json")
+
+    def waiting(self, user_key: Optional[str]) -> bool:
+        """Whether the user has a pending context, without consuming it"""
+        return os.path.exists(self.filename_for(user_key))
+
+    def set(self, user_key: Optional[str], context: Dict[str, Any]):
+        filename = self.filename_for(user_key)
+        tmp_filename = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_filename, 'w') as f:
+            json.dump({**context, "expires": time.time() + self.ttl}, f)
+        os.replace(tmp_filename, filename)
+
+    def pop(self, user_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Take the user's pending context, or None if there is none or it expired"""
+        filename = self.filename_for(user_key)
+        claimed = f"{filename}.{os.getpid()}.{threading.get_ident()}.claimed"
+        try:
+            os.rename(filename, claimed)
+        except FileNotFoundError:
+            return None
+        try:
+            with open(claimed, 'r') as f:
+                context = json.load(f)
+        except (OSError, ValueError):
+            return None
+        finally:
+            try:
+                os.remove(claimed)
+            except OSError:
+                pass
+        if not isinstance(context, dict) or context.get("expires", 0) < time.time():
+            return None
+        return context
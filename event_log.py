@@ -0,0 +1,121 @@
+import atexit
+import glob
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import metrics
+from process_lock import FileLock
+
+CURRENT_FILENAME = "events.ndjson.gz"
+
+
+class EventLog:
+    """Structured event log written off the request path.
+
+    emit() only puts the event on a bounded in-memory queue; when the queue
+    is full the event is dropped and counted rather than blocking the
+    caller. A background thread takes up to `batch_size` events at a time
+    (waiting at most `flush_interval` seconds for the first), runs
+    `prepare` on each, and appends the batch to `<directory>/events.ndjson.gz`
+    as one gzip member. Once the file reaches `max_bytes` it is renamed to
+    a timestamped file and only the newest `backups` of those are kept.
+    Worker processes share the files under a file lock.
+    """
+
+    def __init__(self, directory: str, max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 1.0, max_bytes: int = 10 * 1024 * 1024, backups: int = 20,
+                 prepare: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None):
+        self.directory = directory
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.prepare = prepare
+        self.filename = os.path.join(directory, CURRENT_FILENAME)
+        self._file_lock = FileLock(self.filename + ".lock")
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_started(self):
+        # Threads do not survive fork(), so (re)start in each worker process
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            os.makedirs(self.directory, exist_ok=True)
+            threading.Thread(target=self._run, args=(self._queue,), daemon=True).start()
+            atexit.register(self.flush)
+
+    def emit(self, event: Dict[str, Any]) -> bool:
+        """Queue an event for writing; returns False if it was dropped"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            metrics.EVENTS.inc(outcome="dropped")
+            return False
+
+    def queue_length(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until queued events are written; returns False on timeout"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _run(self, pending: queue.Queue):
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(pending.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+                metrics.EVENTS.inc(len(batch), outcome="written")
+            except Exception as e:
+                print(f"Event log write error: {e}")
+                metrics.EVENTS.inc(len(batch), outcome="error")
+            finally:
+                for _ in batch:
+                    pending.task_done()
+
+    def _write(self, batch):
+        lines = []
+        for event in batch:
+            if self.prepare is not None:
+                event = self.prepare(event)
+            lines.append(json.dumps(event, default=str, separators=(",", ":")))
+        data = gzip.compress(("\n".join(lines) + "\n").encode(), compresslevel=6)
+        with self._file_lock:
+            try:
+                size = os.path.getsize(self.filename)
+            except FileNotFoundError:
+                size = 0
+            if size and size + len(data) > self.max_bytes:
+                self._rotate()
+            with open(self.filename, 'ab') as f:
+                f.write(data)
+
+    def _rotate(self):
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        os.replace(self.filename, os.path.join(self.directory, f"events-{stamp}.ndjson.gz"))
+        rotated = sorted(glob.glob(os.path.join(self.directory, "events-*.ndjson.gz")))
+        for filename in rotated[:max(len(rotated) - self.backups, 0)]:
+            os.remove(filename)
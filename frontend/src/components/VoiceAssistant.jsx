@@ -29,6 +29,8 @@ import {
 } from 'react-icons/fa'
 
 const API_BASE_URL = 'http://localhost:5000/api'
+// Persistent channel for commands and server pushes (see backend ws_channel.py)
+const WS_URL = API_BASE_URL.replace(/^http/, 'ws') + '/ws'
 
 function VoiceAssistant() {
   const [messages, setMessages] = useState([])
@@ -51,6 +53,11 @@ function VoiceAssistant() {
   const textareaRef = useRef(null)
   const recognitionRef = useRef(null)
   const speechSynthesis = useRef(null)
+  const remindersVersion = useRef(null) // Store version of the reminders we hold
+  const socketRef = useRef(null) // Open command channel, or null while disconnected
+  const pendingCommands = useRef(new Map()) // Command id -> resolve() awaiting its result
+  const nextCommandId = useRef(1)
+  const onPushRef = useRef(null) // Latest push handler, so the socket never calls a stale one
 
   // Initialize component
   useEffect(() => {
@@ -83,6 +90,46 @@ function VoiceAssistant() {
     }
   }, [isInitialized])
 
+  // Keep one WebSocket open for commands and reminder pushes, reconnecting
+  // when it drops; commands fall back to HTTP while it is down
+  useEffect(() => {
+    let closed = false
+    let retryTimer = null
+
+    const connect = () => {
+      const socket = new WebSocket(WS_URL)
+      socket.onopen = () => {
+        socketRef.current = socket
+      }
+      socket.onmessage = (event) => {
+        const message = JSON.parse(event.data)
+        if (message.type === 'result') {
+          const resolve = pendingCommands.current.get(message.id)
+          pendingCommands.current.delete(message.id)
+          if (resolve) resolve(message)
+        } else if (message.type === 'intent') {
+          setStatus(`Working on ${message.intent.replace('_', ' ')}...`)
+        } else if (message.type === 'reminders' && onPushRef.current) {
+          onPushRef.current(message.reminders)
+        }
+      }
+      socket.onclose = () => {
+        socketRef.current = null
+        // Commands still waiting are answered as failures; the user can retry
+        pendingCommands.current.forEach(resolve => resolve({ success: false }))
+        pendingCommands.current.clear()
+        if (!closed) retryTimer = setTimeout(connect, 3000)
+      }
+    }
+
+    connect()
+    return () => {
+      closed = true
+      clearTimeout(retryTimer)
+      if (socketRef.current) socketRef.current.close()
+    }
+  }, [])
+
   // Auto-resize textarea
   useEffect(() => {
     if (textareaRef.current) {
@@ -244,6 +291,35 @@ function VoiceAssistant() {
     setMessages(prev => [...prev, newMessage])
   }
 
+  // Due reminders pushed by the server over the command channel
+  onPushRef.current = (dueReminders) => {
+    dueReminders.forEach(reminder => {
+      const message = `⏰ Reminder: ${reminder.text}`
+      addMessage(message, 'assistant')
+      speakText(message)
+    })
+    fetchReminders()
+  }
+
+  // Send a command over the WebSocket when it is open, otherwise over HTTP
+  const runCommand = async (command) => {
+    const socket = socketRef.current
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      const id = nextCommandId.current++
+      const result = new Promise(resolve => pendingCommands.current.set(id, resolve))
+      socket.send(JSON.stringify({ id, command }))
+      return result
+    }
+    const response = await fetch(`${API_BASE_URL}/command`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ command })
+    })
+    return response.json()
+  }
+
   const sendCommand = async (command) => {
     if (!command.trim()) return
 
@@ -253,15 +329,7 @@ function VoiceAssistant() {
     setStatus('Processing...')
 
     try {
-      const response = await fetch(`${API_BASE_URL}/command`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ command })
-      })
-
-      const data = await response.json()
+      const data = await runCommand(command)
       
       if (data.success) {
         const responseMessage = `🤖 Assistant: ${data.response}`
@@ -365,24 +433,53 @@ function VoiceAssistant() {
     await fetchReminders()
   }
 
+  const sortByTime = (list) => [...list].sort((a, b) => a.time.localeCompare(b.time))
+
+  // Load every upcoming reminder by following the pagination cursor
+  const fetchAllReminders = async () => {
+    let all = []
+    let version = null
+    let cursor = null
+    do {
+      const params = new URLSearchParams({ limit: '200' })
+      if (cursor) params.set('cursor', cursor)
+      const response = await fetch(`${API_BASE_URL}/reminders?${params}`)
+      const data = await response.json()
+      if (!data.success) throw new Error(data.error || 'Failed to fetch reminders')
+      // The first page's version is the oldest, so later deltas cover any
+      // change made while paging
+      if (version === null) version = data.version ?? null
+      all = all.concat(data.data || [])
+      cursor = data.next_cursor
+    } while (cursor)
+    return { version, reminders: all }
+  }
+
   const fetchReminders = async () => {
     try {
       console.log('Fetching reminders...')
-      const response = await fetch(`${API_BASE_URL}/reminders`)
-      console.log('Fetch reminders response status:', response.status)
-      
-      const data = await response.json()
-      console.log('Fetch reminders data:', data)
-      
-      if (data.success) {
-        setReminders(data.data || [])
-        console.log('Updated reminders state:', data.data)
-      } else {
-        console.error('Failed to fetch reminders:', data.error)
-        setReminders([])
+      const since = remindersVersion.current
+      if (since !== null) {
+        // After the first load only ask for what changed since our version
+        const response = await fetch(`${API_BASE_URL}/reminders?since=${since}&limit=1`)
+        const data = await response.json()
+        console.log('Fetch reminders delta:', data)
+        
+        if (data.success && data.reset === false) {
+          remindersVersion.current = data.version
+          const removed = new Set([...data.removed, ...data.upserted.map(r => r.id)])
+          setReminders(prev => sortByTime([...prev.filter(r => !removed.has(r.id)), ...data.upserted]))
+          return
+        }
       }
+      
+      const { version, reminders: all } = await fetchAllReminders()
+      remindersVersion.current = version
+      setReminders(all)
+      console.log('Updated reminders state:', all)
     } catch (error) {
       console.error('Error fetching reminders:', error)
+      remindersVersion.current = null
       setReminders([])
     }
   }
@@ -1109,6 +1206,9 @@ function VoiceAssistant() {
                             <div className="flex-1">
                               <p className="text-white font-medium text-sm">{reminder.text}</p>
                               <p className="text-blue-200 text-xs mt-1">{reminder.formatted_time}</p>
+                              {reminder.recurrence_description && (
+                                <p className="text-purple-200 text-xs mt-1">Repeats {reminder.recurrence_description}</p>
+                              )}
                             </div>
                             <div className="flex items-center space-x-2 ml-3">
                               <button
@@ -1,95 +1,258 @@
 import google.generativeai as genai
 import json
+import os
 import re
+import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 import config
+import metrics
+import tracing
+from admission import (AdmissionController, AdmissionRejected, PRIORITY_COMMAND, PRIORITY_NAMES,
+                       PRIORITY_REMINDER, PRIORITY_REPHRASE)
 from command_parser import CommandParser
+from conversation import ConversationContexts
+from intent_cache import IntentCache
+from intent_model import IntentLabelLog, IntentModel
+from micro_batch import MicroBatcher
+from recurrence import RecurrenceRule
+
+# Intents whose entities can be extracted locally, so an intent from the
+# cache or the local model is enough; "unknown" answers depend on Gemini's
+# natural response
+CACHEABLE_INTENTS = frozenset([
+    "time", "weather", "news", "reminder_set", "reminder_incomplete", "reminder_list", "reminder_search", "help"
+])
+
+# Shared by the single and batched classification prompts
+CLASSIFICATION_FIELDS = """1. "intent": One of ["time", "weather", "news", "reminder_set", "reminder_incomplete", "reminder_list", "reminder_search", "help", "unknown"]
+2. "entities": Extracted entities based on intent:
+   - For weather: {"city": "city_name"}
+   - For news: {"category": "general|technology|sports|business|health|science|entertainment"}
+   - For reminder_set: {"text": "reminder_text", "time_expression": "time_expression", "recurrence": "repeat phrase or null"}
+   - For reminder_incomplete: {"time_expression": "time_expression"} (when only time is given without task)
+   - For reminder_search: {"query": "words to look for in reminder texts"}
+   - For other intents: {}
+3. "natural_response": A natural, conversational response to the user
+4. "confidence": A number between 0-1 indicating confidence in the classification
+
+Examples:
+- "Call mom in 10 minutes" → intent: "reminder_set", entities: {"text": "call mom", "time_expression": "in 10 minutes"}
+- "Remind me to take vitamins every day at 8am" → intent: "reminder_set", entities: {"text": "take vitamins", "time_expression": "at 8am", "recurrence": "every day at 8am"}
+- "Set reminder at 12:43" → intent: "reminder_incomplete", entities: {"time_expression": "at 12:43"}
+- "What did I set about the dentist?" → intent: "reminder_search", entities: {"query": "dentist"}
+- "What's the weather in Mumbai?" → intent: "weather", entities: {"city": "Mumbai"}
+- "Tell me about new news" → intent: "news", entities: {"category": "general"}
+- "What time is it?" → intent: "time", entities: {}
+
+For incomplete reminders (only time given), respond with a question asking what to remind about.
+"""
 
 class GeminiCommandProcessor:
     def __init__(self):
         # Configure Gemini API
-        genai.configure(api_key=config.GEMINI_API_KEY)
+        genai.configure(api_key=config.GEMINI_API_KEY, transport=config.GEMINI_TRANSPORT)
         self.model = genai.GenerativeModel('gemini-1.5-flash')
         self.command_parser = CommandParser()
-        self.conversation_context = None  # Store conversation context
+        # Reminders waiting for their text, per user and shared across workers
+        self.contexts = ConversationContexts(config.REMINDER_DATA_DIR, config.CONVERSATION_CONTEXT_TTL)
+        # Limits concurrent and per-second Gemini calls; calls that would
+        # wait too long are shed to the local fallback parser
+        self.admission = AdmissionController(config.GEMINI_MAX_CONCURRENT, config.GEMINI_RATE_PER_SECOND,
+                                             config.GEMINI_BURST, config.GEMINI_MAX_WAIT)
+        # Optionally classify concurrent commands together, one call per batch
+        self.batcher = None
+        if config.GEMINI_BATCH_SIZE > 1:
+            self.batcher = MicroBatcher(self._classify_batch, config.GEMINI_BATCH_SIZE,
+                                        config.GEMINI_BATCH_MAX_WAIT_MS / 1000)
+        # Near-duplicate commands reuse a cached intent instead of calling Gemini
+        self.intent_cache = None
+        if config.INTENT_CACHE_SIZE > 0:
+            self.intent_cache = IntentCache(config.INTENT_CACHE_SIZE, config.INTENT_CACHE_THRESHOLD)
+        # Gemini's answers are logged to train the local model, which then
+        # handles commands it is confident about
+        self.label_log = IntentLabelLog(config.INTENT_LABEL_LOG) if config.INTENT_LABEL_LOG else None
+        self.intent_model = self._load_intent_model(config.INTENT_MODEL_FILE)
+    
+    def _load_intent_model(self, filename: str) -> Optional[IntentModel]:
+        """Load the local intent model if it exists and was accurate enough on held-out commands"""
+        if not filename or not os.path.exists(filename):
+            return None
+        try:
+            model = IntentModel.load(filename)
+        except Exception as e:
+            print(f"Could not load intent model {filename}: {e}")
+            return None
+        accuracy = model.report.get("accuracy_at_threshold", 0)
+        if accuracy < config.INTENT_MODEL_MIN_ACCURACY:
+            print(f"Intent model {filename} not enabled: held-out accuracy {accuracy:.1%} "
+                  f"is below {config.INTENT_MODEL_MIN_ACCURACY:.1%}")
+            return None
+        print(f"Intent model {filename} enabled: {accuracy:.1%} held-out accuracy "
+              f"on {model.report.get('coverage', 0):.1%} of commands")
+        return model
         
-    def process_command(self, command: str) -> Dict[str, Any]:
+    def _generate_content(self, prompt: str, priority: int = PRIORITY_COMMAND):
+        """Send a prompt to Gemini once admitted, recording latency and errors"""
+        priority_name = PRIORITY_NAMES[priority]
+        start = time.perf_counter()
+        try:
+            self.admission.acquire(priority)
+        except AdmissionRejected:
+            metrics.GEMINI_ADMISSIONS.inc(priority=priority_name, outcome="shed")
+            raise
+        metrics.GEMINI_ADMISSIONS.inc(priority=priority_name, outcome="admitted")
+        metrics.GEMINI_ADMISSION_WAIT.observe(time.perf_counter() - start, priority=priority_name)
+        try:
+            with metrics.upstream_call("gemini"):
+                return self.model.generate_content(prompt)
+        finally:
+            self.admission.release()
+    
+    def _command_priority(self, command: str) -> int:
+        """Reminder commands are admitted ahead of other commands"""
+        if re.search(r'\bremind|\bevery\b', command.lower()):
+            return PRIORITY_REMINDER
+        return PRIORITY_COMMAND
+    
+    @tracing.traced("classify")
+    def process_command(self, command: str, user_key: Optional[str] = None) -> Dict[str, Any]:
         """Process command using Gemini AI for better understanding"""
         try:
             # Check if we have a pending reminder that needs completion
-            if self.conversation_context and self.conversation_context.get("waiting_for_reminder_text"):
-                return self._handle_reminder_completion(command)
+            context = self.contexts.pop(user_key)
+            if context is not None and context.get("waiting_for_reminder_text"):
+                return self._handle_reminder_completion(command, context)
+            
+            try:
+                result = self._classify(command)
+            except ValueError:
+                # Fallback to original processing if the response is not usable JSON
+                metrics.FALLBACKS.inc(reason="invalid_json")
+                return self._fallback_processing(command)
+            
+            # Process based on intent
+            if result["intent"] == "weather":
+                return self._handle_weather(result, command)
+            elif result["intent"] == "news":
+                return self._handle_news(result, command)
+            elif result["intent"] == "reminder_set":
+                return self._handle_reminder_set(result, command)
+            elif result["intent"] == "reminder_incomplete":
+                return self._handle_reminder_incomplete(result, command, user_key)
+            elif result["intent"] == "reminder_list":
+                return self._handle_reminder_list(result)
+            elif result["intent"] == "reminder_search":
+                return self._handle_reminder_search(result, command)
+            elif result["intent"] == "time":
+                return self._handle_time(result)
+            elif result["intent"] == "help":
+                return self._handle_help(result)
+            else:
+                return self._handle_unknown(result)
                 
-            # Create a prompt for Gemini to understand the command intent
-            prompt = f"""
+        except AdmissionRejected:
+            # Too busy to wait for Gemini; answer locally right away
+            metrics.FALLBACKS.inc(reason="shed")
+            return self._fallback_processing(command)
+        except Exception as e:
+            print(f"Gemini API error: {e}")
+            # Fallback to original processing
+            metrics.FALLBACKS.inc(reason="gemini_error")
+            return self._fallback_processing(command)
+    
+    def guess(self, command: str, user_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The local parser's reading of a command, without calling Gemini; None mid-conversation"""
+        if self.contexts.waiting(user_key):
+            return None
+        return self._fallback_processing(command)
+    
+    def _classify(self, command: str) -> Dict[str, Any]:
+        """Intent and entities for a command; raises ValueError if Gemini's answer is not usable"""
+        if self.intent_cache is not None:
+            cached = self.intent_cache.lookup(command)
+            if cached is not None:
+                intent, similarity = cached
+                return {"intent": intent, "entities": self._local_entities(intent, command),
+                        "confidence": round(similarity, 2)}
+        
+        if self.intent_model is not None:
+            intent, probability = self.intent_model.predict(command)
+            if probability >= self.intent_model.threshold and intent in CACHEABLE_INTENTS:
+                metrics.INTENT_MODEL.inc(outcome="used")
+                return {"intent": intent, "entities": self._local_entities(intent, command),
+                        "confidence": round(probability, 2)}
+            metrics.INTENT_MODEL.inc(outcome="deferred")
+        
+        if self.batcher is not None:
+            result = self.batcher.submit(command)
+        else:
+            response = self._generate_content(self._classification_prompt(command), self._command_priority(command))
+            result = self._parse_json(response.text)
+            if not isinstance(result, dict):
+                raise ValueError("Expected a JSON object")
+        
+        if self.label_log is not None and isinstance(result.get("intent"), str):
+            self.label_log.write(command, result)
+        if self.intent_cache is not None and result.get("intent") in CACHEABLE_INTENTS:
+            self.intent_cache.add(command, result["intent"])
+        return result
+    
+    def _local_entities(self, intent: str, command: str) -> Dict[str, Any]:
+        """Entities extracted by the local parser; handlers parse reminder times themselves"""
+        if intent == "weather":
+            return {"city": self.command_parser.extract_city_from_weather(command)}
+        if intent == "news":
+            return {"category": self.command_parser.extract_news_category(command)}
+        if intent == "reminder_search":
+            return {"query": self.command_parser.extract_search_query(command)}
+        return {}
+    
+    def _classify_batch(self, commands: List[str]) -> List[Any]:
+        """Classify several commands with one Gemini call; one result (or ValueError) per command"""
+        metrics.GEMINI_BATCH_SIZE.observe(len(commands))
+        priority = min(self._command_priority(command) for command in commands)
+        response = self._generate_content(self._batch_classification_prompt(commands), priority)
+        results = self._parse_json(response.text)
+        if not isinstance(results, list) or len(results) != len(commands):
+            raise ValueError(f"Expected a JSON array of {len(commands)} results")
+        return [result if isinstance(result, dict) else ValueError("Expected a JSON object")
+                for result in results]
+    
+    def _parse_json(self, response_text: str) -> Any:
+        """Parse a JSON answer, removing markdown code blocks if present"""
+        response_text = response_text.strip()
+        if response_text.startswith('```json'):
+            response_text = response_text[7:]  # Remove ```json
+        if response_text.endswith('```'):
+            response_text = response_text[:-3]  # Remove ```
+        return json.loads(response_text.strip())
+    
+    def _classification_prompt(self, command: str) -> str:
+        """Prompt asking Gemini to understand the command intent"""
+        return f"""
 You are a voice assistant AI. Analyze the following user command and determine the intent and extract relevant information.
 
 User command: "{command}"
 
 Please respond with a JSON object containing:
-1. "intent": One of ["time", "weather", "news", "reminder_set", "reminder_incomplete", "reminder_list", "help", "unknown"]
-2. "entities": Extracted entities based on intent:
-   - For weather: {{"city": "city_name"}}
-   - For news: {{"category": "general|technology|sports|business|health|science|entertainment"}}
-   - For reminder_set: {{"text": "reminder_text", "time_expression": "time_expression"}}
-   - For reminder_incomplete: {{"time_expression": "time_expression"}} (when only time is given without task)
-   - For other intents: {{}}
-3. "natural_response": A natural, conversational response to the user
-4. "confidence": A number between 0-1 indicating confidence in the classification
-
-Examples:
-- "Call mom in 10 minutes" → intent: "reminder_set", entities: {{"text": "call mom", "time_expression": "in 10 minutes"}}
-- "Set reminder at 12:43" → intent: "reminder_incomplete", entities: {{"time_expression": "at 12:43"}}
-- "What's the weather in Mumbai?" → intent: "weather", entities: {{"city": "Mumbai"}}
-- "Tell me about new news" → intent: "news", entities: {{"category": "general"}}
-- "What time is it?" → intent: "time", entities: {{}}
+{CLASSIFICATION_FIELDS}
+Respond only with valid JSON, no markdown formatting.
+"""
+    
+    def _batch_classification_prompt(self, commands: List[str]) -> str:
+        """Prompt asking Gemini to classify several independent commands at once"""
+        numbered = "\n".join(f"{i}. {json.dumps(command)}" for i, command in enumerate(commands, 1))
+        return f"""
+You are a voice assistant AI. Analyze each of the following {len(commands)} user commands independently and determine its intent and extract relevant information.
 
-For incomplete reminders (only time given), respond with a question asking what to remind about.
+User commands:
+{numbered}
 
-Respond only with valid JSON, no markdown formatting.
+Please respond with a JSON array of exactly {len(commands)} objects, one per command in the same order, each containing:
+{CLASSIFICATION_FIELDS}
+Respond only with a valid JSON array, no markdown formatting.
 """
-            
-            response = self.model.generate_content(prompt)
-            
-            # Clean the response - remove markdown code blocks if present
-            response_text = response.text.strip()
-            if response_text.startswith('```json'):
-                response_text = response_text[7:]  # Remove ```json
-            if response_text.endswith('```'):
-                response_text = response_text[:-3]  # Remove ```
-            response_text = response_text.strip()
-            
-            # Parse the JSON response
-            try:
-                result = json.loads(response_text)
-                
-                # Process based on intent
-                if result["intent"] == "weather":
-                    return self._handle_weather(result, command)
-                elif result["intent"] == "news":
-                    return self._handle_news(result, command)
-                elif result["intent"] == "reminder_set":
-                    return self._handle_reminder_set(result, command)
-                elif result["intent"] == "reminder_incomplete":
-                    return self._handle_reminder_incomplete(result, command)
-                elif result["intent"] == "reminder_list":
-                    return self._handle_reminder_list(result)
-                elif result["intent"] == "time":
-                    return self._handle_time(result)
-                elif result["intent"] == "help":
-                    return self._handle_help(result)
-                else:
-                    return self._handle_unknown(result)
-                    
-            except json.JSONDecodeError:
-                # Fallback to original processing if JSON parsing fails
-                return self._fallback_processing(command)
-                
-        except Exception as e:
-            print(f"Gemini API error: {e}")
-            # Fallback to original processing
-            return self._fallback_processing(command)
     
     def _handle_weather(self, result: Dict, command: str) -> Dict[str, Any]:
         """Handle weather commands"""
@@ -121,6 +284,14 @@ Respond only with valid JSON, no markdown formatting.
         reminder_text = entities.get("text", "")
         time_expression = entities.get("time_expression", "")
         
+        # Repeating reminders ("every day at 8am") are stored as a rule
+        recurring = self.command_parser.parse_recurrence(command)
+        if (recurring is None and entities.get("recurrence")
+                and not re.search(self.command_parser.relative_time_pattern, command.lower())):
+            recurring = self.command_parser.parse_recurrence(f"{reminder_text} {entities['recurrence']}")
+        if recurring:
+            return self._recurring_reminder(*recurring, result.get("natural_response"), result.get("confidence", 0.8))
+        
         # Use the original parser to extract time information
         parsed_reminder = self.command_parser.parse_reminder_command(command)
         
@@ -142,7 +313,32 @@ Respond only with valid JSON, no markdown formatting.
                 "confidence": result.get("confidence", 0.5)
             }
     
-    def _handle_reminder_incomplete(self, result: Dict, command: str) -> Dict[str, Any]:
+    def _recurring_reminder(self, text: str, rule: Dict[str, Any], natural_response: Optional[str],
+                            confidence: float) -> Dict[str, Any]:
+        """Build a reminder_set result for a recurring reminder, scheduled at its first occurrence"""
+        try:
+            recurrence = RecurrenceRule.from_dict(rule)
+        except ValueError as e:
+            return {
+                "action": "reminder_set",
+                "error": f"Invalid recurrence: {e}",
+                "response": "I couldn't understand how often to repeat that reminder. Try something like 'every day at 8am'.",
+                "confidence": 0.3
+            }
+        
+        first_time = recurrence.first_occurrence(datetime.now())
+        return {
+            "action": "reminder_set",
+            "text": text,
+            "time": first_time.isoformat(),
+            "formatted_time": first_time.strftime("%I:%M %p on %B %d"),
+            "recurrence": recurrence.to_dict(),
+            "recurrence_description": recurrence.describe(),
+            "response": natural_response or f"Setting reminder: {text}, {recurrence.describe()}",
+            "confidence": confidence
+        }
+    
+    def _handle_reminder_incomplete(self, result: Dict, command: str, user_key: Optional[str] = None) -> Dict[str, Any]:
         """Handle incomplete reminder commands (only time given, no text)"""
         entities = result.get("entities", {})
         time_expression = entities.get("time_expression", "")
@@ -154,11 +350,11 @@ Respond only with valid JSON, no markdown formatting.
             
             if parsed_time:
                 # Store the context for the next message
-                self.conversation_context = {
+                self.contexts.set(user_key, {
                     "waiting_for_reminder_text": True,
                     "stored_time": parsed_time.isoformat(),
                     "time_expression": time_expression
-                }
+                })
                 
                 return {
                     "action": "reminder_incomplete",
@@ -191,6 +387,19 @@ Respond only with valid JSON, no markdown formatting.
             "confidence": result.get("confidence", 0.9)
         }
     
+    def _handle_reminder_search(self, result: Dict, command: str) -> Dict[str, Any]:
+        """Handle reminder search commands"""
+        query = result.get("entities", {}).get("query")
+        if not query:
+            query = self.command_parser.extract_search_query(command)
+        
+        return {
+            "action": "reminder_search",
+            "query": query,
+            "response": result.get("natural_response", f"Searching your reminders for {query}..."),
+            "confidence": result.get("confidence", 0.8)
+        }
+    
     def _handle_time(self, result: Dict) -> Dict[str, Any]:
         """Handle time commands"""
         current_time = datetime.now().strftime("%I:%M %p")
@@ -219,7 +428,8 @@ Commands you can try:
 • "Weather in Mumbai" / "London weather" / "Temperature in Dubai"
 • "Latest news" / "Technology news"
 • "Remind me to call mom in 10 minutes"
-• "Show my reminders" """),
+• "Show my reminders"
+• "What did I set about the dentist?" """),
             "confidence": result.get("confidence", 0.9)
         }
     
@@ -243,10 +453,17 @@ Commands you can try:
         elif any(word in command for word in ['news', 'headlines']):
             category = self.command_parser.extract_news_category(command)
             return {"action": "news", "category": category, "response": f"Getting {category} news...", "confidence": 0.6}
+        elif any(phrase in command for phrase in ['what did i set', 'search reminder', 'find reminder',
+                                                   'search my reminder', 'find my reminder']):
+            query = self.command_parser.extract_search_query(command)
+            return {"action": "reminder_search", "query": query, "response": f"Searching your reminders for {query}...", "confidence": 0.6}
         elif any(word in command for word in ['remind', 'reminder']):
             if 'list' in command or 'show' in command:
                 return {"action": "reminder_list", "response": "Here are your reminders...", "confidence": 0.7}
             else:
+                recurring = self.command_parser.parse_recurrence(command)
+                if recurring:
+                    return self._recurring_reminder(*recurring, None, 0.6)
                 parsed = self.command_parser.parse_reminder_command(command)
                 if parsed:
                     text, reminder_time = parsed
@@ -263,18 +480,15 @@ Commands you can try:
         else:
             return {"action": "unknown", "response": "I'm not sure how to help with that. Try asking about time, weather, news, or reminders.", "confidence": 0.2}
 
-    def _handle_reminder_completion(self, command: str) -> Dict[str, Any]:
+    def _handle_reminder_completion(self, command: str, context: Dict[str, Any]) -> Dict[str, Any]:
         """Handle completion of a reminder that was waiting for text"""
         try:
-            # Get the stored time from context
-            stored_time = self.conversation_context.get("stored_time")
+            # Get the stored time from context (already taken from the store)
+            stored_time = context.get("stored_time")
             
             # Use the command as the reminder text
             reminder_text = command.strip()
             
-            # Clear the context
-            self.conversation_context = None
-            
             # Return the completed reminder
             return {
                 "action": "reminder_set",
@@ -286,8 +500,6 @@ Commands you can try:
             }
             
         except Exception as e:
-            # Clear context on error
-            self.conversation_context = None
             return {
                 "action": "reminder_set",
                 "error": "Could not complete reminder",
@@ -295,6 +507,7 @@ Commands you can try:
                 "confidence": 0.3
             }
     
+    @tracing.traced("rephrase")
     def generate_natural_response(self, action_result: Dict[str, Any]) -> str:
         """Generate a natural response using Gemini based on action result"""
         try:
@@ -310,7 +523,7 @@ Wind Speed: {weather_data.get('wind_speed', 'Unknown')} km/h
 
 Make it sound natural and conversational, like a friendly assistant.
 """
-                response = self.model.generate_content(prompt)
+                response = self._generate_content(prompt, PRIORITY_REPHRASE)
                 return response.text
             
             elif action_result.get("action") == "news" and action_result.get("success"):
@@ -322,12 +535,14 @@ Number of headlines: {len(headlines)}
 
 Create a brief, friendly introduction to the news, mentioning the category and that you're providing the latest headlines.
 """
-                response = self.model.generate_content(prompt)
+                response = self._generate_content(prompt, PRIORITY_REPHRASE)
                 return response.text
             
             else:
                 return action_result.get("response", "I'm here to help!")
                 
+        except AdmissionRejected:
+            return action_result.get("response", "I'm here to help!")
         except Exception as e:
             print(f"Error generating natural response: {e}")
             return action_result.get("response", "I'm here to help!")
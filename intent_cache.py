@@ -0,0 +1,114 @@
+import re
+import threading
+import zlib
+from typing import Optional, Tuple
+
+import numpy as np
+
+import metrics
+
+NGRAM_SIZE = 3
+# Words that carry no intent; dropping them lets "weather in mumbai please"
+# match "what's the weather in mumbai"
+FILLER_WORDS = frozenset([
+    'a', 'an', 'the', 'is', 'it', 'in', 'at', 'on', 'for', 'of', 'to', 'me', 'my', 'i', 'you',
+    'please', 'now', 'can', 'could', 'would', 'what', "what's", 'whats', 'tell', 'give', 'get'
+])
+
+
+def normalize(text: str) -> str:
+    """Content words with digits masked, padded so word edges form n-grams"""
+    words = [re.sub(r"[0-9]", "0", word) for word in re.findall(r"[a-z0-9']+", text.lower())
+             if word not in FILLER_WORDS]
+    return " " + " ".join(words) + " "
+
+
+def embed(text: str, dims: int) -> np.ndarray:
+    """Unit-length vector of hashed character n-gram counts"""
+    padded = normalize(text)
+    vector = np.zeros(dims, dtype=np.float32)
+    if len(padded) < NGRAM_SIZE:
+        return vector
+    hashes = [zlib.crc32(padded[i:i + NGRAM_SIZE].encode()) for i in range(len(padded) - NGRAM_SIZE + 1)]
+    np.add.at(vector, np.array(hashes) % dims, 1)
+    return vector / np.linalg.norm(vector)
+
+
+class IntentCache:
+    """Nearest-neighbour cache of classified commands.
+
+    Each command is embedded as a hashed character n-gram vector and kept
+    as a row of one preallocated matrix, so a lookup is a single matrix-vector
+    product. A command whose cosine similarity to a cached command is at
+    least `threshold` reuses that command's intent. Entities are not cached
+    and must be extracted again from the new command, since "remind me in
+    10 minutes" and "remind me in 20 minutes" are identical once digits are
+    masked. When full, the least recently used row is replaced.
+    """
+
+    def __init__(self, capacity: int = 1000, threshold: float = 0.85, dims: int = 1024):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.dims = dims
+        self._vectors = np.zeros((capacity, dims), dtype=np.float32)
+        self._last_used = np.zeros(capacity, dtype=np.int64)
+        self._intents = [None] * capacity
+        self._commands = [None] * capacity
+        self._size = 0
+        self._clock = 0
+        self._lock = threading.Lock()
+
+    def _nearest(self, vector: np.ndarray) -> Tuple[int, float]:
+        scores = self._vectors[:self._size] @ vector
+        row = int(np.argmax(scores))
+        return row, float(scores[row])
+
+    def lookup(self, command: str) -> Optional[Tuple[str, float]]:
+        """(intent, similarity) of the nearest cached command, or None below the threshold"""
+        vector = embed(command, self.dims)
+        with self._lock:
+            if self._size:
+                row, score = self._nearest(vector)
+                if score >= self.threshold:
+                    self._clock += 1
+                    self._last_used[row] = self._clock
+                    metrics.INTENT_CACHE.inc(result="hit")
+                    return self._intents[row], score
+        metrics.INTENT_CACHE.inc(result="miss")
+        return None
+
+    def add(self, command: str, intent: str):
+        """Cache a classified command, replacing a near-identical one or the least recently used"""
+        vector = embed(command, self.dims)
+        if not vector.any():
+            return
+        with self._lock:
+            row = None
+            if self._size:
+                nearest, score = self._nearest(vector)
+                # Keep one row per near-duplicate so the cache holds variety
+                if score >= 0.99:
+                    row = nearest
+            if row is None:
+                if self._size < self.capacity:
+                    row = self._size
+                    self._size += 1
+                else:
+                    row = int(np.argmin(self._last_used))
+                    metrics.INTENT_CACHE_EVICTIONS.inc()
+            self._clock += 1
+            self._vectors[row] = vector
+            self._last_used[row] = self._clock
+            self._intents[row] = intent
+            self._commands[row] = command
+
+    def clear(self):
+        with self._lock:
+            self._vectors[:] = 0
+            self._last_used[:] = 0
+            self._intents = [None] * self.capacity
+            self._commands = [None] * self.capacity
+            self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
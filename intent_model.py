@@ -0,0 +1,184 @@
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from intent_cache import NGRAM_SIZE, normalize
+
+DEFAULT_DIMS = 2 ** 14
+# Commands where fewer of their features than this were seen in training
+# get zero confidence; naive Bayes is confidently wrong on unfamiliar text
+MIN_KNOWN_FEATURES = 0.5
+
+
+def features(text: str, dims: int) -> np.ndarray:
+    """Hashed feature indices: character trigrams plus whole words"""
+    padded = normalize(text)
+    grams = [padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)]
+    grams.extend("w:" + word for word in padded.split())
+    return np.array([zlib.crc32(gram.encode()) % dims for gram in grams], dtype=np.int64)
+
+
+class IntentModel:
+    """Multinomial naive Bayes intent classifier over hashed n-gram features.
+
+    Trained offline from Gemini's logged classifications (see main()).
+    The file also stores the confidence threshold chosen at training time
+    and the accuracy measured on held-out commands at that threshold, so
+    the app can refuse a model that is not accurate enough.
+    """
+
+    def __init__(self, intents: List[str], log_priors: np.ndarray, log_likelihoods: np.ndarray,
+                 known: np.ndarray, threshold: float = 0.9, report: Optional[Dict[str, Any]] = None):
+        self.intents = intents
+        self.log_priors = log_priors
+        self.log_likelihoods = log_likelihoods
+        # Which hashed features occurred in the training commands
+        self.known = known
+        self.dims = log_likelihoods.shape[1]
+        self.threshold = threshold
+        self.report = report or {}
+
+    @classmethod
+    def train(cls, commands: List[str], intents: List[str], dims: int = DEFAULT_DIMS,
+              alpha: float = 0.1, threshold: float = 0.9) -> "IntentModel":
+        labels = sorted(set(intents))
+        rows = {intent: row for row, intent in enumerate(labels)}
+        counts = np.zeros((len(labels), dims), dtype=np.float64)
+        examples = np.zeros(len(labels), dtype=np.float64)
+        for command, intent in zip(commands, intents):
+            np.add.at(counts[rows[intent]], features(command, dims), 1)
+            examples[rows[intent]] += 1
+        log_priors = np.log(examples / examples.sum())
+        log_likelihoods = np.log((counts + alpha) / (counts.sum(axis=1, keepdims=True) + alpha * dims))
+        return cls(labels, log_priors.astype(np.float32), log_likelihoods.astype(np.float32),
+                   counts.sum(axis=0) > 0, threshold)
+
+    def predict(self, command: str) -> Tuple[str, float]:
+        """Most likely intent and its probability"""
+        indices = features(command, self.dims)
+        scores = self.log_priors + self.log_likelihoods[:, indices].sum(axis=1)
+        best = int(np.argmax(scores))
+        if not len(indices) or self.known[indices].mean() < MIN_KNOWN_FEATURES:
+            return self.intents[best], 0.0
+        probability = 1.0 / float(np.exp(scores - scores[best]).sum())
+        return self.intents[best], probability
+
+    def save(self, filename: str):
+        with open(filename, 'wb') as f:
+            np.savez_compressed(f, intents=np.array(self.intents), log_priors=self.log_priors,
+                                log_likelihoods=self.log_likelihoods, known=self.known, threshold=self.threshold,
+                                report=json.dumps(self.report))
+
+    @classmethod
+    def load(cls, filename: str) -> "IntentModel":
+        with np.load(filename) as data:
+            return cls([str(intent) for intent in data["intents"]], data["log_priors"], data["log_likelihoods"],
+                       data["known"], float(data["threshold"]), json.loads(str(data["report"])))
+
+
+class IntentLabelLog:
+    """Appends Gemini's classifications to a local NDJSON file as training data"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._lock = threading.Lock()
+
+    def write(self, command: str, result: Dict[str, Any]):
+        record = {
+            "timestamp": time.time(),
+            "command": command,
+            "intent": result.get("intent"),
+            "entities": result.get("entities", {}),
+            "confidence": result.get("confidence"),
+        }
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            with open(self.filename, 'a') as f:
+                f.write(line)
+
+
+def load_labels(filename: str) -> List[Tuple[str, str]]:
+    """(command, intent) pairs, one per distinct command with its most frequent label.
+
+    Commands are distinct after normalization, so "in 10 minutes" and "in
+    20 minutes" variants cannot end up on both sides of the held-out split.
+    """
+    labels = defaultdict(Counter)
+    commands = {}
+    with open(filename) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and record.get("command") and record.get("intent"):
+                key = normalize(record["command"])
+                commands.setdefault(key, record["command"])
+                labels[key][record["intent"]] += 1
+    return [(commands[key], counts.most_common(1)[0][0]) for key, counts in labels.items()]
+
+
+def evaluate(model: IntentModel, examples: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """Agreement with Gemini's labels overall and for predictions at or above the threshold"""
+    correct = confident = confident_correct = 0
+    per_intent = defaultdict(lambda: [0, 0])
+    start = time.perf_counter()
+    for command, intent in examples:
+        predicted, probability = model.predict(command)
+        hit = predicted == intent
+        correct += hit
+        per_intent[intent][0] += 1
+        per_intent[intent][1] += hit
+        if probability >= model.threshold:
+            confident += 1
+            confident_correct += hit
+    elapsed = time.perf_counter() - start
+    total = max(len(examples), 1)
+    return {
+        "examples": len(examples),
+        "accuracy": round(correct / total, 4),
+        "threshold": model.threshold,
+        "coverage": round(confident / total, 4),
+        "accuracy_at_threshold": round(confident_correct / max(confident, 1), 4),
+        "predict_us": round(elapsed / total * 1e6, 1),
+        "per_intent": {intent: {"examples": count, "accuracy": round(hits / count, 4)}
+                       for intent, (count, hits) in sorted(per_intent.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local intent model from logged Gemini classifications")
+    parser.add_argument('--labels', default="intent_labels.ndjson", help="NDJSON log written by the app")
+    parser.add_argument('--output', default="intent_model.npz", help="Where to write the trained model")
+    parser.add_argument('--holdout', type=float, default=0.2, help="Fraction of commands held out for evaluation")
+    parser.add_argument('--threshold', type=float, default=0.9, help="Confidence needed to skip Gemini")
+    parser.add_argument('--dims', type=int, default=DEFAULT_DIMS, help="Hashed feature dimensions")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    examples = load_labels(args.labels)
+    if len(examples) < 10:
+        sys.exit(f"Need at least 10 distinct labeled commands, found {len(examples)}")
+    random.Random(args.seed).shuffle(examples)
+    split = max(1, int(len(examples) * args.holdout))
+    held_out, training = examples[:split], examples[split:]
+
+    model = IntentModel.train([command for command, _ in training], [intent for _, intent in training],
+                              dims=args.dims, threshold=args.threshold)
+    model.report = evaluate(model, held_out)
+    model.report["training_examples"] = len(training)
+    model.save(args.output)
+    print(json.dumps(model.report, indent=2))
+    print(f"Saved {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
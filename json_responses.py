@@ -0,0 +1,89 @@
+import hashlib
+import json
+from typing import Any, Callable, Dict, Optional
+
+from flask import Flask, Response, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speed-up, falls back to the stdlib provider
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    Output matches DefaultJSONProvider: keys are sorted, datetimes and other
+    non-native types go through Flask's default() hook.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+
+JSON_PROVIDERS = {
+    'default': DefaultJSONProvider,
+    'orjson': OrjsonProvider,
+}
+
+
+def install_json_provider(app: Flask, name: str) -> str:
+    """Install the named JSON provider on the app and return the one in use"""
+    if name == 'orjson' and orjson is None:
+        print("orjson is not installed, using the default JSON provider")
+        name = 'default'
+    provider_class = JSON_PROVIDERS.get(name)
+    if provider_class is None:
+        raise ValueError(f"Unknown JSON provider: {name}")
+    app.json = provider_class(app)
+    return name
+
+
+class CachedJSONResponse:
+    """Pre-serialized JSON body with an ETag for conditional GETs"""
+
+    def __init__(self, payload: Dict[str, Any], dumps: Callable[[Any], str] = None):
+        dumps = dumps or (lambda obj: json.dumps(obj, separators=(",", ":"), sort_keys=True))
+        self.body = f"{dumps(payload)}\n".encode()
+        self.etag = hashlib.sha1(self.body).hexdigest()
+
+    def response(self) -> Response:
+        """Build the response, or a bodiless 304 if the client copy is current"""
+        if request.if_none_match.contains_weak(self.etag):
+            response = Response(status=304)
+        else:
+            response = Response(self.body, mimetype='application/json')
+        response.set_etag(self.etag)
+        return response
+
+
+class ResponseCache:
+    """Caches serialized responses keyed by name and a validity key.
+
+    The builder only runs when the validity key for a name changes, e.g.
+    once per process for static config or once per second for status.
+    """
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self._entries: Dict[str, tuple] = {}
+
+    def get(self, name: str, builder: Callable[[], Dict[str, Any]], key: Optional[Any] = None) -> Response:
+        entry = self._entries.get(name)
+        if entry is None or entry[0] != key:
+            dumps = lambda obj: self.app.json.dumps(obj, separators=(",", ":"))
+            entry = (key, CachedJSONResponse(builder(), dumps))
+            self._entries[name] = entry
+        return entry[1].response()
+
+    def clear(self):
+        self._entries.clear()
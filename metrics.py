@@ -0,0 +1,208 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Latency buckets in seconds, from fast local paths to slow upstream calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.labelnames), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Histogram:
+    """Bucketed latency histogram with optional labels"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (last one is +Inf), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Gauge whose value is read from a callback at scrape time"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str, callback: Callable[[], float]):
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        return [f"{self.name} {self.callback()}"]
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name: str, help_text: str, callback: Callable[[], float]) -> Gauge:
+        return self.register(Gauge(name, help_text, callback))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "voice_assistant_http_requests_total", "HTTP requests by route, method and status",
+    ["route", "method", "status"])
+HTTP_LATENCY = REGISTRY.histogram(
+    "voice_assistant_http_request_duration_seconds", "HTTP request latency by route",
+    ["route", "method"])
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "voice_assistant_upstream_duration_seconds", "Upstream API call latency",
+    ["upstream"])
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "voice_assistant_upstream_errors_total", "Upstream API calls that raised an error",
+    ["upstream"])
+COMMAND_INTENTS = REGISTRY.counter(
+    "voice_assistant_command_intents_total", "Commands processed by detected intent",
+    ["intent"])
+FALLBACKS = REGISTRY.counter(
+    "voice_assistant_fallback_total", "Commands handled by the local fallback parser",
+    ["reason"])
+
+GEMINI_ADMISSIONS = REGISTRY.counter(
+    "voice_assistant_gemini_admissions_total", "Gemini calls admitted or shed by admission control",
+    ["priority", "outcome"])
+GEMINI_ADMISSION_WAIT = REGISTRY.histogram(
+    "voice_assistant_gemini_admission_wait_seconds", "Time Gemini calls waited for admission",
+    ["priority"])
+GEMINI_BATCH_SIZE = REGISTRY.histogram(
+    "voice_assistant_gemini_batch_size", "Commands classified per batched Gemini call",
+    [], buckets=(1, 2, 4, 8, 16, 32, 64))
+INTENT_CACHE = REGISTRY.counter(
+    "voice_assistant_intent_cache_total", "Intent cache lookups by result (hit or miss)",
+    ["result"])
+INTENT_CACHE_EVICTIONS = REGISTRY.counter(
+    "voice_assistant_intent_cache_evictions_total", "Cached commands evicted to make room")
+INTENT_MODEL = REGISTRY.counter(
+    "voice_assistant_intent_model_total", "Local intent model predictions used or deferred to Gemini",
+    ["outcome"])
+EVENTS = REGISTRY.counter(
+    "voice_assistant_events_total", "Command log events by outcome (written, dropped or error)",
+    ["outcome"])
+REMINDER_DELIVERIES = REGISTRY.counter(
+    "voice_assistant_reminder_deliveries_total", "Reminder delivery attempts by target and outcome",
+    ["target", "outcome"])
+REMINDER_STORE_REFRESHES = REGISTRY.counter(
+    "voice_assistant_reminder_store_refreshes_total",
+    "Catch-ups after another process changed a reminder store (journal replay or full reload)",
+    ["kind"])
+SPECULATIONS = REGISTRY.counter(
+    "voice_assistant_speculations_total",
+    "Speculative upstream fetches by guessed action and outcome (started, hit or miss)",
+    ["action", "outcome"])
+SPECULATION_SAVED = REGISTRY.histogram(
+    "voice_assistant_speculation_saved_seconds", "Upstream fetch time overlapped with classification on hits",
+    ["action"])
+WS_MESSAGES = REGISTRY.counter(
+    "voice_assistant_ws_messages_total", "Command channel WebSocket messages (sent or received)",
+    ["direction"])
+WEATHER_CACHE = REGISTRY.counter(
+    "voice_assistant_weather_cache_total", "Weather lookups by cache result (hit or miss)",
+    ["result"])
+WEATHER_PREFETCH = REGISTRY.counter(
+    "voice_assistant_weather_prefetch_total", "Background weather refreshes by outcome",
+    ["outcome"])
+
+
+@contextmanager
+def upstream_call(upstream: str):
+    """Time a call to an upstream API and count it as an error if it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        UPSTREAM_ERRORS.inc(upstream=upstream)
+        raise
+    finally:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - start, upstream=upstream)
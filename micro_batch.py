@@ -0,0 +1,77 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List
+
+
+class MicroBatcher:
+    """Groups concurrent calls into batches for a batch-capable backend.
+
+    submit() queues an item and blocks until its result is ready. A
+    dispatcher thread starts a batch with the first queued item, adds items
+    that arrive within `max_wait` seconds (up to `max_batch_size`), and
+    hands the batch to `process_batch` on a worker pool, so a slow batch
+    never holds up the next one. `process_batch` returns one result per
+    item, in order; an Exception in that list is raised to that item's
+    caller only, and an exception raised by `process_batch` itself is
+    raised to every caller in the batch.
+    """
+
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]], max_batch_size: int,
+                 max_wait: float, max_in_flight: int = 8):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_in_flight = max_in_flight
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._executor = None
+
+    def _ensure_started(self):
+        # Threads do not survive fork(), so (re)start in each worker process
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="micro-batch")
+            threading.Thread(target=self._dispatch, args=(self._queue,), daemon=True).start()
+
+    def submit(self, item: Any) -> Any:
+        """Queue an item and wait for its result"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future))
+        return future.result()
+
+    def _dispatch(self, pending: queue.Queue):
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch):
+        try:
+            results = self.process_batch([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Expected {len(batch)} batch results, got {len(results)}")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
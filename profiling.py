@@ -0,0 +1,139 @@
+import hmac
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Tuple
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _builtin_label(func) -> str:
+    module = getattr(func, '__module__', None) or ''
+    name = getattr(func, '__qualname__', None) or getattr(func, '__name__', repr(func))
+    return f"{module}.{name}" if module else name
+
+
+class RequestProfiler:
+    """Deterministic call-stack profiler for the current thread.
+
+    Records the self time of every distinct call stack seen between start()
+    and stop(), which is enough to write both flamegraph "folded" stacks
+    and an indented call tree with cumulative times.
+    """
+
+    def __init__(self):
+        self.self_times: Dict[Tuple[str, ...], float] = defaultdict(float)
+        # Entries: [label, start time, time spent in children]
+        self._stack = []
+        self._previous_profiler = None
+
+    def start(self):
+        self._previous_profiler = sys.getprofile()
+        sys.setprofile(self._callback)
+
+    def stop(self):
+        """Stop recording; safe to call more than once"""
+        if sys.getprofile() == self._callback:
+            sys.setprofile(self._previous_profiler)
+        # Close frames still open when profiling stopped
+        now = time.perf_counter()
+        while self._stack:
+            self._pop(now)
+
+    def _callback(self, frame, event, arg):
+        now = time.perf_counter()
+        if event == 'call':
+            self._stack.append([_frame_label(frame), now, 0.0])
+        elif event == 'c_call':
+            self._stack.append([_builtin_label(arg), now, 0.0])
+        elif event in ('return', 'c_return', 'c_exception'):
+            # Returns from frames entered before start() have no entry
+            if self._stack:
+                self._pop(now)
+
+    def _pop(self, now: float):
+        path = tuple(entry[0] for entry in self._stack)
+        label, start, child_time = self._stack.pop()
+        total = now - start
+        self.self_times[path] += max(total - child_time, 0.0)
+        if self._stack:
+            self._stack[-1][2] += total
+
+    def folded(self) -> str:
+        """Stacks in the folded format read by flamegraph.pl and speedscope (microseconds)"""
+        lines = []
+        for path, seconds in sorted(self.self_times.items()):
+            micros = int(seconds * 1e6)
+            if micros:
+                lines.append(";".join(label.replace(";", ",") for label in path) + f" {micros}")
+        return "\n".join(lines) + "\n"
+
+    def call_tree(self, min_fraction: float = 0.005) -> str:
+        """Indented call tree with cumulative and self time per node"""
+        cumulative: Dict[Tuple[str, ...], float] = defaultdict(float)
+        children = defaultdict(set)
+        for path, seconds in self.self_times.items():
+            for depth in range(1, len(path) + 1):
+                cumulative[path[:depth]] += seconds
+                children[path[:depth - 1]].add(path[:depth])
+
+        grand_total = sum(cumulative[root] for root in children[()]) or 1.0
+        lines = [f"{'cumulative ms':>14} {'self ms':>10}  call"]
+
+        def walk(path, depth):
+            for child in sorted(children[path], key=lambda p: -cumulative[p]):
+                if cumulative[child] / grand_total < min_fraction:
+                    continue
+                lines.append(f"{cumulative[child] * 1000:14.3f} {self.self_times.get(child, 0.0) * 1000:10.3f}  "
+                             f"{'  ' * depth}{child[-1]}")
+                walk(child, depth + 1)
+
+        walk((), 0)
+        return "\n".join(lines) + "\n"
+
+
+class ProfileTrigger:
+    """Decides which requests to profile.
+
+    A request is profiled when it carries the configured secret in the
+    X-Profile header or the `profile` query parameter, or when it is the
+    Nth request since the last sampled one.
+    """
+
+    def __init__(self, secret: str, sample_every: int):
+        self.secret = secret
+        self.sample_every = sample_every
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def should_profile(self, request) -> bool:
+        if self.secret:
+            supplied = request.headers.get('X-Profile') or request.args.get('profile')
+            if supplied and hmac.compare_digest(supplied.encode(), self.secret.encode()):
+                return True
+        if self.sample_every > 0:
+            with self._lock:
+                return next(self._counter) % self.sample_every == 0
+        return False
+
+
+def profile_name(route: str, intent: str) -> str:
+    """File name stem labelled by time, route and intent"""
+    label = re.sub(r'[^A-Za-z0-9]+', '_', f"{route}-{intent}").strip('_')
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{label}"
+
+
+def write_profile(directory: str, name: str, profiler: RequestProfiler):
+    """Write <name>.folded (flamegraph input) and <name>.txt (call tree)"""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{name}.folded"), 'w') as f:
+        f.write(profiler.folded())
+    with open(os.path.join(directory, f"{name}.txt"), 'w') as f:
+        f.write(profiler.call_tree())
@@ -0,0 +1,202 @@
+import bisect
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+WEEKDAY_NAMES = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+FREQUENCIES = ('daily', 'weekdays', 'weekly', 'hourly', 'cron')
+
+# Give up looking for a cron match after this many days (covers Feb 29 rules)
+CRON_SEARCH_DAYS = 366 * 5
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> List[int]:
+    """Expand one cron field ("*", "1-5", "*/15", "1,3,5") into sorted values"""
+    values = set()
+    for part in field.split(','):
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Invalid cron step: {field}")
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start_text, end_text = part.split('-', 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"Cron field out of range: {field}")
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+class CronSchedule:
+    """Five-field cron expression: minute hour day-of-month month day-of-week.
+
+    Day of week uses cron numbering (0 or 7 = Sunday). As in cron, when
+    both day fields are restricted a day matching either one qualifies.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression}")
+        self.expression = expression
+        self.minutes = _parse_cron_field(fields[0], 0, 59)
+        self.hours = _parse_cron_field(fields[1], 0, 23)
+        self.days = set(_parse_cron_field(fields[2], 1, 31))
+        self.months = set(_parse_cron_field(fields[3], 1, 12))
+        self.weekdays = {day % 7 for day in _parse_cron_field(fields[4], 0, 7)}
+        self._any_day = fields[2] == '*'
+        self._any_weekday = fields[4] == '*'
+
+    def _day_matches(self, day: datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        day_match = day.day in self.days
+        # Python weekday() is Monday=0, cron is Sunday=0
+        weekday_match = (day.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return weekday_match
+        if self._any_weekday:
+            return day_match
+        return day_match or weekday_match
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after `after`"""
+        start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0)
+        for _ in range(CRON_SEARCH_DAYS):
+            if self._day_matches(day):
+                same_day = day.date() == start.date()
+                first_hour = start.hour if same_day else 0
+                for hour in self.hours[bisect.bisect_left(self.hours, first_hour):]:
+                    first_minute = start.minute if same_day and hour == start.hour else 0
+                    index = bisect.bisect_left(self.minutes, first_minute)
+                    if index < len(self.minutes):
+                        return day.replace(hour=hour, minute=self.minutes[index])
+            day += timedelta(days=1)
+        raise ValueError(f"Cron expression never matches: {self.expression}")
+
+
+class RecurrenceRule:
+    """How a recurring reminder repeats, stored on the reminder as a dict.
+
+    Only the next occurrence is ever scheduled: the store keeps the rule and
+    one pending time, and computes the following time after each firing.
+
+    Rule dicts look like:
+        {"freq": "daily", "time": "08:00"}
+        {"freq": "weekdays", "time": "07:30"}
+        {"freq": "weekly", "time": "18:00", "days": ["mon", "thu"]}
+        {"freq": "hourly", "interval": 2}
+        {"freq": "cron", "cron": "0 9 1 * *"}
+    """
+
+    def __init__(self, freq: str, time: Optional[str] = None, days: Optional[List[str]] = None,
+                 interval: Optional[int] = None, cron: Optional[str] = None):
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Unknown recurrence frequency: {freq}")
+        self.freq = freq
+        self.time = time
+        self.days = days
+        self.interval = interval
+        self.cron = cron
+
+        if time is not None:
+            hour, minute = (int(part) for part in time.split(':'))
+            if not (0 <= hour <= 23 and 0 <= minute <= 59):
+                raise ValueError(f"Invalid recurrence time: {time}")
+            self.time = f"{hour:02d}:{minute:02d}"
+        if freq == 'hourly':
+            if not interval or int(interval) < 1:
+                raise ValueError("Hourly recurrence needs an interval of at least 1 hour")
+            self.interval = int(interval)
+            self._schedule = None
+            return
+
+        if freq == 'cron':
+            if not cron:
+                raise ValueError("Cron recurrence needs a cron expression")
+            self._schedule = CronSchedule(cron)
+            return
+
+        hour, minute = (int(part) for part in (self.time or "09:00").split(':'))
+        self.time = f"{hour:02d}:{minute:02d}"
+        if freq == 'daily':
+            weekdays = '*'
+        elif freq == 'weekdays':
+            weekdays = '1-5'
+        else:
+            if not days:
+                raise ValueError("Weekly recurrence needs at least one day")
+            self.days = [day[:3].lower() for day in days]
+            if any(day not in WEEKDAY_NAMES for day in self.days):
+                raise ValueError(f"Invalid recurrence days: {days}")
+            self.days = sorted(set(self.days), key=WEEKDAY_NAMES.index)
+            weekdays = ','.join(str((WEEKDAY_NAMES.index(day) + 1) % 7) for day in self.days)
+        self._schedule = CronSchedule(f"{minute} {hour} * * {weekdays}")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RecurrenceRule':
+        """Build a rule from its stored form; raises ValueError if it is invalid"""
+        if not isinstance(data, dict):
+            raise ValueError("Recurrence must be an object")
+        for field, types in (('freq', str), ('time', str), ('interval', int), ('cron', str), ('days', list)):
+            value = data.get(field)
+            if value is not None and (not isinstance(value, types) or isinstance(value, bool)):
+                raise ValueError(f"Recurrence {field} has the wrong type: {value!r}")
+        if data.get('days') is not None and not all(isinstance(day, str) for day in data['days']):
+            raise ValueError(f"Recurrence days must be day names: {data['days']!r}")
+        return cls(data.get('freq', ''), time=data.get('time'), days=data.get('days'),
+                   interval=data.get('interval'), cron=data.get('cron'))
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"freq": self.freq}
+        for key in ('time', 'days', 'interval', 'cron'):
+            value = getattr(self, key)
+            if value is not None:
+                data[key] = value
+        return data
+
+    def first_occurrence(self, now: datetime) -> datetime:
+        """When a newly created reminder with this rule should first fire"""
+        if self.freq != 'hourly':
+            return self._schedule.next_after(now)
+        if self.time is None:
+            return now.replace(second=0, microsecond=0) + timedelta(hours=self.interval)
+        hour, minute = (int(part) for part in self.time.split(':'))
+        anchor = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return anchor if anchor > now else self.next_occurrence(now, anchor)
+
+    def next_occurrence(self, after: datetime, previous: datetime) -> datetime:
+        """First occurrence strictly after `after`.
+
+        `previous` is the occurrence that just fired; interval rules keep
+        their phase from it. Occurrences missed while the server was down
+        are skipped rather than fired one by one.
+        """
+        if self.freq != 'hourly':
+            return self._schedule.next_after(after)
+        step = timedelta(hours=self.interval)
+        if previous > after:
+            return previous
+        return previous + step * ((after - previous) // step + 1)
+
+    def describe(self) -> str:
+        """Short human readable form, e.g. "every weekday at 07:30 AM\""""
+        at = ""
+        if self.time:
+            at = " at " + datetime.strptime(self.time, "%H:%M").strftime("%I:%M %p")
+        if self.freq == 'daily':
+            return f"every day{at}"
+        if self.freq == 'weekdays':
+            return f"every weekday{at}"
+        if self.freq == 'weekly':
+            return f"every {', '.join(day.title() for day in self.days)}{at}"
+        if self.freq == 'hourly':
+            return "every hour" if self.interval == 1 else f"every {self.interval} hours"
+        return f"on cron schedule '{self.cron}'"
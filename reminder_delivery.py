@@ -0,0 +1,177 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import requests
+
+import metrics
+
+
+class ConsoleNotifier:
+    """Prints due reminders, as the scheduler always has"""
+
+    def send(self, deliveries: List[Dict[str, Any]]):
+        for delivery in deliveries:
+            print(f"Reminder due: {delivery['text']}")
+
+
+class WebhookNotifier:
+    """POSTs a batch of due reminders as {"reminders": [...]} to a URL.
+
+    Any connection error or non-2xx status fails the whole batch.
+    """
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def send(self, deliveries: List[Dict[str, Any]]):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        response = session.post(self.url, json={"reminders": deliveries}, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class DeliveryPool:
+    """Delivers due reminders on a bounded worker pool, batched per target.
+
+    submit() queues a delivery under a key identifying the firing; a key
+    already queued or in flight is ignored, so the scheduler can resubmit
+    every unacknowledged firing on each tick. A dispatcher thread hands up
+    to `batch_size` queued deliveries for one target to a free worker
+    (targets take turns), so batches grow while all `workers` are busy. A
+    failed batch is retried with exponential backoff and jitter, up to
+    `max_attempts` per delivery. Outcomes are collected by results() for
+    the caller to acknowledge in the store; until then a key counts as in
+    flight. Delivery is at least once: a crash before the acknowledgement
+    is saved means the firing is delivered again.
+    """
+
+    def __init__(self, notifiers: Dict[str, Any], route: Optional[Callable[[Dict[str, Any]], str]] = None,
+                 workers: int = 4, batch_size: int = 50, max_attempts: int = 5,
+                 backoff: float = 1.0, backoff_max: float = 60.0):
+        self.notifiers = notifiers
+        default_target = next(iter(notifiers))
+        self.route = route or (lambda delivery: default_target)
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self._condition = threading.Condition()
+        # target -> queued [key, delivery, target, attempts]
+        self._ready: Dict[str, deque] = {target: deque() for target in notifiers}
+        # (retry at, order, item) for failed deliveries waiting out their backoff
+        self._retries = []
+        self._order = itertools.count()
+        self._keys = set()
+        self._finished: List[Tuple[Hashable, bool]] = []
+        self._busy = 0
+        self._turn = 0
+        self._pid = None
+        self._executor = None
+
+    def _ensure_started(self):
+        # Threads do not survive fork(), so (re)start in each worker process
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="reminder-delivery")
+        threading.Thread(target=self._dispatch, daemon=True).start()
+
+    def submit(self, key: Hashable, delivery: Dict[str, Any]) -> bool:
+        """Queue a delivery; returns False if the key is already queued or in flight"""
+        with self._condition:
+            self._ensure_started()
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+            target = self.route(delivery)
+            self._ready[target].append([key, delivery, target, 0])
+            self._condition.notify_all()
+            return True
+
+    def results(self) -> List[Tuple[Hashable, bool]]:
+        """Take the (key, delivered) outcomes finished since the last call"""
+        with self._condition:
+            finished, self._finished = self._finished, []
+            for key, _ in finished:
+                self._keys.discard(key)
+            return finished
+
+    def pending(self) -> int:
+        """Deliveries queued, waiting to retry or in flight"""
+        return len(self._keys) - len(self._finished)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Wait until nothing is queued, waiting to retry or in flight"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._busy or self._retries or any(self._ready.values()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def _next_target(self) -> Optional[str]:
+        targets = list(self._ready)
+        for offset in range(len(targets)):
+            target = targets[(self._turn + offset) % len(targets)]
+            if self._ready[target]:
+                self._turn = (self._turn + offset + 1) % len(targets)
+                return target
+        return None
+
+    def _dispatch(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    while self._retries and self._retries[0][0] <= now:
+                        item = heapq.heappop(self._retries)[2]
+                        self._ready[item[2]].append(item)
+                    if self._busy < self.workers:
+                        target = self._next_target()
+                        if target is not None:
+                            break
+                    timeout = self._retries[0][0] - now if self._retries else None
+                    self._condition.wait(timeout)
+                ready = self._ready[target]
+                batch = [ready.popleft() for _ in range(min(self.batch_size, len(ready)))]
+                self._busy += 1
+            self._executor.submit(self._send, target, batch)
+
+    def _send(self, target: str, batch: List[list]):
+        try:
+            self.notifiers[target].send([item[1] for item in batch])
+            delivered = True
+        except Exception as e:
+            print(f"Reminder delivery to {target} failed: {e}")
+            delivered = False
+
+        with self._condition:
+            self._busy -= 1
+            now = time.monotonic()
+            for item in batch:
+                if delivered:
+                    self._finished.append((item[0], True))
+                    metrics.REMINDER_DELIVERIES.inc(target=target, outcome="delivered")
+                    continue
+                item[3] += 1
+                if item[3] >= self.max_attempts:
+                    self._finished.append((item[0], False))
+                    metrics.REMINDER_DELIVERIES.inc(target=target, outcome="failed")
+                    continue
+                delay = min(self.backoff * 2 ** (item[3] - 1), self.backoff_max) * random.uniform(0.5, 1.0)
+                heapq.heappush(self._retries, (now + delay, next(self._order), item))
+                metrics.REMINDER_DELIVERIES.inc(target=target, outcome="retried")
+            self._condition.notify_all()
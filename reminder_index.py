@@ -0,0 +1,209 @@
+import base64
+import binascii
+import bisect
+import re
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Sorts after every reminder id, so (time, AFTER_ALL_IDS) bounds "at or before time"
+AFTER_ALL_IDS = float('inf')
+
+# Words too common in reminders and questions to narrow a search
+STOP_WORDS = frozenset([
+    'a', 'an', 'the', 'to', 'at', 'in', 'on', 'for', 'of', 'and', 'or', 'me', 'my', 'i',
+    'about', 'with', 'is', 'it', 'set', 'remind', 'reminder', 'reminders'
+])
+
+
+class TimeIndex:
+    """Pending reminder ids kept sorted by (time, id) for range queries.
+
+    Lookups use bisect, so a window query costs O(log n + k) for k results
+    instead of a scan and sort of the whole store. Times are integer
+    microseconds (see reminder_record.to_micros).
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[int, int]] = []
+        self._key_by_id: Dict[int, Tuple[int, int]] = {}
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[int, int]]) -> 'TimeIndex':
+        """Index of (reminder_id, reminder_time) pairs, built with one sort.
+
+        Adding n unsorted times one at a time costs O(n^2) in list inserts;
+        use this when loading a store.
+        """
+        index = cls()
+        index._key_by_id = {reminder_id: (reminder_time, reminder_id) for reminder_id, reminder_time in items}
+        index._keys = sorted(index._key_by_id.values())
+        return index
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, reminder_id: int) -> bool:
+        return reminder_id in self._key_by_id
+
+    def add(self, reminder_id: int, reminder_time: int):
+        self.remove(reminder_id)
+        key = (reminder_time, reminder_id)
+        bisect.insort(self._keys, key)
+        self._key_by_id[reminder_id] = key
+
+    def remove(self, reminder_id: int):
+        key = self._key_by_id.pop(reminder_id, None)
+        if key is not None:
+            del self._keys[bisect.bisect_left(self._keys, key)]
+
+    def clear(self):
+        self._keys = []
+        self._key_by_id = {}
+
+    def first(self) -> Optional[int]:
+        """Earliest pending time, or None when nothing is pending"""
+        return self._keys[0][0] if self._keys else None
+
+    def time_of(self, reminder_id: int) -> Optional[int]:
+        key = self._key_by_id.get(reminder_id)
+        return key[0] if key else None
+
+    def _bounds(self, start: Optional[int], end: Optional[int], inclusive_start: bool) -> Tuple[int, int]:
+        if start is None:
+            lo = 0
+        elif inclusive_start:
+            lo = bisect.bisect_left(self._keys, (start,))
+        else:
+            lo = bisect.bisect_right(self._keys, (start, AFTER_ALL_IDS))
+        hi = len(self._keys) if end is None else bisect.bisect_right(self._keys, (end, AFTER_ALL_IDS))
+        return lo, max(lo, hi)
+
+    def count(self, start: Optional[int] = None, end: Optional[int] = None,
+              inclusive_start: bool = True) -> int:
+        """Number of ids with start <= time <= end"""
+        lo, hi = self._bounds(start, end, inclusive_start)
+        return hi - lo
+
+    def range(self, start: Optional[int] = None, end: Optional[int] = None,
+              after: Optional[Tuple[int, int]] = None, limit: Optional[int] = None,
+              inclusive_start: bool = True) -> List[int]:
+        """Ids with start <= time <= end in time order, resuming after a (time, id) key"""
+        lo, hi = self._bounds(start, end, inclusive_start)
+        if after is not None:
+            lo = max(lo, bisect.bisect_right(self._keys, after))
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return [reminder_id for _, reminder_id in self._keys[lo:hi]]
+
+    def due(self, now: int) -> List[int]:
+        """Ids whose time is at or before now"""
+        return self.range(end=now)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of a text, without stop words"""
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in STOP_WORDS]
+
+
+def _interned_tokens(text: str) -> Tuple[str, ...]:
+    return tuple({sys.intern(token) for token in tokenize(text)})
+
+
+class TextIndex:
+    """Inverted index from word tokens to reminder ids, with prefix matching.
+
+    The vocabulary is kept sorted, so the tokens starting with a prefix are
+    one contiguous bisect range. A search only touches the posting sets of
+    the matching tokens, never the whole store.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = {}
+        # A tuple of interned tokens per id; a set each would cost several
+        # times as much on stores of millions of reminders
+        self._tokens_by_id: Dict[int, Tuple[str, ...]] = {}
+        self._vocabulary: List[str] = []
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[int, str]]) -> 'TextIndex':
+        """Index of (reminder_id, text) pairs, with the vocabulary sorted once at the end"""
+        index = cls()
+        for reminder_id, text in items:
+            tokens = _interned_tokens(text)
+            index._tokens_by_id[reminder_id] = tokens
+            for token in tokens:
+                posting = index._postings.get(token)
+                if posting is None:
+                    posting = index._postings[token] = set()
+                posting.add(reminder_id)
+        index._vocabulary = sorted(index._postings)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._tokens_by_id)
+
+    def add(self, reminder_id: int, text: str):
+        self.remove(reminder_id)
+        tokens = _interned_tokens(text)
+        self._tokens_by_id[reminder_id] = tokens
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = set()
+                bisect.insort(self._vocabulary, token)
+            posting.add(reminder_id)
+
+    def remove(self, reminder_id: int):
+        for token in self._tokens_by_id.pop(reminder_id, ()):
+            posting = self._postings[token]
+            posting.discard(reminder_id)
+            if not posting:
+                del self._postings[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+
+    def clear(self):
+        self._postings = {}
+        self._tokens_by_id = {}
+        self._vocabulary = []
+
+    def _prefix_matches(self, prefix: str) -> Iterable[Set[int]]:
+        """Posting sets of every token starting with prefix"""
+        lo = bisect.bisect_left(self._vocabulary, prefix)
+        hi = bisect.bisect_left(self._vocabulary, prefix + '\uffff')
+        return [self._postings[token] for token in self._vocabulary[lo:hi]]
+
+    def search(self, query: str) -> Set[int]:
+        """Ids whose text has, for every query word, a token starting with it"""
+        terms = set(tokenize(query))
+        if not terms:
+            return set()
+        candidates = []
+        for term in terms:
+            postings = self._prefix_matches(term)
+            if not postings:
+                return set()
+            candidates.append(set().union(*postings) if len(postings) > 1 else postings[0])
+        # Intersect starting from the rarest term
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for ids in candidates[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+
+def encode_cursor(key: Tuple[datetime, int]) -> str:
+    """Opaque pagination cursor for the last (time, id) key of a page"""
+    reminder_time, reminder_id = key
+    return base64.urlsafe_b64encode(f"{reminder_time.isoformat()}|{reminder_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        time_part, id_part = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(time_part), int(id_part)
+    except (TypeError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
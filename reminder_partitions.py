@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from process_lock import FileLock
+from reminder_record import Reminder
+from services import ReminderManager
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+def partition_name(user_key: Optional[str]) -> str:
+    """File-safe partition name for a user key; '' is the shared default store"""
+    if not user_key:
+        return ""
+    return hashlib.sha1(user_key.encode()).hexdigest()[:20]
+
+
+class ReminderPartitions:
+    """Reminder stores partitioned by user, each with its own file and indexes.
+
+    Partitions are loaded on first use and kept in an LRU of at most
+    `max_loaded` entries; evict_idle() drops those unused for `idle_seconds`.
+    Every save is persisted, so evicting only frees memory.
+
+    A small manifest maps each partition to its next due time and to when
+    its oldest completed reminder completed, so the scheduler can find due
+    reminders and partitions to compact without loading every partition.
+    Requests without a user key share the default store at
+    `default_filename`, which keeps single-user setups working unchanged.
+    """
+
+    def __init__(self, directory: str, default_filename: str = "reminders.json",
+                 max_loaded: int = 1000, idle_seconds: float = 900):
+        self.directory = directory
+        self.default_filename = default_filename
+        self.max_loaded = max_loaded
+        self.idle_seconds = idle_seconds
+        os.makedirs(directory, exist_ok=True)
+
+        # name -> [manager, last used (monotonic seconds)], least recently used first
+        self._loaded: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._manifest_filename = os.path.join(directory, MANIFEST_FILENAME)
+        self._manifest_lock = threading.Lock()
+        self._manifest_file_lock = FileLock(self._manifest_filename + ".lock")
+        self._manifest: Dict[str, Optional[str]] = {}
+        self._oldest_completed: Dict[str, Optional[str]] = {}
+        self._manifest_stamp = None
+        # Manifests written before completions were tracked are rebuilt too
+        if not os.path.exists(self._manifest_filename) or not self._manifest_tracks_completed():
+            self._rebuild_manifest()
+
+    def filename_for(self, name: str) -> str:
+        if not name:
+            return self.default_filename
+        return os.path.join(self.directory, f"user-{name}.json")
+
+    def get(self, user_key: Optional[str]) -> ReminderManager:
+        """The caller's reminder store, loading it if needed"""
+        return self.get_partition(partition_name(user_key))
+
+    def get_partition(self, name: str) -> ReminderManager:
+        with self._lock:
+            entry = self._loaded.get(name)
+            if entry is not None:
+                entry[1] = time.monotonic()
+                self._loaded.move_to_end(name)
+                return entry[0]
+
+            manager = ReminderManager(self.filename_for(name))
+            manager.on_save = lambda saved, name=name: self._update_manifest(name, saved)
+            self._loaded[name] = [manager, time.monotonic()]
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        # Picks up partitions written before the manifest knew about them
+        self._update_manifest(name, manager)
+        return manager
+
+    def loaded(self) -> List[Tuple[str, ReminderManager]]:
+        """Snapshot of the partitions currently in memory"""
+        with self._lock:
+            return [(name, entry[0]) for name, entry in self._loaded.items()]
+
+    def evict_idle(self) -> int:
+        """Drop partitions not used for idle_seconds; returns how many"""
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            idle = [name for name, (_, last_used) in self._loaded.items() if last_used < cutoff]
+            for name in idle:
+                del self._loaded[name]
+        return len(idle)
+
+    def due_partitions(self, now: datetime) -> List[str]:
+        """Names of partitions whose next reminder is due at or before now"""
+        with self._manifest_lock:
+            self._read_manifest()
+            cutoff = now.isoformat()
+            return [name for name, next_due in self._manifest.items() if next_due and next_due <= cutoff]
+
+    def get_due_reminders(self) -> List[Tuple[str, Reminder]]:
+        """Fire due reminders across all partitions, loading only those with something due"""
+        due = []
+        for name in self.due_partitions(datetime.now()):
+            manager = self.get_partition(name)
+            due.extend((name, reminder) for reminder in manager.get_due_reminders())
+            # Nothing fired if the entry was stale; correct it so the
+            # partition is not loaded again on every tick
+            self._update_manifest(name, manager)
+        return due
+
+    def compactable_partitions(self, cutoff: datetime) -> List[str]:
+        """Names of partitions holding reminders completed at or before cutoff"""
+        with self._manifest_lock:
+            self._read_manifest()
+            cutoff = cutoff.isoformat()
+            return [name for name, oldest in self._oldest_completed.items() if oldest and oldest <= cutoff]
+
+    def compact(self, retention: timedelta) -> int:
+        """Archive reminders completed more than `retention` ago in every partition; returns how many.
+
+        Partitions are often evicted long before their reminders are old
+        enough to archive, so those due for compaction are loaded here.
+        """
+        archived = 0
+        for name in self.compactable_partitions(datetime.now() - retention):
+            manager = self.get_partition(name)
+            archived += manager.compact(retention)
+            # Entries held back (undelivered) or stale still need correcting
+            self._update_manifest(name, manager)
+        return archived
+
+    def undelivered(self) -> List[Tuple[str, Reminder, str]]:
+        """Unacknowledged firings in loaded partitions, as (name, reminder, time that fired).
+
+        Partitions with unacknowledged firings stay due in the manifest, so
+        get_due_reminders() keeps them loaded until delivery catches up.
+        """
+        return [(name, reminder, fired) for name, manager in self.loaded()
+                for reminder, fired in manager.undelivered()]
+
+    def _stat_manifest(self):
+        try:
+            stat = os.stat(self._manifest_filename)
+            return (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return None
+
+    def _read_manifest(self):
+        """Reload the manifest if another process changed it"""
+        stamp = self._stat_manifest()
+        if stamp == self._manifest_stamp:
+            return
+        try:
+            with open(self._manifest_filename, 'r') as f:
+                data = json.load(f)
+            self._manifest = data.get("next_due", {})
+            self._oldest_completed = data.get("oldest_completed", {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._manifest = {}
+            self._oldest_completed = {}
+        self._manifest_stamp = stamp
+
+    def _manifest_tracks_completed(self) -> bool:
+        try:
+            with open(self._manifest_filename, 'r') as f:
+                return "oldest_completed" in json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+
+    def _write_manifest(self):
+        tmp_filename = f"{self._manifest_filename}.{os.getpid()}.tmp"
+        with open(tmp_filename, 'w') as f:
+            json.dump({"next_due": self._manifest, "oldest_completed": self._oldest_completed}, f)
+        os.replace(tmp_filename, self._manifest_filename)
+        self._manifest_stamp = self._stat_manifest()
+
+    def _update_manifest(self, name: str, manager: ReminderManager):
+        next_time = manager.next_due_time()
+        next_due = next_time.isoformat() if next_time else None
+        completed_time = manager.oldest_completed_time()
+        oldest_completed = completed_time.isoformat() if completed_time else None
+        with self._manifest_lock:
+            self._read_manifest()
+            if self._manifest.get(name) == next_due and self._oldest_completed.get(name) == oldest_completed:
+                return
+            with self._manifest_file_lock:
+                self._manifest_stamp = None
+                self._read_manifest()
+                self._manifest[name] = next_due
+                self._oldest_completed[name] = oldest_completed
+                self._write_manifest()
+
+    def _rebuild_manifest(self):
+        """Recreate a missing manifest by loading each partition file once"""
+        names = [""] if os.path.exists(self.default_filename) else []
+        for filename in sorted(os.listdir(self.directory)):
+            if filename.startswith("user-") and filename.endswith(".json"):
+                names.append(filename[len("user-"):-len(".json")])
+        for name in names:
+            self._update_manifest(name, ReminderManager(self.filename_for(name)))
+        # Written even when nothing changed, so it is not rebuilt again
+        with self._manifest_lock, self._manifest_file_lock:
+            self._manifest_stamp = None
+            self._read_manifest()
+            self._write_manifest()
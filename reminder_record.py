@@ -0,0 +1,94 @@
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+# Times are naive local wall-clock times, as the app has always stored
+# them, kept as integer microseconds since this naive epoch. Unlike
+# datetime.timestamp() this needs no time zone and round-trips exactly.
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def to_micros(value: datetime) -> int:
+    """Integer microseconds since EPOCH; aware times are converted to local time first"""
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return (value - EPOCH) // MICROSECOND
+
+
+def from_micros(micros: int) -> datetime:
+    # Positional arguments; timedelta(microseconds=...) is markedly slower
+    return EPOCH + timedelta(0, 0, micros)
+
+
+def parse_micros(text: str) -> int:
+    return to_micros(datetime.fromisoformat(text))
+
+
+def format_micros(micros: int) -> str:
+    return from_micros(micros).isoformat()
+
+
+class Reminder:
+    """One stored reminder, compact in memory.
+
+    Large stores hold millions of these, so the record uses __slots__
+    instead of a per-instance dict, keeps times as integer microseconds
+    (see EPOCH) rather than ISO strings or datetimes, and interns the text
+    so repeated texts are stored once. Optional fields are None when
+    unset. to_dict() and from_dict() convert to and from the stored JSON
+    form, which is unchanged; only the API and file boundaries use dicts.
+    """
+
+    __slots__ = ("id", "text", "time", "completed", "created", "completed_at", "last_fired",
+                 "recurrence", "undelivered", "failed_deliveries")
+
+    def __init__(self, id: int, text: str, time: int, completed: bool = False, created: Optional[int] = None,
+                 completed_at: Optional[int] = None, last_fired: Optional[int] = None,
+                 recurrence: Optional[Dict[str, Any]] = None, undelivered: Optional[List[int]] = None,
+                 failed_deliveries: Optional[List[int]] = None):
+        self.id = id
+        self.text = sys.intern(text)
+        self.time = time
+        self.completed = completed
+        self.created = created
+        self.completed_at = completed_at
+        self.last_fired = last_fired
+        self.recurrence = recurrence
+        # Times this reminder fired that delivery has not acknowledged yet
+        self.undelivered = undelivered
+        # Times this reminder fired that could not be delivered
+        self.failed_deliveries = failed_deliveries
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Reminder":
+        get = data.get
+        return cls(
+            data["id"], data["text"], parse_micros(data["time"]), get("completed", False),
+            parse_micros(data["created"]) if get("created") else None,
+            parse_micros(data["completed_at"]) if get("completed_at") else None,
+            parse_micros(data["last_fired"]) if get("last_fired") else None,
+            get("recurrence"),
+            [parse_micros(fired) for fired in data["undelivered"]] if get("undelivered") else None,
+            [parse_micros(fired) for fired in data["failed_deliveries"]] if get("failed_deliveries") else None,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The stored JSON form, with ISO times"""
+        data = {"id": self.id, "text": self.text, "time": format_micros(self.time), "completed": self.completed}
+        if self.created is not None:
+            data["created"] = format_micros(self.created)
+        if self.completed_at is not None:
+            data["completed_at"] = format_micros(self.completed_at)
+        if self.recurrence is not None:
+            data["recurrence"] = self.recurrence
+        if self.last_fired is not None:
+            data["last_fired"] = format_micros(self.last_fired)
+        if self.undelivered:
+            data["undelivered"] = [format_micros(fired) for fired in self.undelivered]
+        if self.failed_deliveries:
+            data["failed_deliveries"] = [format_micros(fired) for fired in self.failed_deliveries]
+        return data
+
+    def __repr__(self) -> str:
+        return f"Reminder({self.to_dict()!r})"
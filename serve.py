@@ -0,0 +1,146 @@
+# Production entry point for the Voice Assistant backend.
+#
+# Serves the Flask app with a pre-forking, multi-threaded WSGI server
+# (gunicorn) instead of Flask's single-process development server:
+#
+#     python serve.py --workers 4 --threads 8
+#
+# The app is imported once in the master process and forked into the
+# workers. Each worker starts a reminder checker, but only the one that
+# holds config.REMINDER_LEADER_LOCK actually fires reminders.
+#
+# With --worker-class gevent each request runs in a greenlet and blocking
+# I/O (requests, the Gemini REST client, time.sleep) yields to other
+# requests, so one worker can hold many in-flight /api/command chains
+# instead of one per thread:
+#
+#     python serve.py --workers 2 --worker-class gevent
+#
+# gunicorn is not available on Windows; there the app is served by
+# waitress in a single multi-threaded process.
+#
+# Once the app is loaded, everything it holds (the reminder store above
+# all) is frozen out of the cyclic garbage collector, so full collections
+# in the workers stop rescanning it and the forked pages stay shared.
+
+import argparse
+import gc
+import os
+import sys
+
+import config
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Voice Assistant backend in production mode")
+    parser.add_argument('--host', default=config.SERVER_HOST, help="Interface to bind to")
+    parser.add_argument('--port', type=int, default=config.SERVER_PORT, help="Port to listen on")
+    parser.add_argument('--workers', type=int, default=config.SERVER_WORKERS, help="Number of worker processes")
+    parser.add_argument('--threads', type=int, default=config.SERVER_THREADS, help="Threads per worker process")
+    parser.add_argument('--worker-class', default=config.SERVER_WORKER_CLASS, choices=['gthread', 'gevent'],
+                        help="gthread: one request per thread, gevent: cooperative greenlets")
+    parser.add_argument('--worker-connections', type=int, default=config.SERVER_WORKER_CONNECTIONS,
+                        help="Maximum concurrent requests per gevent worker")
+    parser.add_argument('--app', default='backend_api:app', help="WSGI application as module:attribute")
+    return parser.parse_args(argv)
+
+
+def load_app(target: str):
+    """Import the WSGI application named by a module:attribute string"""
+    module_name, _, attribute = target.partition(':')
+    module = __import__(module_name, fromlist=[attribute or 'app'])
+    return getattr(module, attribute or 'app')
+
+
+def enable_gevent():
+    """Make blocking I/O cooperative before the app and its clients are imported"""
+    from gevent import monkey
+    monkey.patch_all()
+    # The gRPC transport does not cooperate with gevent; the REST transport
+    # goes through the patched socket module.
+    os.environ.setdefault('GEMINI_TRANSPORT', 'rest')
+    config.GEMINI_TRANSPORT = config.GEMINI_TRANSPORT or os.environ['GEMINI_TRANSPORT']
+
+
+def freeze_loaded_app():
+    """Move every object alive after loading the app out of the cyclic collector.
+
+    Slotted reminder records are always tracked by the collector, so a
+    large store would otherwise be rescanned by every full collection.
+    Collecting first frees pending cyclic garbage instead of freezing it.
+    Reminders loaded later (another worker's write, a partition opened
+    on demand) are collected as usual.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """gunicorn hook: start the background threads inside each worker.
+
+    Threads do not survive fork(), so this must run after the worker is
+    created rather than while the app is preloaded in the master.
+    """
+    import backend_api
+    backend_api.start_background_tasks()
+
+
+def run_gunicorn(app, args):
+    from gunicorn.app.base import BaseApplication
+
+    class StandaloneApplication(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    options = {
+        'bind': f"{args.host}:{args.port}",
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': args.worker_class,
+        'worker_connections': args.worker_connections,
+        'preload_app': True,
+        'post_fork': post_fork,
+        'timeout': 60,
+    }
+    StandaloneApplication(app, options).run()
+
+
+def run_waitress(app, args):
+    from waitress import serve
+    import backend_api
+
+    backend_api.start_background_tasks()
+    serve(app, host=args.host, port=args.port, threads=args.workers * args.threads)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.worker_class == 'gevent' and sys.platform != 'win32':
+        enable_gevent()
+    app = load_app(args.app)
+    freeze_loaded_app()
+
+    print("🚀 Starting Voice Assistant Backend API (production mode)...")
+    print(f"📍 Configured for {config.DEFAULT_CITY}, {config.DEFAULT_COUNTRY.upper()}")
+    if args.worker_class == 'gevent':
+        print(f"🌐 Serving on http://{args.host}:{args.port} with {args.workers} gevent workers x {args.worker_connections} connections")
+    else:
+        print(f"🌐 Serving on http://{args.host}:{args.port} with {args.workers} workers x {args.threads} threads")
+
+    if sys.platform == 'win32':
+        run_waitress(app, args)
+    else:
+        run_gunicorn(app, args)
+
+
+if __name__ == '__main__':
+    main()
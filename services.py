@@ -1,14 +1,28 @@
 import requests
+import copy
+import heapq
+import itertools
 import json
-from datetime import datetime
-from typing import Dict, Any, Optional
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
 import config
+import metrics
+import tracing
+from process_lock import FileLock
+from recurrence import RecurrenceRule
+from reminder_index import TextIndex, TimeIndex, tokenize
+from reminder_record import Reminder, format_micros, from_micros, parse_micros, to_micros
 
 class WeatherService:
     def __init__(self, api_key: str = None):
         self.api_key = api_key or config.OPENWEATHER_API_KEY
         self.base_url = "http://api.openweathermap.org/data/2.5/weather"
     
+    @tracing.traced("weather")
     def get_weather(self, city: str) -> Dict[str, Any]:
         """Get weather information for a city"""
         if self.api_key == "your_openweather_api_key":
@@ -29,8 +43,9 @@ class WeatherService:
                 "units": "imperial"
             }
             
-            response = requests.get(self.base_url, params=params, timeout=10)
-            response.raise_for_status()
+            with metrics.upstream_call("openweathermap"):
+                response = requests.get(self.base_url, params=params, timeout=10)
+                response.raise_for_status()
             
             data = response.json()
             return {
@@ -52,6 +67,7 @@ class NewsService:
         self.api_key = api_key or config.NEWS_API_KEY
         self.base_url = "https://newsapi.org/v2/top-headlines"
     
+    @tracing.traced("news")
     def get_news(self, country: str = None, category: str = "general") -> Dict[str, Any]:
         """Get top news headlines"""
         if country is None:
@@ -77,8 +93,9 @@ class NewsService:
                 "pageSize": 5
             }
             
-            response = requests.get(self.base_url, params=params, timeout=10)
-            response.raise_for_status()
+            with metrics.upstream_call("newsapi"):
+                response = requests.get(self.base_url, params=params, timeout=10)
+                response.raise_for_status()
             
             data = response.json()
             articles = data.get("articles", [])
@@ -99,96 +116,752 @@ class NewsService:
         except KeyError as e:
             return {"error": f"Invalid news data format: {str(e)}"}
 
+# Reminders converted and written per write() call when saving a store
+SAVE_CHUNK_SIZE = 1000
+
+def parse_reminder_record(record: Any) -> Dict[str, Any]:
+    """Validate one bulk import record and return it in stored form.
+    
+    Records need "text" and an ISO "time"; "completed", "completed_at",
+    "created" and "recurrence" are optional. Raises ValueError describing the problem.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Record must be a JSON object")
+    text = record.get("text")
+    if not isinstance(text, str) or not text.strip():
+        raise ValueError("'text' must be a non-empty string")
+    time_value = record.get("time")
+    if not isinstance(time_value, str):
+        raise ValueError("'time' must be an ISO date-time string")
+    reminder_time = datetime.fromisoformat(time_value)
+    completed = record.get("completed", False)
+    if not isinstance(completed, bool):
+        raise ValueError("'completed' must be true or false")
+    
+    reminder = {"text": text.strip(), "time": reminder_time.isoformat(), "completed": completed}
+    if completed and record.get("completed_at") is not None:
+        reminder["completed_at"] = datetime.fromisoformat(record["completed_at"]).isoformat()
+    if record.get("created") is not None:
+        reminder["created"] = datetime.fromisoformat(record["created"]).isoformat()
+    if record.get("recurrence") is not None:
+        reminder["recurrence"] = RecurrenceRule.from_dict(record["recurrence"]).to_dict()
+    return reminder
+
 class ReminderManager:
-    def __init__(self, filename: str = "reminders.json"):
+    def __init__(self, filename: str = "reminders.json", archive_filename: Optional[str] = None):
         self.filename = filename
+        # Completed reminders past the retention period are moved out of the
+        # live store into this append-only NDJSON segment by compact()
+        self.archive_filename = archive_filename or os.path.splitext(filename)[0] + ".archive.ndjson"
+        # Several worker processes may share the same file, so writes take an
+        # inter-process lock and every access catches up if another process
+        # changed the file since we last read it. Each save also appends the
+        # reminders it changed to this journal, numbered by the store's save
+        # count, so catching up replays a few records instead of reloading
+        # the whole store.
+        self.journal_filename = filename + ".journal"
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(filename + ".lock")
+        self._lock_depth = 0
+        self._file_stamp = None
+        self._journal_id = None
+        self._journal_offset = 0
+        # Called with the manager after every save (see ReminderPartitions)
+        self.on_save: Optional[Callable[['ReminderManager'], None]] = None
         self.reminders = self.load_reminders()
     
+    def _stat_file(self):
+        try:
+            stat = os.stat(self.filename)
+            return (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return None
+    
     def load_reminders(self) -> list:
         """Load reminders from file"""
+        self._file_stamp = self._stat_file()
         try:
             with open(self.filename, 'r') as f:
-                return json.load(f)
+                data = json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
-            return []
+            data = []
+        
+        # Older files hold a bare list of reminders
+        if isinstance(data, list):
+            data = {"reminders": data}
+        
+        records = data.get("reminders", [])
+        # Every mutation bumps the version and appends [version, id, op] to
+        # the change log, so clients can ask for what changed since a version
+        self.version = data.get("version", 0)
+        self.changes = data.get("changes", [])
+        self.saves = data.get("saves", 0)
+        # Ids changed since the last save, for its journal entry
+        self._unjournaled: Set[int] = set()
+        self._journal_reset = False
+        self._journaled_version = self.version
+        # Entries up to self.saves are skipped, so replay from the start
+        self._journal_id = None
+        self._journal_offset = 0
+        self.next_id = data.get("next_id", max((r["id"] for r in records), default=0) + 1)
+        # Reminders are held as compact records; dicts exist only in the
+        # file and in API responses (see reminder_record)
+        reminders = [Reminder.from_dict(record) for record in records]
+        del records
+        # Kept in id order, which exports page through; only a hand-edited
+        # file can be out of order
+        if any(reminders[i].id > reminders[i + 1].id for i in range(len(reminders) - 1)):
+            reminders.sort(key=lambda reminder: reminder.id)
+        self._by_id = {r.id: r for r in reminders}
+        # Completed reminders as a heap of (completed_at, id), oldest first
+        self._completed = []
+        # Ids of reminders with firings not yet acknowledged by delivery
+        self._undelivered = set()
+        pending = []
+        for reminder in reminders:
+            if not reminder.completed:
+                pending.append((reminder.id, reminder.time))
+            else:
+                completed_at = reminder.completed_at if reminder.completed_at is not None else reminder.time
+                self._completed.append((completed_at, reminder.id))
+            if reminder.undelivered:
+                self._undelivered.add(reminder.id)
+        heapq.heapify(self._completed)
+        # Pending reminders sorted by time, for due/upcoming/window queries.
+        # Both indexes are built with one sort; adding reminders one at a
+        # time would insert into sorted lists n times.
+        self._time_index = TimeIndex.from_items(pending)
+        del pending
+        # Word tokens of every reminder's text, for search
+        self._text_index = TextIndex.from_items((reminder.id, reminder.text) for reminder in reminders)
+        return reminders
+    
+    def _refresh(self):
+        """Catch up if the file was changed by another process.
+        
+        The other process's saves are replayed from the journal; the store
+        is only reloaded in full when the journal cannot bring it up to
+        date (it started over, was lost, or the store was cleared).
+        """
+        stamp = self._stat_file()
+        if stamp == self._file_stamp:
+            return
+        if stamp is not None and self._replay_journal():
+            self._file_stamp = stamp
+            metrics.REMINDER_STORE_REFRESHES.inc(kind="journal")
+        else:
+            self.reminders = self.load_reminders()
+            metrics.REMINDER_STORE_REFRESHES.inc(kind="reload")
+    
+    def _replay_journal(self) -> bool:
+        """Apply the journal entries after self.saves; False if they do not follow on"""
+        try:
+            with open(self.journal_filename, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                journal_id = (stat.st_dev, stat.st_ino)
+                offset = self._journal_offset if journal_id == self._journal_id else 0
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return False
+        
+        consumed = 0
+        try:
+            for line in data.splitlines(keepends=True):
+                # A save still being appended by another process
+                if not line.endswith(b"\n"):
+                    break
+                consumed += len(line)
+                saves, _, body = line.partition(b" ")
+                saves = int(saves)
+                if saves <= self.saves:
+                    continue
+                if saves != self.saves + 1:
+                    return False
+                entry = json.loads(body)
+                if entry.get("reset"):
+                    return False
+                self._apply_journal_entry(entry)
+                self.saves = saves
+        except (ValueError, KeyError, TypeError):
+            return False
+        self._journal_id = journal_id
+        self._journal_offset = offset + consumed
+        return True
+    
+    def _apply_journal_entry(self, entry: Dict[str, Any]):
+        """Bring the store and its indexes up to one save made by another process"""
+        self.changes.extend(change for change in entry["changes"] if change[0] > self.version)
+        self.version = self._journaled_version = entry["version"]
+        self.next_id = entry["next_id"]
+        overflow = len(self.changes) - config.REMINDER_CHANGE_LOG_SIZE
+        if overflow > 0:
+            del self.changes[:overflow]
+        
+        # Upserted records are in id order and new ids are the highest, so
+        # appending keeps self.reminders in id order
+        for record in entry["upserted"]:
+            saved = Reminder.from_dict(record)
+            reminder = self._by_id.get(saved.id)
+            if reminder is None:
+                reminder = saved
+                was_completed = False
+                old_text = None
+                self.reminders.append(reminder)
+                self._by_id[reminder.id] = reminder
+            else:
+                # Update in place; the record may already be referenced
+                was_completed = reminder.completed
+                old_text = reminder.text
+                for field in Reminder.__slots__:
+                    setattr(reminder, field, getattr(saved, field))
+            if reminder.completed:
+                self._time_index.remove(reminder.id)
+                if not was_completed:
+                    completed_at = reminder.completed_at if reminder.completed_at is not None else reminder.time
+                    heapq.heappush(self._completed, (completed_at, reminder.id))
+            else:
+                self._time_index.add(reminder.id, reminder.time)
+            if reminder.undelivered:
+                self._undelivered.add(reminder.id)
+            else:
+                self._undelivered.discard(reminder.id)
+            if reminder.text != old_text:
+                self._text_index.add(reminder.id, reminder.text)
+        
+        removed = set(entry["removed"])
+        for reminder_id in removed:
+            if self._by_id.pop(reminder_id, None) is not None:
+                self._time_index.remove(reminder_id)
+                self._text_index.remove(reminder_id)
+                self._undelivered.discard(reminder_id)
+        if removed:
+            self.reminders = [reminder for reminder in self.reminders if reminder.id not in removed]
+            self._completed = [entry for entry in self._completed if entry[1] not in removed]
+            heapq.heapify(self._completed)
+    
+    @contextmanager
+    def _locked(self):
+        """Hold the thread and file locks around a read-modify-write"""
+        with self._lock:
+            if self._lock_depth == 0:
+                self._file_lock.acquire()
+            self._lock_depth += 1
+            try:
+                if self._lock_depth == 1:
+                    self._refresh()
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    self._file_lock.release()
     
     def save_reminders(self):
-        """Save reminders to file"""
-        with open(self.filename, 'w') as f:
-            json.dump(self.reminders, f, indent=2)
+        """Save reminders to file.
+        
+        Records are converted to dicts and encoded a chunk at a time, so
+        saving a large store never holds all of them as dicts at once.
+        """
+        self.saves += 1
+        tmp_filename = f"{self.filename}.{os.getpid()}.tmp"
+        with open(tmp_filename, 'w') as f:
+            f.write(f'{{"version": {self.version}, "next_id": {self.next_id}, "saves": {self.saves}, '
+                    f'"changes": {json.dumps(self.changes)}, "reminders": [')
+            for offset in range(0, len(self.reminders), SAVE_CHUNK_SIZE):
+                chunk = json.dumps([reminder.to_dict() for reminder in self.reminders[offset:offset + SAVE_CHUNK_SIZE]])
+                f.write(("," if offset else "") + "\n" + chunk[1:-1])
+            f.write("\n]}\n")
+        # The journal is written first: a process that sees the new file
+        # must find the entry that brings it up to date
+        self._append_journal()
+        os.replace(tmp_filename, self.filename)
+        self._file_stamp = self._stat_file()
+        if self.on_save is not None:
+            self.on_save(self)
     
-    def add_reminder(self, text: str, reminder_time: datetime) -> bool:
-        """Add a new reminder"""
+    def _append_journal(self):
+        """Append the reminders changed since the last save to the journal"""
+        entry = {"version": self.version, "next_id": self.next_id,
+                 "changes": [change for change in self.changes if change[0] > self._journaled_version]}
+        if self._journal_reset:
+            entry["reset"] = True
+        else:
+            changed_ids = sorted(self._unjournaled)
+            entry["upserted"] = [self._by_id[reminder_id].to_dict()
+                                 for reminder_id in changed_ids if reminder_id in self._by_id]
+            entry["removed"] = [reminder_id for reminder_id in changed_ids if reminder_id not in self._by_id]
+        line = f"{self.saves} {json.dumps(entry)}\n"
+        self._unjournaled = set()
+        self._journal_reset = False
+        self._journaled_version = self.version
+        
         try:
-            reminder = {
-                "id": len(self.reminders) + 1,
-                "text": text,
-                "time": reminder_time.isoformat(),
-                "completed": False,
-                "created": datetime.now().isoformat()
-            }
-            
-            self.reminders.append(reminder)
-            self.save_reminders()
-            return True
+            try:
+                size = os.path.getsize(self.journal_filename)
+            except FileNotFoundError:
+                size = 0
+            # Start over when the journal grows too large, and on a new
+            # store's first save so entries of a deleted one are not replayed
+            if self.saves == 1 or size + len(line) > config.REMINDER_JOURNAL_MAX_BYTES:
+                tmp_filename = f"{self.journal_filename}.{os.getpid()}.tmp"
+                with open(tmp_filename, 'w') as f:
+                    f.write(line)
+                os.replace(tmp_filename, self.journal_filename)
+            else:
+                with open(self.journal_filename, 'a') as f:
+                    f.write(line)
+        except OSError as e:
+            # Without the journal other processes reload the whole store
+            print(f"Error writing reminder journal: {e}")
+            try:
+                os.remove(self.journal_filename)
+            except OSError:
+                pass
+            return
+        # Everything up to here is already applied
+        stat = os.stat(self.journal_filename)
+        self._journal_id = (stat.st_dev, stat.st_ino)
+        self._journal_offset = stat.st_size
+    
+    def _record_change(self, reminder_id: Optional[int], op: str):
+        """Bump the store version and log which reminder changed"""
+        if reminder_id is None:
+            self._journal_reset = True
+        else:
+            self._unjournaled.add(reminder_id)
+        self.version += 1
+        self.changes.append([self.version, reminder_id, op])
+        overflow = len(self.changes) - config.REMINDER_CHANGE_LOG_SIZE
+        if overflow > 0:
+            del self.changes[:overflow]
+    
+    @tracing.traced("reminders")
+    def add_reminder(self, text: str, reminder_time: datetime,
+                     recurrence: Optional[Dict[str, Any]] = None) -> bool:
+        """Add a new reminder, optionally repeating by a recurrence rule dict"""
+        try:
+            with self._locked():
+                reminder = {
+                    "text": text,
+                    "time": reminder_time.isoformat(),
+                    "completed": False
+                }
+                if recurrence is not None:
+                    reminder["recurrence"] = RecurrenceRule.from_dict(recurrence).to_dict()
+                
+                self._insert(reminder)
+                self.save_reminders()
+                return True
             
         except Exception:
             return False
     
-    def get_due_reminders(self) -> list:
-        """Get reminders that are due"""
-        current_time = datetime.now()
-        due_reminders = []
+    def _insert(self, fields: Dict[str, Any]):
+        """Assign an id to a new reminder and add it to the store (caller saves)"""
+        reminder = Reminder(
+            self.next_id, fields["text"], parse_micros(fields["time"]), fields["completed"],
+            parse_micros(fields["created"]) if fields.get("created") else to_micros(datetime.now()),
+            recurrence=fields.get("recurrence"))
+        self.next_id += 1
+        self.reminders.append(reminder)
+        self._by_id[reminder.id] = reminder
+        if not reminder.completed:
+            self._time_index.add(reminder.id, reminder.time)
+        else:
+            reminder.completed_at = parse_micros(fields["completed_at"]) if fields.get("completed_at") else reminder.time
+            heapq.heappush(self._completed, (reminder.completed_at, reminder.id))
+        self._text_index.add(reminder.id, reminder.text)
+        self._record_change(reminder.id, "add")
+    
+    @tracing.traced("reminders")
+    def import_reminders(self, reminders: List[Dict[str, Any]]) -> int:
+        """Add validated reminders (see parse_reminder_record) with a single save.
+        
+        Imported reminders get new ids; any ids in the records are ignored.
+        """
+        with self._locked():
+            for reminder in reminders:
+                self._insert(reminder)
+            if reminders:
+                self.save_reminders()
+            return len(reminders)
+    
+    def export_reminders(self, after_id: int = 0, limit: int = 1000,
+                         include_completed: bool = True) -> List[Reminder]:
+        """The next `limit` stored reminders with ids above after_id, in id order.
+        
+        Exports page through the store with this, so only one chunk is
+        copied at a time. A reminder added or deleted while an export runs
+        is exported or not depending on whether the export has passed its id.
+        """
+        with self._lock:
+            self._refresh()
+            lo, hi = 0, len(self.reminders)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if self.reminders[mid].id <= after_id:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if include_completed:
+                return self.reminders[lo:lo + limit]
+            chunk = []
+            for reminder in itertools.islice(self.reminders, lo, None):
+                if not reminder.completed:
+                    chunk.append(reminder)
+                    if len(chunk) == limit:
+                        break
+            return chunk
+    
+    def count_reminders(self, include_completed: bool = True) -> int:
+        """Number of stored reminders, or of pending ones"""
+        with self._lock:
+            self._refresh()
+            return len(self.reminders) if include_completed else len(self._time_index)
+    
+    def get_due_reminders(self) -> List[Reminder]:
+        """Get reminders that are due.
+        
+        One-shot reminders are marked completed. Recurring reminders stay
+        pending and are moved to their next occurrence; the returned entry is
+        a copy holding the time that fired. Every firing is also recorded as
+        undelivered until mark_delivered() acknowledges it.
+        """
+        with self._locked():
+            current_time = datetime.now()
+            due_reminders = []
+            
+            for reminder_id in self._time_index.due(to_micros(current_time)):
+                reminder = self._by_id[reminder_id]
+                if reminder.undelivered is None:
+                    reminder.undelivered = []
+                reminder.undelivered.append(reminder.time)
+                self._undelivered.add(reminder_id)
+                if reminder.recurrence is not None:
+                    due_reminders.append(copy.copy(reminder))
+                    self._reschedule(reminder, current_time)
+                    continue
+                due_reminders.append(reminder)
+                self._complete(reminder, current_time)
+            
+            if due_reminders:
+                self.save_reminders()
+            
+            return due_reminders
+    
+    def undelivered(self) -> List[Tuple[Reminder, str]]:
+        """Firings not yet acknowledged by delivery, as (reminder, ISO time that fired)"""
+        with self._lock:
+            self._refresh()
+            return [(self._by_id[reminder_id], format_micros(fired))
+                    for reminder_id in sorted(self._undelivered)
+                    for fired in self._by_id[reminder_id].undelivered]
+    
+    def mark_delivered(self, outcomes: List[Tuple[int, str, bool]]) -> int:
+        """Acknowledge firings as (id, time that fired, delivered) with a single save.
         
-        for reminder in self.reminders:
-            if not reminder["completed"]:
-                reminder_time = datetime.fromisoformat(reminder["time"])
-                if current_time >= reminder_time:
-                    due_reminders.append(reminder)
-                    reminder["completed"] = True
+        Firings that could not be delivered are kept in the reminder's
+        "failed_deliveries". Returns how many firings were acknowledged.
+        """
+        with self._locked():
+            acknowledged = 0
+            for reminder_id, fired, delivered in outcomes:
+                reminder = self._by_id.get(reminder_id)
+                fired = parse_micros(fired)
+                if reminder is None or fired not in (reminder.undelivered or ()):
+                    continue
+                reminder.undelivered.remove(fired)
+                if not delivered:
+                    if reminder.failed_deliveries is None:
+                        reminder.failed_deliveries = []
+                    reminder.failed_deliveries.append(fired)
+                if not reminder.undelivered:
+                    reminder.undelivered = None
+                    self._undelivered.discard(reminder_id)
+                self._unjournaled.add(reminder_id)
+                acknowledged += 1
+            if acknowledged:
+                self.save_reminders()
+            return acknowledged
+    
+    def _complete(self, reminder: Reminder, current_time: datetime):
+        """Mark a reminder that fired as completed, to be archived after the retention period"""
+        reminder.completed = True
+        reminder.completed_at = to_micros(current_time)
+        self._time_index.remove(reminder.id)
+        heapq.heappush(self._completed, (reminder.completed_at, reminder.id))
+        self._record_change(reminder.id, "complete")
+    
+    @tracing.traced("reminders")
+    def compact(self, retention: timedelta) -> int:
+        """Move reminders completed more than `retention` ago to the archive.
         
-        if due_reminders:
+        The archive is appended to before the live store is rewritten, so a
+        crash in between can at worst archive a reminder twice (history
+        queries skip the duplicate). Archiving does not bump the version:
+        completed reminders are already gone from the upcoming list.
+        """
+        with self._locked():
+            cutoff = to_micros(datetime.now() - retention)
+            archived = []
+            held = []
+            while self._completed and self._completed[0][0] <= cutoff:
+                entry = heapq.heappop(self._completed)
+                reminder = self._by_id.get(entry[1])
+                # Skip entries for reminders deleted since they completed
+                if reminder is None or not reminder.completed:
+                    continue
+                # Stay live until delivery is acknowledged
+                if reminder.undelivered:
+                    held.append(entry)
+                else:
+                    archived.append(reminder)
+            for entry in held:
+                heapq.heappush(self._completed, entry)
+            if not archived:
+                return 0
+            
+            with open(self.archive_filename, 'a') as f:
+                f.write("".join(json.dumps(reminder.to_dict()) + "\n" for reminder in archived))
+                f.flush()
+                os.fsync(f.fileno())
+            
+            archived_ids = set()
+            for reminder in archived:
+                archived_ids.add(reminder.id)
+                del self._by_id[reminder.id]
+                self._text_index.remove(reminder.id)
+            self.reminders = [reminder for reminder in self.reminders if reminder.id not in archived_ids]
+            self._unjournaled.update(archived_ids)
             self.save_reminders()
+            return len(archived)
+    
+    @tracing.traced("reminders")
+    def query_history(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      query: str = "", limit: int = 50) -> Dict[str, Any]:
+        """Get the most recent completed reminders, archived or not, newest first.
+        
+        Filters on start <= time <= end and, if given, on every query word
+        prefix-matching a word of the text. The archive is read line by line
+        and only `limit` results are held at a time.
+        """
+        terms = tokenize(query)
+        start = to_micros(start) if start else None
+        end = to_micros(end) if end else None
+        
+        def matches(reminder):
+            if (start is not None and reminder.time < start) or (end is not None and reminder.time > end):
+                return False
+            tokens = tokenize(reminder.text)
+            return all(any(token.startswith(term) for token in tokens) for term in terms)
         
-        return due_reminders
+        def completed_reminders():
+            seen = set()
+            with self._lock:
+                self._refresh()
+                live = [reminder for reminder in self.reminders if reminder.completed]
+            for reminder in live:
+                seen.add(reminder.id)
+                yield reminder
+            try:
+                with open(self.archive_filename, 'r') as f:
+                    for line in f:
+                        reminder = Reminder.from_dict(json.loads(line))
+                        if reminder.id not in seen:
+                            seen.add(reminder.id)
+                            yield reminder
+            except FileNotFoundError:
+                return
+        
+        total = 0
+        newest = []
+        for reminder in completed_reminders():
+            if not matches(reminder):
+                continue
+            total += 1
+            key = (reminder.time, reminder.id)
+            if len(newest) < limit:
+                heapq.heappush(newest, (key, reminder))
+            elif key > newest[0][0]:
+                heapq.heapreplace(newest, (key, reminder))
+        
+        return {"reminders": [reminder for _, reminder in sorted(newest, key=lambda item: item[0], reverse=True)],
+                "total": total}
+    
+    def _reschedule(self, reminder: Reminder, current_time: datetime):
+        """Move a recurring reminder that just fired to its next occurrence"""
+        fired_time = from_micros(reminder.time)
+        try:
+            next_time = RecurrenceRule.from_dict(reminder.recurrence).next_occurrence(current_time, fired_time)
+        except ValueError as e:
+            # A rule that can no longer be evaluated fires once more, then stops
+            print(f"Invalid recurrence on reminder {reminder.id}: {e}")
+            self._complete(reminder, current_time)
+            return
+        reminder.last_fired = reminder.time
+        reminder.time = to_micros(next_time)
+        self._time_index.add(reminder.id, reminder.time)
+        self._record_change(reminder.id, "update")
     
-    def get_upcoming_reminders(self) -> list:
+    def get_upcoming_reminders(self) -> List[Reminder]:
         """Get upcoming reminders"""
-        current_time = datetime.now()
-        upcoming = []
+        with self._lock:
+            self._refresh()
+            reminder_ids = self._time_index.range(start=to_micros(datetime.now()), inclusive_start=False)
+            return [self._by_id[reminder_id] for reminder_id in reminder_ids]
+    
+    @tracing.traced("reminders")
+    def query_reminders(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                        after: Optional[Tuple[datetime, int]] = None, limit: int = 50) -> Dict[str, Any]:
+        """Get one page of pending reminders with start <= time <= end.
         
-        for reminder in self.reminders:
-            if not reminder["completed"]:
-                reminder_time = datetime.fromisoformat(reminder["time"])
-                if current_time < reminder_time:
-                    upcoming.append(reminder)
+        start defaults to now (upcoming reminders only). `after` is the
+        (time, id) key of the last reminder on the previous page. The result
+        holds the page, the number of reminders in the whole window and the
+        key to resume from, or None on the last page.
+        """
+        with self._lock:
+            self._refresh()
+            inclusive_start = start is not None
+            start = to_micros(start if start is not None else datetime.now())
+            end = to_micros(end) if end is not None else None
+            if after is not None:
+                after = (to_micros(after[0]), after[1])
+            
+            reminder_ids = self._time_index.range(start, end, after=after, limit=limit + 1,
+                                                  inclusive_start=inclusive_start)
+            has_more = len(reminder_ids) > limit
+            reminder_ids = reminder_ids[:limit]
+            next_after = None
+            if has_more and reminder_ids:
+                last_id = reminder_ids[-1]
+                next_after = (from_micros(self._time_index.time_of(last_id)), last_id)
+            
+            return {
+                "version": self.version,
+                "reminders": [self._by_id[reminder_id] for reminder_id in reminder_ids],
+                "total": self._time_index.count(start, end, inclusive_start=inclusive_start),
+                "next_after": next_after
+            }
+    
+    @tracing.traced("reminders")
+    def search_reminders(self, query: str, limit: int = 50) -> Dict[str, Any]:
+        """Find reminders whose text matches every word of the query as a word prefix.
         
-        return sorted(upcoming, key=lambda x: x["time"])
+        Completed reminders are included. Matches are ordered by time and
+        the cost depends on the number of matches, not the store size.
+        """
+        with self._lock:
+            self._refresh()
+            matches = [self._by_id[reminder_id] for reminder_id in self._text_index.search(query)]
+            matches.sort(key=lambda reminder: (reminder.completed, reminder.time, reminder.id))
+            return {"version": self.version, "reminders": matches[:limit], "total": len(matches)}
     
+    def next_due_time(self) -> Optional[datetime]:
+        """When the earliest pending reminder fires, or None.
+        
+        Unacknowledged firings count as due at the time they fired, so the
+        scheduler keeps loading the store until they are delivered.
+        """
+        with self._lock:
+            times = [fired for reminder_id in self._undelivered for fired in self._by_id[reminder_id].undelivered]
+            next_time = self._time_index.first()
+        if next_time is not None:
+            times.append(next_time)
+        return from_micros(min(times)) if times else None
+    
+    def oldest_completed_time(self) -> Optional[datetime]:
+        """When the longest-completed reminder still in the live store completed, or None"""
+        with self._lock:
+            return from_micros(self._completed[0][0]) if self._completed else None
+    
+    def count_pending(self) -> int:
+        """Number of reminders that have not fired yet"""
+        return len(self._time_index)
+    
+    def _is_upcoming(self, reminder_id: int, current_time: int) -> bool:
+        reminder_time = self._time_index.time_of(reminder_id)
+        return reminder_time is not None and current_time < reminder_time
+    
+    @tracing.traced("reminders")
+    def get_changes(self, since: int) -> Dict[str, Any]:
+        """Get upcoming reminders added or updated, and ids removed, since a version.
+        
+        Cost depends on the number of changes, not the store size. If the
+        version is no longer covered by the change log (or the store was
+        cleared since), the result has reset=True and the caller should
+        fetch the full list again.
+        """
+        with self._lock:
+            self._refresh()
+            reset = {"version": self.version, "reset": True, "upserted": [], "removed": []}
+            oldest = self.changes[0][0] - 1 if self.changes else self.version
+            if since < oldest or since > self.version:
+                return reset
+            
+            # Versions in the log are consecutive, so the start is an offset
+            changed_ids = {}
+            for version, reminder_id, op in self.changes[since - oldest:]:
+                if op == "clear":
+                    return reset
+                changed_ids[reminder_id] = op
+            
+            current_time = to_micros(datetime.now())
+            upserted = []
+            removed = []
+            for reminder_id in changed_ids:
+                if self._is_upcoming(reminder_id, current_time):
+                    upserted.append(reminder_id)
+                else:
+                    removed.append(reminder_id)
+            
+            upserted.sort(key=lambda reminder_id: (self._time_index.time_of(reminder_id), reminder_id))
+            return {"version": self.version, "reset": False,
+                    "upserted": [self._by_id[reminder_id] for reminder_id in upserted], "removed": removed}
+    
+    @tracing.traced("reminders")
     def delete_reminder(self, reminder_id: int) -> bool:
         """Delete a reminder by ID"""
-        for i, reminder in enumerate(self.reminders):
-            if reminder["id"] == reminder_id:
-                self.reminders.pop(i)
-                self.save_reminders()
-                return True
-        return False
+        with self._locked():
+            reminder = self._by_id.pop(reminder_id, None)
+            if reminder is None:
+                return False
+            self.reminders.remove(reminder)
+            self._time_index.remove(reminder_id)
+            self._text_index.remove(reminder_id)
+            self._undelivered.discard(reminder_id)
+            self._record_change(reminder_id, "delete")
+            self.save_reminders()
+            return True
     
+    @tracing.traced("reminders")
     def update_reminder(self, reminder_id: int, text: str, reminder_time: datetime) -> bool:
         """Update a reminder by ID"""
-        for reminder in self.reminders:
-            if reminder["id"] == reminder_id:
-                reminder["text"] = text
-                reminder["time"] = reminder_time.isoformat()
-                self.save_reminders()
-                return True
-        return False
+        with self._locked():
+            reminder = self._by_id.get(reminder_id)
+            if reminder is None:
+                return False
+            reminder.text = sys.intern(text)
+            reminder.time = to_micros(reminder_time)
+            if not reminder.completed:
+                self._time_index.add(reminder_id, reminder.time)
+            self._text_index.add(reminder_id, text)
+            self._record_change(reminder_id, "update")
+            self.save_reminders()
+            return True
 
     def clear_all_reminders(self) -> bool:
         """Clear all reminders"""
         try:
-            self.reminders = []
-            self.save_reminders()
-            return True
+            with self._locked():
+                self.reminders = []
+                self._by_id = {}
+                self._time_index.clear()
+                self._text_index.clear()
+                self._completed = []
+                self._undelivered = set()
+                self._record_change(None, "clear")
+                self.save_reminders()
+                return True
         except Exception:
             return False
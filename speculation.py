@@ -0,0 +1,84 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import metrics
+
+
+def _same(a: Any, b: Any) -> bool:
+    if isinstance(a, str) and isinstance(b, str):
+        return " ".join(a.lower().split()) == " ".join(b.lower().split())
+    return a == b
+
+
+class Speculation:
+    """An upstream fetch started on the local guess of a command, before it is classified"""
+
+    def __init__(self, action: str, field: str, value: Any, future: Future, started: float):
+        self.action = action
+        self.field = field
+        self.value = value
+        self.future = future
+        self.started = started
+        self.finished: Optional[float] = None
+
+    def resolve(self, result: Dict[str, Any]) -> Optional[Future]:
+        """The fetch's future if the classified result agrees with the guess, else None.
+
+        A disagreeing fetch is cancelled if it has not started and its
+        result is dropped otherwise.
+        """
+        resolved = time.perf_counter()
+        if result.get("action") != self.action or not _same(result.get(self.field), self.value):
+            self.future.cancel()
+            metrics.SPECULATIONS.inc(action=self.action, outcome="miss")
+            return None
+        metrics.SPECULATIONS.inc(action=self.action, outcome="hit")
+
+        def record_saved(future: Future):
+            # The fetch overlapped classification until whichever ended first
+            if self.finished is not None:
+                saved = min(resolved, self.finished) - self.started
+                metrics.SPECULATION_SAVED.observe(max(saved, 0.0), action=self.action)
+
+        self.future.add_done_callback(record_saved)
+        return self.future
+
+
+class Speculator:
+    """Starts the weather or news fetch a command probably needs while it is still being classified.
+
+    `guess` is a cheap local classifier returning a result dict like the
+    command processor's (or None). When its action is one of `fetchers`,
+    mapped to (entity field, fetch function), the fetch of that field's
+    value starts on a worker pool right away; the caller resolves the
+    Speculation against the real classification and uses the fetched
+    result only if action and entity agree.
+    """
+
+    def __init__(self, guess: Callable[[str], Optional[Dict[str, Any]]],
+                 fetchers: Dict[str, Tuple[str, Callable[[Any], Any]]], workers: int = 8):
+        self.guess = guess
+        self.fetchers = fetchers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="speculation")
+
+    def start(self, command: str) -> Optional[Speculation]:
+        guess = self.guess(command)
+        if not guess or guess.get("action") not in self.fetchers:
+            return None
+        action = guess["action"]
+        field, fetch = self.fetchers[action]
+        value = guess.get(field)
+        if not value:
+            return None
+        speculation = Speculation(action, field, value, None, time.perf_counter())
+
+        def run():
+            try:
+                return fetch(value)
+            finally:
+                speculation.finished = time.perf_counter()
+
+        speculation.future = self._executor.submit(run)
+        metrics.SPECULATIONS.inc(action=action, outcome="started")
+        return speculation
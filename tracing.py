@@ -0,0 +1,98 @@
+import functools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+from flask import g, has_request_context
+
+# (name, start offset from request start, duration), both in seconds
+Span = Tuple[str, float, float]
+
+
+@contextmanager
+def span(name: str):
+    """Record how long a stage of the current request takes.
+
+    Outside a request (background threads, scripts) this does nothing.
+    """
+    if not has_request_context():
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        request_start = g.get('request_start', start)
+        g.setdefault('spans', []).append((name, start - request_start, end - start))
+        emit('stage', stage=name, duration_ms=round((end - start) * 1000, 3))
+
+
+def emit(event: str, **fields):
+    """Report progress of the current request to its listener, if one is set.
+
+    The WebSocket channel sets g.progress_listener to stream these to the
+    client while the command runs; plain HTTP requests have none.
+    """
+    if not has_request_context():
+        return
+    listener = g.get('progress_listener')
+    if listener is not None:
+        listener(event, fields)
+
+
+def traced(name: str):
+    """Decorator recording each call of the function as a span"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_spans() -> List[Span]:
+    return g.get('spans', []) if has_request_context() else []
+
+
+def server_timing_header(spans: List[Span], total: float) -> str:
+    """Format spans as a Server-Timing header value (durations in ms)"""
+    entries = [f"{name};dur={duration * 1000:.1f}" for name, _, duration in spans]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class TraceSampler:
+    """Appends a sampled fraction of request traces to a local NDJSON file"""
+
+    def __init__(self, filename: str, sample_rate: float):
+        self.filename = filename
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def write(self, route: str, method: str, status: int, total: float, spans: List[Span]):
+        record = {
+            "timestamp": time.time(),
+            "pid": os.getpid(),
+            "route": route,
+            "method": method,
+            "status": status,
+            "duration_ms": round(total * 1000, 3),
+            "spans": [
+                {"name": name, "start_ms": round(offset * 1000, 3), "duration_ms": round(duration * 1000, 3)}
+                for name, offset, duration in spans
+            ]
+        }
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            with open(self.filename, 'a') as f:
+                f.write(line)
@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Tuple
+
+import metrics
+
+# How much of a city's request count survives each prefetch cycle, so the
+# hot set follows recent traffic rather than all-time totals
+FREQUENCY_DECAY = 0.5
+# Cities whose decayed count drops below this stop being tracked
+MIN_TRACKED_COUNT = 0.1
+
+
+class WeatherPrefetcher:
+    """Weather cache that keeps the most requested cities fresh in the background.
+
+    Lookups are served from the cache while an entry is younger than `ttl`;
+    otherwise the caller fetches it. Every `interval` seconds the prefetch
+    loop refreshes the `top_k` most requested cities (always including the
+    default city) that would expire before the next cycle. Prefetching
+    stops for the hour once `budget_per_hour` upstream calls have been made;
+    calls made for cache misses count against the budget but are never
+    refused, since a user is waiting on them.
+    """
+
+    def __init__(self, fetch: Callable[[str], Dict[str, Any]], default_city: str, ttl: float = 600,
+                 interval: float = 300, top_k: int = 5, budget_per_hour: int = 120):
+        self.fetch = fetch
+        self.default_city = default_city
+        self.ttl = ttl
+        self.interval = interval
+        self.top_k = top_k
+        self.budget_per_hour = budget_per_hour
+        # city key -> (weather data, fetched at)
+        self._cache: Dict[str, tuple] = {}
+        # city key -> [decayed request count, name as last requested]
+        self._counts: Dict[str, list] = {}
+        self._calls = deque()
+        self._lock = threading.Lock()
+        self._running = False
+
+    @staticmethod
+    def _key(city: str) -> str:
+        return " ".join(city.lower().split())
+
+    def get_weather(self, city: str) -> Dict[str, Any]:
+        """Weather for a city, from the cache when fresh"""
+        return self.lookup(city, record=True)[0]
+
+    def lookup(self, city: str, record: bool = False) -> Tuple[Dict[str, Any], bool]:
+        """Weather for a city and whether it had to be fetched upstream.
+
+        Unless `record` is set the lookup is neither counted as a request for
+        the city nor charged to the call budget, so speculative fetches on a
+        wrong guess leave the hot-city ranking alone; call record_request()
+        once the request turns out to be real.
+        """
+        key = self._key(city)
+        if record:
+            self._count(key, city)
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None and time.time() - cached[1] < self.ttl:
+            if record:
+                metrics.WEATHER_CACHE.inc(result="hit")
+            return cached[0], False
+        if record:
+            metrics.WEATHER_CACHE.inc(result="miss")
+        return self._fetch(key, city, charge=record), True
+
+    def record_request(self, city: str, fetched: bool):
+        """Count a request served by an unrecorded lookup() as get_weather() would have"""
+        self._count(self._key(city), city)
+        metrics.WEATHER_CACHE.inc(result="miss" if fetched else "hit")
+        if fetched:
+            with self._lock:
+                self._calls.append(time.time())
+
+    def _count(self, key: str, city: str):
+        with self._lock:
+            entry = self._counts.get(key)
+            if entry is None:
+                self._counts[key] = [1.0, city]
+            else:
+                entry[0] += 1
+
+    def _fetch(self, key: str, city: str, charge: bool = True) -> Dict[str, Any]:
+        if charge:
+            with self._lock:
+                self._calls.append(time.time())
+        data = self.fetch(city)
+        # Errors and sample data (no API key) are not cached
+        if "error" not in data:
+            with self._lock:
+                self._cache[key] = (data, time.time())
+        return data
+
+    def _calls_in_last_hour(self) -> int:
+        cutoff = time.time() - 3600
+        with self._lock:
+            while self._calls and self._calls[0] < cutoff:
+                self._calls.popleft()
+            return len(self._calls)
+
+    def hot_cities(self) -> List[str]:
+        """Default city plus the top_k most requested cities, hottest first"""
+        with self._lock:
+            ranked = sorted(self._counts.values(), key=lambda entry: -entry[0])
+        cities = [self.default_city]
+        for _, city in ranked:
+            if len(cities) > self.top_k:
+                break
+            if self._key(city) != self._key(self.default_city):
+                cities.append(city)
+        return cities
+
+    def prefetch(self) -> int:
+        """Refresh hot cities that would expire before the next cycle; returns calls made"""
+        now = time.time()
+        refreshed = 0
+        for city in self.hot_cities():
+            key = self._key(city)
+            with self._lock:
+                cached = self._cache.get(key)
+            if cached is not None and now - cached[1] + self.interval < self.ttl:
+                continue
+            if self._calls_in_last_hour() >= self.budget_per_hour:
+                metrics.WEATHER_PREFETCH.inc(outcome="over_budget")
+                break
+            data = self._fetch(key, city)
+            metrics.WEATHER_PREFETCH.inc(outcome="error" if "error" in data else "refreshed")
+            refreshed += 1
+
+        with self._lock:
+            for key in list(self._counts):
+                entry = self._counts[key]
+                entry[0] *= FREQUENCY_DECAY
+                if entry[0] < MIN_TRACKED_COUNT:
+                    del self._counts[key]
+            # Drop expired entries of cities that are no longer requested
+            for key in [key for key, (_, fetched_at) in self._cache.items()
+                        if key not in self._counts and now - fetched_at >= self.ttl]:
+                del self._cache[key]
+        return refreshed
+
+    def start(self):
+        """Warm the default city and start the background prefetch loop"""
+        if self._running:
+            return
+        self._running = True
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self._running = False
+
+    def _run(self):
+        while self._running:
+            try:
+                self.prefetch()
+            except Exception as e:
+                print(f"Weather prefetch error: {e}")
+            time.sleep(self.interval)
+
+    def __len__(self) -> int:
+        """Number of cached cities"""
+        return len(self._cache)
@@ -0,0 +1,189 @@
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, g, request
+
+import metrics
+from reminder_partitions import partition_name
+
+try:
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+except ImportError:  # optional, /api/ws is only served when flask-sock is installed
+    Sock = None
+    ConnectionClosed = Exception
+
+
+class CommandChannel:
+    """One client's WebSocket connection carrying commands, progress and pushes.
+
+    The client sends {"id": ..., "command": "..."} messages and may send
+    the next before earlier ones are answered: up to `max_in_flight`
+    commands run at once (more wait their turn), each dispatched through
+    the app exactly like POST /api/command, so hooks, metrics and the
+    event log behave the same. While a command runs the client receives
+    {"id", "type": "intent"} and {"id", "type": "stage"} progress events,
+    then {"id", "type": "result", "status", ...} carrying the HTTP
+    response body. Ids are only echoed back, so results of pipelined
+    commands can arrive out of order. {"id", "type": "ping"} is answered
+    with "pong". Server pushes such as due reminders carry no id.
+    """
+
+    def __init__(self, app: Flask, ws, user_key: Optional[str], max_in_flight: int = 8):
+        self.app = app
+        self.ws = ws
+        self.user_key = user_key
+        self.closed = False
+        self._send_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="ws-command")
+        # Progress events and the result are small frames written back to
+        # back; without this Nagle holds each one until the client's delayed
+        # ACK (~40 ms) arrives
+        try:
+            ws.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (AttributeError, OSError):
+            pass
+
+    def send(self, message: Dict[str, Any]) -> bool:
+        """Send one message; returns False once the connection is gone"""
+        data = self.app.json.dumps(message)
+        with self._send_lock:
+            if self.closed:
+                return False
+            try:
+                self.ws.send(data)
+            except (ConnectionClosed, OSError):
+                self.closed = True
+                return False
+        metrics.WS_MESSAGES.inc(direction="sent")
+        return True
+
+    def serve(self):
+        """Handle client messages until the connection closes"""
+        try:
+            while True:
+                self.handle(self.ws.receive())
+        finally:
+            self.closed = True
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def handle(self, raw):
+        metrics.WS_MESSAGES.inc(direction="received")
+        try:
+            message = self.app.json.loads(raw)
+        except ValueError as e:
+            self.send({'type': 'error', 'error': f"Invalid JSON: {e}"})
+            return
+        if not isinstance(message, dict):
+            self.send({'type': 'error', 'error': "Messages must be JSON objects"})
+            return
+
+        request_id = message.get('id')
+        kind = message.get('type', 'command')
+        if kind == 'ping':
+            self.send({'id': request_id, 'type': 'pong'})
+        elif kind == 'command' and isinstance(message.get('command'), str):
+            self._executor.submit(self.run_command, request_id, message['command'])
+        else:
+            self.send({'id': request_id, 'type': 'error',
+                       'error': 'Expected {"id": ..., "command": "..."} or {"id": ..., "type": "ping"}'})
+
+    def run_command(self, request_id, command: str):
+        def progress(event, fields):
+            self.send({'id': request_id, 'type': event, **fields})
+
+        headers = {'X-User-Id': self.user_key} if self.user_key else {}
+        try:
+            with self.app.test_request_context('/api/command', method='POST', json={'command': command},
+                                               headers=headers):
+                g.progress_listener = progress
+                response = self.app.full_dispatch_request()
+                status = response.status_code
+                body = response.get_json(silent=True) or {}
+        except Exception as e:
+            status = 500
+            body = {'success': False, 'error': str(e), 'response': f"Error processing command: {str(e)}"}
+        self.send({'id': request_id, 'type': 'result', 'status': status, **body})
+
+
+class ChannelHub:
+    """Open command channels of this process, by reminder partition"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels: Dict[str, set] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(channels) for channels in self._channels.values())
+
+    def add(self, partition: str, channel: CommandChannel):
+        with self._lock:
+            self._channels.setdefault(partition, set()).add(channel)
+
+    def remove(self, partition: str, channel: CommandChannel):
+        with self._lock:
+            channels = self._channels.get(partition)
+            if channels is not None:
+                channels.discard(channel)
+                if not channels:
+                    del self._channels[partition]
+
+    def push(self, partition: str, message: Dict[str, Any]) -> int:
+        """Send a message to every open channel of a partition; returns how many got it"""
+        with self._lock:
+            channels = list(self._channels.get(partition, ()))
+        return sum(1 for channel in channels if channel.send(message))
+
+
+class PushNotifier:
+    """Pushes due reminders to their user's open channels, handing the rest to another notifier.
+
+    Reminders fire in the leader worker only, so with several server
+    workers a user connected to a different worker gets the fallback.
+    """
+
+    def __init__(self, hub: ChannelHub, fallback):
+        self.hub = hub
+        self.fallback = fallback
+
+    def send(self, deliveries: List[Dict[str, Any]]):
+        by_user: Dict[str, List[Dict[str, Any]]] = {}
+        for delivery in deliveries:
+            by_user.setdefault(delivery['user'] or "", []).append(delivery)
+        unpushed = []
+        for user, user_deliveries in by_user.items():
+            if not self.hub.push(user, {'type': 'reminders', 'reminders': user_deliveries}):
+                unpushed.extend(user_deliveries)
+        if unpushed:
+            self.fallback.send(unpushed)
+
+
+def install_command_channel(app: Flask, hub: ChannelHub, max_in_flight: int = 8,
+                            ping_interval: Optional[float] = None, max_message_size: Optional[int] = None) -> bool:
+    """Serve CommandChannels at /api/ws; returns False if flask-sock is not installed.
+
+    The user is taken from the `user` query parameter (browsers cannot set
+    headers on WebSocket requests) or the X-User-Id header.
+    """
+    if Sock is None:
+        print("flask-sock is not installed; the /api/ws command channel is disabled")
+        return False
+    app.config['SOCK_SERVER_OPTIONS'] = {'ping_interval': ping_interval, 'max_message_size': max_message_size}
+    sock = Sock(app)
+
+    @sock.route('/api/ws')
+    def command_channel(ws):
+        """Commands, progress events and reminder pushes over one WebSocket"""
+        user_key = request.args.get('user') or request.headers.get('X-User-Id')
+        partition = partition_name(user_key)
+        channel = CommandChannel(app, ws, user_key, max_in_flight)
+        hub.add(partition, channel)
+        try:
+            channel.serve()
+        finally:
+            hub.remove(partition, channel)
+
+    return True